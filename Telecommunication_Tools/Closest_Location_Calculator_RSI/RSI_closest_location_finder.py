@@ -1,175 +1,300 @@
-import pandas as pd
-from math import radians, sin, cos, sqrt, atan2
-from tkinter import Tk, Label, Entry, Button, filedialog, StringVar, OptionMenu, ttk
-from datetime import datetime
-import logging
-
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-def calculate_distance(lat1, lon1, lat2, lon2):
-    """Calculate the distance between two points on the Earth using the Haversine formula."""
-    R = 3958.8  # Radius of the Earth in miles
-
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-
-    a = sin(dlat / 2)**2 + cos(lat1) * cos(lat2) * sin(dlon / 2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-
-    distance = R * c
-    return distance
-
-def check_prach_sequence(sequence, value):
-    """Check if a given PRACH_ROOT_SEQUENCES contains a specific value."""
-    sequence_parts = str(sequence).split('-')
-    start, end = 0, 0
-    if len(sequence_parts) == 1 and sequence_parts[0].isdigit():
-        start = int(sequence_parts[0])
-        end = start + 1
-    elif len(sequence_parts) == 2 and sequence_parts[0].isdigit() and sequence_parts[1].isdigit():
-        start = int(sequence_parts[0])
-        end = int(sequence_parts[1]) + 1
-    return value in range(start, end)
-
-def find_closest_locations(df, poi_lat, poi_lon, selected_technology, num_rsi):
-    """Find the closest locations for each PRACH Root Sequences Index."""
-    results_data = []
-
-    for p1_value in range(num_rsi):
-        if selected_technology != "Both":
-            filtered_locations = df[df['TECHNOLOGY'] == selected_technology]
-        else:
-            filtered_locations = df
-
-        filtered_locations = filtered_locations[
-            filtered_locations['PRACH_ROOT_SEQUENCES'].apply(lambda x: check_prach_sequence(x, p1_value))
-        ]
-
-        closest_location = None
-        closest_distance = float('inf')
-        for _, loc in filtered_locations.iterrows():
-            distance = calculate_distance(poi_lat, poi_lon, loc["LATITUDE"], loc["LONGITUDE"])
-            if distance < closest_distance:
-                closest_location = loc
-                closest_distance = distance
-
-        results_row = {
-            "Point of Interest Lat": poi_lat,
-            "Point of Interest Long": poi_lon,
-            "RSI": p1_value,
-            "Closest Location": closest_location["SITE_NAME"] if closest_location is not None else "No location found",
-            "Technology": closest_location["TECHNOLOGY"] if closest_location is not None else "N/A",
-            "Distance (miles)": closest_distance if closest_location is not None else "N/A"
-        }
-        results_data.append(results_row)
-
-    return pd.DataFrame(results_data)
-
-def read_excel_file(file_path):
-    """Read an Excel file and return a DataFrame."""
-    return pd.read_excel(file_path)
-
-def save_to_excel(df, output_folder, selected_technology):
-    """Save the DataFrame to an Excel file with a timestamp."""
-    current_time = datetime.now().strftime("%Y%m%d%H%M%S")
-    output_file = f"{output_folder}/closest_locations_with_RSIs_output_{selected_technology}_{current_time}.xlsx"
-    df.to_excel(output_file, index=False)
-    return output_file
-
-def select_output_folder(entry_output_folder):
-    """Handle button click event for selecting output folder."""
-    output_folder = filedialog.askdirectory(title="Select Output Folder")
-    if output_folder:
-        entry_output_folder.delete(0, 'end')
-        entry_output_folder.insert(0, output_folder)
-
-def select_input_file(entry_input_file):
-    """Handle button click event for selecting input file."""
-    input_file = filedialog.askopenfilename(title="Select Input File", filetypes=[("Excel files", "*.xlsx")])
-    if input_file:
-        entry_input_file.delete(0, 'end')
-        entry_input_file.insert(0, input_file)
-
-def calculate_closest_locations(entry_lat, entry_lon, entry_input_file, entry_output_folder, technology_var, num_rsi_entry, progress_bar, result_label, root):
-    """Handle button click event to perform calculations."""
-    try:
-        poi_lat = float(entry_lat.get())
-        poi_lon = float(entry_lon.get())
-        input_path = entry_input_file.get()
-        num_rsi = int(num_rsi_entry.get())
-
-        df = read_excel_file(input_path)
-        selected_technology = technology_var.get()
-
-        progress_bar["maximum"] = num_rsi
-        progress_bar["value"] = 0
-        progress_bar.start()
-
-        results = find_closest_locations(df, poi_lat, poi_lon, selected_technology, num_rsi)
-
-        progress_bar.stop()
-
-        output_folder = entry_output_folder.get()
-        output_file = save_to_excel(results, output_folder, selected_technology)
-        result_label.config(text=f"Output saved to {output_file}")
-        logging.info(f"Output saved to {output_file}")
-    except ValueError as e:
-        result_label.config(text=f"Please enter valid input values. Error: {e}")
-        logging.error(f"ValueError: {e}")
-    except Exception as e:
-        result_label.config(text=f"An error occurred: {e}")
-        logging.error(f"Exception: {e}")
-
-def create_gui():
-    """Create and run the Tkinter GUI."""
-    root = Tk()
-    root.title("Closest Locations Finder")
-
-    label_lat = Label(root, text="Enter Latitude:")
-    label_lon = Label(root, text="Enter Longitude:")
-    entry_lat = Entry(root)
-    entry_lon = Entry(root)
-    label_input_file = Label(root, text="Input File:")
-    entry_input_file = Entry(root)
-    button_input = Button(root, text="Select Input File", command=lambda: select_input_file(entry_input_file))
-    label_output_folder = Label(root, text="Output Folder:")
-    entry_output_folder = Entry(root)
-    button_output = Button(root, text="Select Output Folder", command=lambda: select_output_folder(entry_output_folder))
-    label_num_rsi = Label(root, text="Number of PRACH Root Sequences (default 891):")
-    num_rsi_entry = Entry(root)
-    num_rsi_entry.insert(0, "891")
-    button_process = Button(root, text="Process", command=lambda: calculate_closest_locations(entry_lat, entry_lon, entry_input_file, entry_output_folder, technology_var, num_rsi_entry, progress_bar, result_label, root))
-    result_label = Label(root, text="")
-    progress_bar = ttk.Progressbar(root, orient="horizontal", length=200, mode="determinate")
-
-    technology_label = Label(root, text="Select Technology:")
-    technology_options = ["LTE", "5GNR", "Both"]
-    technology_var = StringVar(root)
-    technology_var.set("LTE")
-    technology_menu = OptionMenu(root, technology_var, *technology_options)
-
-    label_lat.grid(row=0, column=0, sticky="w", padx=5, pady=5)
-    entry_lat.grid(row=0, column=1, padx=5, pady=5)
-    label_lon.grid(row=1, column=0, sticky="w", padx=5, pady=5)
-    entry_lon.grid(row=1, column=1, padx=5, pady=5)
-    label_input_file.grid(row=2, column=0, sticky="w", padx=5, pady=5)
-    entry_input_file.grid(row=2, column=1, padx=5, pady=5)
-    button_input.grid(row=2, column=2, padx=5, pady=5)
-    label_output_folder.grid(row=3, column=0, sticky="w", padx=5, pady=5)
-    entry_output_folder.grid(row=3, column=1, padx=5, pady=5)
-    button_output.grid(row=3, column=2, padx=5, pady=5)
-    label_num_rsi.grid(row=4, column=0, sticky="w", padx=5, pady=5)
-    num_rsi_entry.grid(row=4, column=1, padx=5, pady=5)
-    technology_label.grid(row=5, column=0, sticky="w", padx=5, pady=5)
-    technology_menu.grid(row=5, column=1, columnspan=2, padx=5, pady=5)
-    button_process.grid(row=6, column=0, columnspan=2, padx=5, pady=5)
-    result_label.grid(row=7, column=0, columnspan=3, padx=5, pady=5)
-    progress_bar.grid(row=8, column=0, columnspan=3, padx=5, pady=5)
-
-    root.mainloop()
-
-if __name__ == "__main__":
-    create_gui()
+import os
+import queue
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+from tkinter import Tk, Label, Entry, Button, filedialog, StringVar, OptionMenu, ttk
+from datetime import datetime, timedelta
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rsi_common import PrachIndex, haversine, load_site_table, prepare_columns
+
+# Columns used from the site export and the dtypes they are cached with.
+# Coordinates stay float64 so distances match a direct read of the workbook.
+SITE_COLUMNS = {
+    "SITE_NAME": None,
+    "LATITUDE": "float64",
+    "LONGITUDE": "float64",
+    "TECHNOLOGY": "category",
+    "PRACH_ROOT_SEQUENCES": "text"
+}
+
+# Site files in Arrow IPC (Feather) format, as written by the Oracle exporter, are memory-mapped instead of parsed
+ARROW_EXTENSIONS = (".arrow", ".feather")
+
+# Earth radius the finder has always used, so distances in the output stay the same
+EARTH_RADIUS_MILES = 3958.8
+
+# Number of RSIs resolved between two progress reports
+RSI_CHUNK = 64
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def calculate_distances(poi_lat, poi_lon, lats, lons):
+    """Vectorized Haversine distance in miles from a point to arrays of points."""
+    return haversine(poi_lat, poi_lon, lats, lons, unit="miles", radius=EARTH_RADIUS_MILES)
+
+class ProcessingCancelled(Exception):
+    """Raised from a progress callback to stop a running computation."""
+
+class ProgressTracker:
+    """Turn (done, total) progress events into elapsed time and ETA figures."""
+
+    def __init__(self, unit="RSIs"):
+        self.unit = unit
+        self.started = time.monotonic()
+
+    def describe(self, done, total):
+        """Return a "done/total unit - elapsed, ETA" summary."""
+        elapsed = time.monotonic() - self.started
+        eta = elapsed / done * (total - done) if done else None
+        eta_text = str(timedelta(seconds=round(eta))) if eta is not None else "--:--:--"
+        return f"{done}/{total} {self.unit} - elapsed {timedelta(seconds=round(elapsed))}, ETA {eta_text}"
+
+def log_progress(unit="RSIs"):
+    """Return a progress callback that logs the same metrics the GUI shows."""
+    tracker = ProgressTracker(unit)
+    return lambda done, total: logging.info(tracker.describe(done, total))
+
+def find_closest_locations(df, poi_lat, poi_lon, selected_technology, num_rsi, progress_callback=None):
+    """Find the closest locations for each PRACH Root Sequences Index.
+
+    The PRACH ranges are parsed into a PrachIndex and the distances computed
+    once, then the nearest row per RSI is picked from the expanded
+    (RSI, row) pairs, sorting RSI_CHUNK RSIs at a time. Ties go to the
+    earliest row, as in a sequential scan. progress_callback, if given, is
+    called as progress_callback(done, num_rsi) after each chunk and may raise
+    ProcessingCancelled to stop.
+    """
+    if num_rsi <= 0:
+        return pd.DataFrame([])
+
+    if selected_technology != "Both":
+        filtered_locations = df[df['TECHNOLOGY'] == selected_technology]
+    else:
+        filtered_locations = df
+
+    distances = calculate_distances(poi_lat, poi_lon, filtered_locations["LATITUDE"], filtered_locations["LONGITUDE"])
+    prach_index = PrachIndex(filtered_locations['PRACH_ROOT_SEQUENCES'])
+
+    # Rows with an unknown distance can never be the closest location
+    rsis, row_ids = prach_index.expand(num_rsi, mask=~np.isnan(distances))
+
+    picks = np.full(num_rsi, -1, dtype=np.int64)
+    bounds = np.searchsorted(rsis, np.arange(0, num_rsi + RSI_CHUNK, RSI_CHUNK))
+    for chunk_start, (left, right) in enumerate(zip(bounds[:-1], bounds[1:])):
+        chunk_rsis, chunk_rows = rsis[left:right], row_ids[left:right]
+        order = np.lexsort((chunk_rows, distances[chunk_rows], chunk_rsis))
+        found_rsis, first = np.unique(chunk_rsis[order], return_index=True)
+        picks[found_rsis] = chunk_rows[order][first]
+        if progress_callback is not None:
+            progress_callback(min((chunk_start + 1) * RSI_CHUNK, num_rsi), num_rsi)
+
+    picked_distances = np.append(distances, np.nan)[picks]
+
+    return build_results_frame([poi_lat], [poi_lon], picks[np.newaxis, :], picked_distances[np.newaxis, :], filtered_locations)
+
+def build_results_frame(poi_lats, poi_lons, picks, distances, locations):
+    """Build the output DataFrame from per-POI, per-RSI picked row positions.
+
+    picks and distances have one row per POI and one column per RSI; a pick
+    of -1 means no location covers that RSI.
+    """
+    num_poi, num_rsi = picks.shape
+    picks = picks.ravel()
+    found = picks >= 0
+
+    site_names = np.full(len(picks), "No location found", dtype=object)
+    technologies = np.full(len(picks), "N/A", dtype=object)
+    picked_distances = np.full(len(picks), "N/A", dtype=object)
+    site_names[found] = locations["SITE_NAME"].to_numpy(dtype=object)[picks[found]]
+    technologies[found] = locations["TECHNOLOGY"].to_numpy(dtype=object)[picks[found]]
+    picked_distances[found] = distances.ravel()[found].tolist()
+
+    return pd.DataFrame({
+        "Point of Interest Lat": np.repeat(np.asarray(poi_lats, dtype=object), num_rsi).tolist(),
+        "Point of Interest Long": np.repeat(np.asarray(poi_lons, dtype=object), num_rsi).tolist(),
+        "RSI": np.tile(np.arange(num_rsi), num_poi).tolist(),
+        "Closest Location": site_names.tolist(),
+        "Technology": technologies.tolist(),
+        "Distance (miles)": picked_distances.tolist()
+    })
+
+def read_excel_file(file_path):
+    """Read an Excel file and return a DataFrame, served from the columnar site cache after the first load."""
+    return load_site_table(file_path, pd.read_excel, columns=SITE_COLUMNS)
+
+def sites_from_arrow(source):
+    """Build the site table from Arrow data: a pyarrow Table, record batches, or an Arrow IPC/Feather file, which is memory-mapped."""
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    if isinstance(source, str):
+        source = feather.read_table(source, columns=list(SITE_COLUMNS), memory_map=True)
+    elif not isinstance(source, pa.Table):
+        source = pa.Table.from_batches(list(source))
+    return prepare_columns(source.select(list(SITE_COLUMNS)).to_pandas(), SITE_COLUMNS)
+
+def read_site_file(file_path):
+    """Read the site table from an Excel workbook, or from an Arrow IPC/Feather file exported from Oracle."""
+    if file_path.lower().endswith(ARROW_EXTENSIONS):
+        return sites_from_arrow(file_path)
+    return read_excel_file(file_path)
+
+def save_to_excel(df, output_folder, selected_technology):
+    """Save the DataFrame to an Excel file with a timestamp."""
+    current_time = datetime.now().strftime("%Y%m%d%H%M%S")
+    output_file = f"{output_folder}/closest_locations_with_RSIs_output_{selected_technology}_{current_time}.xlsx"
+    df.to_excel(output_file, index=False)
+    return output_file
+
+def select_output_folder(entry_output_folder):
+    """Handle button click event for selecting output folder."""
+    output_folder = filedialog.askdirectory(title="Select Output Folder")
+    if output_folder:
+        entry_output_folder.delete(0, 'end')
+        entry_output_folder.insert(0, output_folder)
+
+def select_input_file(entry_input_file):
+    """Handle button click event for selecting input file."""
+    input_file = filedialog.askopenfilename(title="Select Input File", filetypes=[("Excel files", "*.xlsx"), ("Arrow files", "*.arrow *.feather")])
+    if input_file:
+        entry_input_file.delete(0, 'end')
+        entry_input_file.insert(0, input_file)
+
+def run_calculation(input_path, output_folder, poi_lat, poi_lon, selected_technology, num_rsi, events, cancel_event):
+    """Worker thread body: read, compute and save, posting progress events to a queue."""
+    def report(done, total):
+        if cancel_event.is_set():
+            raise ProcessingCancelled()
+        events.put(("progress", done, total))
+
+    try:
+        events.put(("status", "Reading input file..."))
+        df = read_site_file(input_path)
+        events.put(("status", "Finding closest locations..."))
+        results = find_closest_locations(df, poi_lat, poi_lon, selected_technology, num_rsi, progress_callback=report)
+        if cancel_event.is_set():
+            raise ProcessingCancelled()
+        events.put(("status", "Saving output..."))
+        output_file = save_to_excel(results, output_folder, selected_technology)
+        logging.info(f"Output saved to {output_file}")
+        events.put(("done", f"Output saved to {output_file}"))
+    except ProcessingCancelled:
+        logging.info("Processing cancelled")
+        events.put(("done", "Processing cancelled."))
+    except Exception as e:
+        logging.error(f"Exception: {e}")
+        events.put(("done", f"An error occurred: {e}"))
+
+def poll_events(events, tracker, progress_bar, result_label, progress_label, button_process, button_cancel, root):
+    """Apply the worker's queued events to the widgets on the Tk main thread."""
+    finished = False
+    while True:
+        try:
+            event = events.get_nowait()
+        except queue.Empty:
+            break
+        if event[0] == "progress":
+            _, done, total = event
+            progress_bar["maximum"] = total
+            progress_bar["value"] = done
+            progress_label.config(text=tracker.describe(done, total))
+        elif event[0] == "status":
+            result_label.config(text=event[1])
+        elif event[0] == "done":
+            result_label.config(text=event[1])
+            finished = True
+
+    if finished:
+        button_process.config(state="normal")
+        button_cancel.config(state="disabled")
+    else:
+        root.after(100, poll_events, events, tracker, progress_bar, result_label, progress_label, button_process, button_cancel, root)
+
+def calculate_closest_locations(entry_lat, entry_lon, entry_input_file, entry_output_folder, technology_var, num_rsi_entry, progress_bar, result_label, root, progress_label, button_process, button_cancel, cancel_event):
+    """Handle button click event to start the calculations on a worker thread."""
+    try:
+        poi_lat = float(entry_lat.get())
+        poi_lon = float(entry_lon.get())
+        input_path = entry_input_file.get()
+        num_rsi = int(num_rsi_entry.get())
+    except ValueError as e:
+        result_label.config(text=f"Please enter valid input values. Error: {e}")
+        logging.error(f"ValueError: {e}")
+        return
+
+    selected_technology = technology_var.get()
+    output_folder = entry_output_folder.get()
+
+    progress_bar["maximum"] = max(num_rsi, 1)
+    progress_bar["value"] = 0
+    progress_label.config(text="")
+    button_process.config(state="disabled")
+    button_cancel.config(state="normal")
+    cancel_event.clear()
+
+    events = queue.Queue()
+    worker = threading.Thread(target=run_calculation, args=(input_path, output_folder, poi_lat, poi_lon, selected_technology, num_rsi, events, cancel_event), daemon=True)
+    worker.start()
+    poll_events(events, ProgressTracker(), progress_bar, result_label, progress_label, button_process, button_cancel, root)
+
+def create_gui():
+    """Create and run the Tkinter GUI."""
+    root = Tk()
+    root.title("Closest Locations Finder")
+
+    label_lat = Label(root, text="Enter Latitude:")
+    label_lon = Label(root, text="Enter Longitude:")
+    entry_lat = Entry(root)
+    entry_lon = Entry(root)
+    label_input_file = Label(root, text="Input File:")
+    entry_input_file = Entry(root)
+    button_input = Button(root, text="Select Input File", command=lambda: select_input_file(entry_input_file))
+    label_output_folder = Label(root, text="Output Folder:")
+    entry_output_folder = Entry(root)
+    button_output = Button(root, text="Select Output Folder", command=lambda: select_output_folder(entry_output_folder))
+    label_num_rsi = Label(root, text="Number of PRACH Root Sequences (default 891):")
+    num_rsi_entry = Entry(root)
+    num_rsi_entry.insert(0, "891")
+    cancel_event = threading.Event()
+    button_process = Button(root, text="Process", command=lambda: calculate_closest_locations(entry_lat, entry_lon, entry_input_file, entry_output_folder, technology_var, num_rsi_entry, progress_bar, result_label, root, progress_label, button_process, button_cancel, cancel_event))
+    button_cancel = Button(root, text="Cancel", state="disabled", command=cancel_event.set)
+    result_label = Label(root, text="")
+    progress_label = Label(root, text="")
+    progress_bar = ttk.Progressbar(root, orient="horizontal", length=200, mode="determinate")
+
+    technology_label = Label(root, text="Select Technology:")
+    technology_options = ["LTE", "5GNR", "Both"]
+    technology_var = StringVar(root)
+    technology_var.set("LTE")
+    technology_menu = OptionMenu(root, technology_var, *technology_options)
+
+    label_lat.grid(row=0, column=0, sticky="w", padx=5, pady=5)
+    entry_lat.grid(row=0, column=1, padx=5, pady=5)
+    label_lon.grid(row=1, column=0, sticky="w", padx=5, pady=5)
+    entry_lon.grid(row=1, column=1, padx=5, pady=5)
+    label_input_file.grid(row=2, column=0, sticky="w", padx=5, pady=5)
+    entry_input_file.grid(row=2, column=1, padx=5, pady=5)
+    button_input.grid(row=2, column=2, padx=5, pady=5)
+    label_output_folder.grid(row=3, column=0, sticky="w", padx=5, pady=5)
+    entry_output_folder.grid(row=3, column=1, padx=5, pady=5)
+    button_output.grid(row=3, column=2, padx=5, pady=5)
+    label_num_rsi.grid(row=4, column=0, sticky="w", padx=5, pady=5)
+    num_rsi_entry.grid(row=4, column=1, padx=5, pady=5)
+    technology_label.grid(row=5, column=0, sticky="w", padx=5, pady=5)
+    technology_menu.grid(row=5, column=1, columnspan=2, padx=5, pady=5)
+    button_process.grid(row=6, column=0, columnspan=2, padx=5, pady=5)
+    button_cancel.grid(row=6, column=2, padx=5, pady=5)
+    result_label.grid(row=7, column=0, columnspan=3, padx=5, pady=5)
+    progress_bar.grid(row=8, column=0, columnspan=3, padx=5, pady=5)
+    progress_label.grid(row=9, column=0, columnspan=3, padx=5, pady=5)
+
+    root.mainloop()
+
+if __name__ == "__main__":
+    create_gui()
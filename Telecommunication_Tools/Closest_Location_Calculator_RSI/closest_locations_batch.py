@@ -0,0 +1,110 @@
+import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from RSI_closest_location_finder import EARTH_RADIUS_MILES, build_results_frame, log_progress, read_site_file
+from rsi_common import RsiNearestIndex
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Number of POIs above which the queries are spread across a process pool
+PARALLEL_THRESHOLD = 200
+
+# Number of POIs queried between two progress reports
+POI_CHUNK = 64
+
+class SiteIndex(RsiNearestIndex):
+    """Nearest-site lookup per RSI over the sites of one technology, built once and queried for many POIs."""
+
+    def __init__(self, df, selected_technology, num_rsi):
+        if selected_technology != "Both":
+            df = df[df['TECHNOLOGY'] == selected_technology]
+        self.locations = df
+        super().__init__(df["LATITUDE"], df["LONGITUDE"], df['PRACH_ROOT_SEQUENCES'], num_rsi,
+                         radius=EARTH_RADIUS_MILES)
+
+_worker_index = None
+
+def _init_worker(df, selected_technology, num_rsi):
+    """Build the site index once per worker process."""
+    global _worker_index
+    _worker_index = SiteIndex(df, selected_technology, num_rsi)
+
+def _query_chunk(poi_lats, poi_lons):
+    """Query a chunk of POIs against the worker's site index."""
+    return _worker_index.query(poi_lats, poi_lons)
+
+def find_closest_locations_batch(df, pois, selected_technology, num_rsi, jobs=None, progress_callback=None):
+    """Find the closest locations for each RSI for every POI in a DataFrame.
+
+    pois needs LATITUDE and LONGITUDE columns. The result has the same columns
+    as find_closest_locations, with the rows of each POI in input order.
+    progress_callback, if given, is called as progress_callback(done, total)
+    in POIs after each chunk of POIs.
+    """
+    poi_lats = pois["LATITUDE"].tolist()
+    poi_lons = pois["LONGITUDE"].tolist()
+    if num_rsi <= 0:
+        return pd.DataFrame([])
+
+    jobs = jobs or os.cpu_count() or 1
+    bounds = list(range(0, len(poi_lats), POI_CHUNK)) + [len(poi_lats)]
+    chunks = [(poi_lats[start:end], poi_lons[start:end]) for start, end in zip(bounds[:-1], bounds[1:])]
+    results = []
+
+    if jobs == 1 or len(poi_lats) < PARALLEL_THRESHOLD:
+        index = SiteIndex(df, selected_technology, num_rsi)
+        for chunk_lats, chunk_lons in chunks:
+            results.append(index.query(chunk_lats, chunk_lons))
+            if progress_callback is not None:
+                progress_callback(sum(len(chunk_picks) for chunk_picks, _ in results), len(poi_lats))
+        locations = index.locations
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(df, selected_technology, num_rsi)) as pool:
+            futures = [pool.submit(_query_chunk, chunk_lats, chunk_lons) for chunk_lats, chunk_lons in chunks]
+            done = 0
+            for future, (chunk_lats, _) in zip(futures, chunks):
+                results.append(future.result())
+                done += len(chunk_lats)
+                if progress_callback is not None:
+                    progress_callback(done, len(poi_lats))
+        locations = df if selected_technology == "Both" else df[df['TECHNOLOGY'] == selected_technology]
+
+    if not results:
+        results.append((np.empty((0, num_rsi), dtype=np.int64), np.empty((0, num_rsi))))
+    picks = np.vstack([chunk_picks for chunk_picks, _ in results])
+    distances = np.vstack([chunk_distances for _, chunk_distances in results])
+    return build_results_frame(poi_lats, poi_lons, picks, distances, locations)
+
+def save_results(df, output_file):
+    """Save the combined results as CSV or Excel depending on the file extension."""
+    if output_file.lower().endswith(".xlsx"):
+        df.to_excel(output_file, index=False)
+    else:
+        df.to_csv(output_file, index=False)
+    return output_file
+
+def main(argv=None):
+    """Command line entry point for the batch closest-location finder."""
+    parser = argparse.ArgumentParser(description="Find the closest location per RSI for many points of interest.")
+    parser.add_argument("input_file", help="Excel or Arrow (.arrow/.feather) file with SITE_NAME, LATITUDE, LONGITUDE, TECHNOLOGY and PRACH_ROOT_SEQUENCES columns")
+    parser.add_argument("poi_file", help="CSV file with LATITUDE and LONGITUDE columns, one POI per row")
+    parser.add_argument("output_file", help="Output .csv or .xlsx file")
+    parser.add_argument("--technology", choices=["LTE", "5GNR", "Both"], default="LTE")
+    parser.add_argument("--num-rsi", type=int, default=891, help="Number of PRACH Root Sequences (default 891)")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: number of CPUs)")
+    args = parser.parse_args(argv)
+
+    df = read_site_file(args.input_file)
+    pois = pd.read_csv(args.poi_file)
+    results = find_closest_locations_batch(df, pois, args.technology, args.num_rsi, jobs=args.jobs, progress_callback=log_progress("POIs"))
+    save_results(results, args.output_file)
+    logging.info(f"Output saved to {args.output_file}")
+
+if __name__ == "__main__":
+    main()
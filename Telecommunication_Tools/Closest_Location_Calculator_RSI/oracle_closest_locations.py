@@ -0,0 +1,111 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from RSI_closest_location_finder import SITE_COLUMNS, find_closest_locations, log_progress, sites_from_arrow
+from closest_locations_batch import find_closest_locations_batch, save_results
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'oracle-query-exporter'))
+from export_stream import DEFAULT_BATCH_SIZE, fetch_arrow_table, temp_path
+from oracle_query_script import connect, site_source
+from partitioned_export import SqlitePool
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Only the columns the finder uses are fetched
+site_query = f"SELECT {', '.join(SITE_COLUMNS)} FROM {site_source}"
+
+@contextmanager
+def timed(stage, timings):
+    """Time a pipeline stage into timings[stage] and log it."""
+    started = time.perf_counter()
+    yield
+    timings[stage] = time.perf_counter() - started
+    logging.info(f"{stage}: {timings[stage]:.2f} s")
+
+def save_arrow(table, arrow_file):
+    """Write the fetched sites as an uncompressed Arrow IPC (Feather) file, under a temporary name renamed into place."""
+    import pyarrow.feather as feather
+
+    partial_path = temp_path(arrow_file)
+    try:
+        feather.write_feather(table, partial_path, compression="uncompressed")
+        os.replace(partial_path, arrow_file)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+def run_pipeline(connection, pois, selected_technology, num_rsi, output_file, arrow_file=None, jobs=None,
+                 batch_size=DEFAULT_BATCH_SIZE):
+    """Fetch the sites from the database and find the closest location per RSI for the POIs, without an Excel handoff.
+
+    The query result is fetched straight into Arrow record batches, turned
+    into the finder's site table and queried; optionally the batches are also
+    saved to arrow_file, which the finder and the batch tool can memory-map
+    later. pois is a DataFrame with LATITUDE and LONGITUDE columns. Returns the
+    seconds spent per stage: fetch, save_arrow, load, compute and save.
+    """
+    timings = {}
+    with timed("fetch", timings):
+        cursor = connection.cursor()
+        try:
+            table = fetch_arrow_table(cursor, site_query, batch_size=batch_size)
+        finally:
+            cursor.close()
+    logging.info(f"Fetched {table.num_rows} sites in {len(table.to_batches())} record batches")
+
+    if arrow_file:
+        with timed("save_arrow", timings):
+            save_arrow(table, arrow_file)
+
+    with timed("load", timings):
+        df = sites_from_arrow(table)
+
+    with timed("compute", timings):
+        if len(pois) == 1:
+            results = find_closest_locations(df, float(pois["LATITUDE"].iloc[0]), float(pois["LONGITUDE"].iloc[0]),
+                                             selected_technology, num_rsi, progress_callback=log_progress())
+        else:
+            results = find_closest_locations_batch(df, pois, selected_technology, num_rsi, jobs=jobs,
+                                                   progress_callback=log_progress("POIs"))
+
+    with timed("save", timings):
+        save_results(results, output_file)
+    logging.info(f"Output saved to {output_file}; total {sum(timings.values()):.2f} s")
+    return timings
+
+def main(argv=None):
+    """Command line entry point for the Oracle to closest-location pipeline."""
+    parser = argparse.ArgumentParser(description="Query the sites from Oracle and find the closest location per RSI, without an Excel export.")
+    parser.add_argument("output_file", help="Output .csv or .xlsx file")
+    poi = parser.add_mutually_exclusive_group(required=True)
+    poi.add_argument("--poi", type=float, nargs=2, metavar=("LAT", "LON"), help="One point of interest")
+    poi.add_argument("--poi-file", help="CSV file with LATITUDE and LONGITUDE columns, one POI per row")
+    parser.add_argument("--technology", choices=["LTE", "5GNR", "Both"], default="LTE")
+    parser.add_argument("--num-rsi", type=int, default=891, help="Number of PRACH Root Sequences (default 891)")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes for many POIs (default: number of CPUs)")
+    parser.add_argument("--arrow-file", default=None, help="Also save the fetched sites to this .arrow/.feather file")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per fetch round trip")
+    parser.add_argument("--sqlite", metavar="DB", default=None, help="Read from a SQLite copy of SITES_ATOLL_V instead of Oracle")
+    args = parser.parse_args(argv)
+
+    if args.poi:
+        pois = pd.DataFrame({"LATITUDE": [args.poi[0]], "LONGITUDE": [args.poi[1]]})
+    else:
+        pois = pd.read_csv(args.poi_file)
+
+    connection = SqlitePool(args.sqlite).acquire() if args.sqlite else connect()
+    try:
+        run_pipeline(connection, pois, args.technology, args.num_rsi, args.output_file, args.arrow_file, args.jobs,
+                     args.batch_size)
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import os
+import sys
+from math import atan2, cos, radians, sin, sqrt
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from RSI_closest_location_finder import calculate_distances
+
+
+def calculate_distance(lat1, lon1, lat2, lon2):
+    """Per-row Haversine of the finder before it was vectorized, kept as the reference."""
+    R = 3958.8  # Radius of the Earth in miles
+
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    a = sin((lat2 - lat1) / 2)**2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2)**2
+    return R * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_calculate_distances_matches_row_wise(seed):
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(25, 49, 500)
+    lons = rng.uniform(-124, -67, 500)
+
+    distances = calculate_distances(35.6, -80.6, lats, lons)
+
+    expected = [calculate_distance(35.6, -80.6, lat, lon) for lat, lon in zip(lats, lons)]
+    np.testing.assert_allclose(distances, expected, rtol=1e-12)
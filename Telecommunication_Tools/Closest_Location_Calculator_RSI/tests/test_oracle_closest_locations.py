@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from RSI_closest_location_finder import SITE_COLUMNS, find_closest_locations, prepare_columns
+from oracle_closest_locations import run_pipeline, site_query
+from export_stream import fetch_arrow_table
+
+# Rows per fetch in the tests; the first NON_NULL_FROM rows hold NULL coordinates and PRACH
+BATCH_SIZE = 20
+NON_NULL_FROM = 50
+NUM_SITES = 120
+
+
+def site_rows():
+    """Sites whose LATITUDE, LONGITUDE and PRACH_ROOT_SEQUENCES are NULL throughout the first fetches."""
+    rows = []
+    for i in range(NUM_SITES):
+        late = i >= NON_NULL_FROM
+        rows.append((f"SITE{i:03d}", 35.0 + i * 0.01 if late else None, -80.0 - i * 0.01 if late else None,
+                     "LTE" if i % 3 else "5GNR", f"{(i * 7) % 800}-{(i * 7) % 800 + 9}" if late else None,
+                     "carolinas", "0000"))
+    return rows
+
+
+@pytest.fixture
+def connection():
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE SITES_ATOLL_V (SITE_NAME TEXT, LATITUDE REAL, LONGITUDE REAL, TECHNOLOGY TEXT, "
+                       "PRACH_ROOT_SEQUENCES TEXT, ATOLL_SCHEMA TEXT, SITE_VERSION TEXT)")
+    connection.executemany("INSERT INTO SITES_ATOLL_V VALUES (?, ?, ?, ?, ?, ?, ?)", site_rows())
+    yield connection
+    connection.close()
+
+
+class OracleType:
+    """Stand-in for a cx_Oracle DB_TYPE_* type code."""
+
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeOracleCursor:
+    """Cursor returning fixed rows with a cx_Oracle-like description."""
+
+    def __init__(self, description, rows):
+        self.description = description
+        self.rows = list(rows)
+        self.arraysize = 100
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+
+def test_fetch_arrow_table_types_late_values(connection):
+    table = fetch_arrow_table(connection.cursor(), site_query, batch_size=BATCH_SIZE)
+
+    assert table.num_rows == NUM_SITES
+    assert table.schema.field("LATITUDE").type == pa.float64()
+    assert table.schema.field("LONGITUDE").type == pa.float64()
+    assert table.schema.field("PRACH_ROOT_SEQUENCES").type == pa.string()
+    assert table.column("LATITUDE").null_count == NON_NULL_FROM
+    assert table.column("LATITUDE")[NON_NULL_FROM].as_py() == pytest.approx(35.0 + NON_NULL_FROM * 0.01)
+
+
+def test_fetch_arrow_table_uses_declared_types():
+    description = [("SITE_NAME", OracleType("DB_TYPE_VARCHAR"), 50, 50, None, None, 1),
+                   ("LATITUDE", OracleType("DB_TYPE_NUMBER"), 127, None, 0, -127, 1),
+                   ("PCI", OracleType("DB_TYPE_NUMBER"), 4, None, 4, 0, 1)]
+    rows = [("A", None, None)] * 30 + [("B", 35.5, 101), ("C", 36, None)]
+    table = fetch_arrow_table(FakeOracleCursor(description, rows), "SELECT 1 FROM DUAL", batch_size=BATCH_SIZE)
+
+    assert table.schema.types == [pa.string(), pa.float64(), pa.int64()]
+    assert table.column("LATITUDE").to_pylist()[30:] == [35.5, 36.0]
+    assert table.column("PCI").to_pylist()[30:] == [101, None]
+
+
+def test_run_pipeline_with_late_coordinates(connection, tmp_path):
+    output_file = str(tmp_path / "closest.csv")
+    arrow_file = str(tmp_path / "sites.arrow")
+    pois = pd.DataFrame({"LATITUDE": [35.6], "LONGITUDE": [-80.6]})
+
+    timings = run_pipeline(connection, pois, "LTE", 891, output_file, arrow_file, batch_size=BATCH_SIZE)
+
+    assert set(timings) == {"fetch", "save_arrow", "load", "compute", "save"}
+    sites = prepare_columns(pd.DataFrame(site_rows(), columns=list(SITE_COLUMNS) + ["ATOLL_SCHEMA", "SITE_VERSION"]),
+                            SITE_COLUMNS)
+    expected = find_closest_locations(sites, 35.6, -80.6, "LTE", 891)
+    result = pd.read_csv(output_file)
+    assert len(result) == len(expected) == 891
+    assert (result["Closest Location"] != "No location found").any()
+    assert result["Closest Location"].tolist() == expected["Closest Location"].tolist()
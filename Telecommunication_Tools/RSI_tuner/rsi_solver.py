@@ -0,0 +1,397 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rsi_common import RsiNearestIndex, haversine, load_site_table, to_unit_vectors
+from rsi_tuner_core import EARTH_RADIUS_MILES
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# LTE PRACH root sequence indexes run from 0 to 837
+DEFAULT_NUM_RSI = 838
+
+# Problem sectors closer than this (miles) are solved together as one cluster
+DEFAULT_CLUSTER_DISTANCE = 30.0
+
+# Upper bound on local search moves per cluster
+DEFAULT_ITERATIONS = 500
+
+# Upper bound on rounds re-solving clusters against the RSIs of the other clusters
+COORDINATION_ROUNDS = 5
+
+# Columns telling co-sited sectors apart, by preference, once spaces are replaced with underscores
+SECTOR_COLUMNS = ("Sector", "Sector_ID", "Cell", "Cell_ID")
+
+# Function to pick the columns identifying a problem sector in the site table
+def sector_key(site_df, sectors_df):
+    """
+    Columns matching problem sectors to their rows in the site table.
+
+    A site has one row per sector, so 'Site_ID' alone would also match the
+    co-sited sectors that are not being re-planned. The key adds the first
+    sector column both tables have, or else the sector's current 'RSI'.
+
+    Parameters:
+        site_df (DataFrame): Site table with normalized column names.
+        sectors_df (DataFrame): Problem sectors with normalized column names.
+
+    Returns:
+        list: Key column names, starting with 'Site_ID'.
+    """
+    for column in SECTOR_COLUMNS:
+        if column in site_df.columns and column in sectors_df.columns:
+            return ["Site_ID", column]
+    if "RSI" in sectors_df.columns:
+        return ["Site_ID", "RSI"]
+    logging.warning("No sector column or current RSI for the problem sectors: the other sectors of their sites are ignored")
+    return ["Site_ID"]
+
+# Function to find the site table rows that are not being re-planned
+def fixed_sites(site_df, sectors_df):
+    """
+    Rows of the site table that keep their RSI, matched on sector_key.
+
+    Key values are compared as stripped text, so an RSI read as 80 in one
+    file and "80" in the other still matches.
+
+    Parameters:
+        site_df (DataFrame): Site table with normalized column names.
+        sectors_df (DataFrame): Problem sectors with normalized column names.
+
+    Returns:
+        DataFrame: Site rows not matching any problem sector, with a fresh index.
+    """
+    key = sector_key(site_df, sectors_df)
+
+    def key_values(df):
+        return pd.MultiIndex.from_frame(df[key].astype(str).apply(lambda column: column.str.strip()))
+
+    return site_df[~key_values(site_df).isin(key_values(sectors_df))].reset_index(drop=True)
+
+# Function to split problem sectors into independent clusters
+def find_clusters(lats, lons, cluster_distance):
+    """
+    Group problem sectors into clusters of sectors within cluster_distance of each other (transitively).
+
+    Parameters:
+        lats (array): Sector latitudes in degrees.
+        lons (array): Sector longitudes in degrees.
+        cluster_distance (float): Linking distance in miles.
+
+    Returns:
+        ndarray: Cluster number per sector, numbered in order of first appearance.
+    """
+    from scipy.spatial import cKDTree
+
+    parent = list(range(len(lats)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Chord length on the unit sphere matching the great-circle linking distance
+    chord = 2 * np.sin(min(cluster_distance / EARTH_RADIUS_MILES, np.pi) / 2)
+    for i, j in cKDTree(to_unit_vectors(lats, lons)).query_pairs(chord):
+        parent[root(i)] = root(j)
+
+    roots = [root(i) for i in range(len(lats))]
+    numbers = {}
+    return np.array([numbers.setdefault(r, len(numbers)) for r in roots], dtype=np.int64)
+
+# Function to compute the reuse distance of every sector for an assignment
+def reuse_distances(assignment, fixed_distances, pair_distances):
+    """
+    Reuse distance per sector: the nearest fixed site or other problem sector on the same RSI.
+
+    Parameters:
+        assignment (array): RSI per sector.
+        fixed_distances (array): (sectors, RSIs) distance to the nearest fixed site per RSI, inf when unused.
+        pair_distances (array): (sectors, sectors) distances between problem sectors.
+
+    Returns:
+        ndarray: Reuse distance per sector in miles.
+    """
+    n = len(assignment)
+    own = fixed_distances[np.arange(n), assignment]
+    same = (assignment[:, None] == assignment[None, :]) & ~np.eye(n, dtype=bool)
+    return np.minimum(own, np.where(same, pair_distances, np.inf).min(axis=1, initial=np.inf))
+
+def _objective(reuse):
+    """Lexicographic max-min key: the worst reuse distance first, then the next worst, and so on."""
+    return tuple(np.sort(reuse).tolist())
+
+# Function to build a first assignment greedily
+def greedy_assignment(fixed_distances, pair_distances):
+    """
+    Assign RSIs one sector at a time, most constrained sector first, each to its best available RSI.
+
+    Parameters:
+        fixed_distances (array): (sectors, RSIs) distance to the nearest fixed site per RSI, inf when unused.
+        pair_distances (array): (sectors, sectors) distances between problem sectors.
+
+    Returns:
+        ndarray: RSI per sector.
+    """
+    n = len(fixed_distances)
+    assignment = np.full(n, -1, dtype=np.int64)
+    for sector in np.argsort(fixed_distances.max(axis=1), kind="stable"):
+        scores = fixed_distances[sector].copy()
+        assigned = np.nonzero(assignment >= 0)[0]
+        np.minimum.at(scores, assignment[assigned], pair_distances[sector, assigned])
+        assignment[sector] = int(np.argmax(scores))
+    return assignment
+
+# Function to improve an assignment by local search
+def local_search(assignment, fixed_distances, pair_distances, iterations=DEFAULT_ITERATIONS):
+    """
+    Improve the worst reuse distance by moving or swapping the bottleneck sector's RSI.
+
+    Each step takes the sector with the smallest reuse distance and accepts
+    the first move (a new RSI, then a swap with another sector) that improves
+    the sorted reuse distances lexicographically. It stops when no move helps.
+
+    Parameters:
+        assignment (array): Starting RSI per sector.
+        fixed_distances (array): (sectors, RSIs) distance to the nearest fixed site per RSI, inf when unused.
+        pair_distances (array): (sectors, sectors) distances between problem sectors.
+        iterations (int): Maximum number of accepted moves.
+
+    Returns:
+        ndarray: Improved RSI per sector.
+    """
+    assignment = assignment.copy()
+    reuse = reuse_distances(assignment, fixed_distances, pair_distances)
+    best = _objective(reuse)
+
+    for _ in range(iterations):
+        sector = int(np.argmin(reuse))
+        others = np.arange(len(assignment)) != sector
+
+        # Reuse distance the bottleneck sector would get on each RSI
+        scores = fixed_distances[sector].copy()
+        np.minimum.at(scores, assignment[others], pair_distances[sector, others])
+        moves = [("move", int(rsi)) for rsi in np.argsort(-scores, kind="stable") if scores[rsi] > reuse[sector]]
+        moves += [("swap", int(other)) for other in np.nonzero(others)[0] if assignment[other] != assignment[sector]]
+
+        for kind, target in moves:
+            candidate = assignment.copy()
+            if kind == "move":
+                candidate[sector] = target
+            else:
+                candidate[sector], candidate[target] = assignment[target], assignment[sector]
+            candidate_reuse = reuse_distances(candidate, fixed_distances, pair_distances)
+            key = _objective(candidate_reuse)
+            if key > best:
+                assignment, reuse, best = candidate, candidate_reuse, key
+                break
+        else:
+            break
+    return assignment
+
+# Function to solve one cluster of problem sectors
+def solve_cluster(fixed_distances, pair_distances, iterations=DEFAULT_ITERATIONS):
+    """
+    Propose RSIs for one cluster with greedy construction followed by local search.
+
+    Parameters:
+        fixed_distances (array): (sectors, RSIs) distance to the nearest fixed site per RSI, inf when unused.
+        pair_distances (array): (sectors, sectors) distances between problem sectors.
+        iterations (int): Maximum number of local search moves.
+
+    Returns:
+        tuple: (assignment, reuse distances, solve time in seconds).
+    """
+    started = time.perf_counter()
+    assignment = local_search(greedy_assignment(fixed_distances, pair_distances), fixed_distances, pair_distances, iterations)
+    reuse = reuse_distances(assignment, fixed_distances, pair_distances)
+    return assignment, reuse, time.perf_counter() - started
+
+# Function to fold the other clusters' sectors into a cluster's reuse distances
+def neighbour_distances(rows, assignment, fixed_distances, pair_distances):
+    """
+    Reuse distances of a cluster's sectors with every other problem sector treated as a fixed site on its current RSI.
+
+    Parameters:
+        rows (array): Positions of the cluster's sectors.
+        assignment (array): Current RSI of every problem sector.
+        fixed_distances (array): (sectors, RSIs) distance to the nearest fixed site per RSI, inf when unused.
+        pair_distances (array): (sectors, sectors) distances between problem sectors.
+
+    Returns:
+        ndarray: (cluster sectors, RSIs) distance to the nearest fixed site or outside problem sector per RSI.
+    """
+    distances = fixed_distances[rows].copy()
+    others = np.setdiff1d(np.arange(len(assignment)), rows)
+    if len(others):
+        np.minimum.at(distances, (np.repeat(np.arange(len(rows)), len(others)), np.tile(assignment[others], len(rows))),
+                      pair_distances[np.ix_(rows, others)].ravel())
+    return distances
+
+# Function to re-solve the clusters whose RSIs are reused by another cluster
+def coordinate_clusters(members, assignment, fixed_distances, pair_distances, iterations=DEFAULT_ITERATIONS,
+                        rounds=COORDINATION_ROUNDS):
+    """
+    Re-solve clusters whose reuse distance is set by a sector of another cluster, one cluster at a time.
+
+    Clusters are solved independently, so two of them can pick the same RSI
+    for sectors just over the cluster distance apart. Each round finds the
+    clusters where a sector of another cluster is nearer on the same RSI than
+    anything the cluster's own solve saw, and re-solves them in turn with the
+    other clusters' sectors as fixed sites; the better of a fresh solve and a
+    local search from the current RSIs is kept. Rounds stop when no such
+    cluster is left, nothing changes, or after rounds rounds.
+
+    Parameters:
+        members (list): Positions of the sectors of each cluster.
+        assignment (array): RSI per problem sector, updated in place.
+        fixed_distances (array): (sectors, RSIs) distance to the nearest fixed site per RSI, inf when unused.
+        pair_distances (array): (sectors, sectors) distances between problem sectors.
+        iterations (int): Maximum number of local search moves per solve.
+        rounds (int): Maximum number of rounds.
+
+    Returns:
+        ndarray: Extra solve time per cluster in seconds.
+    """
+    extra_times = np.zeros(len(members))
+    for _ in range(rounds):
+        reuse = reuse_distances(assignment, fixed_distances, pair_distances)
+        coupled = [cluster for cluster, rows in enumerate(members)
+                   if (reuse[rows] < reuse_distances(assignment[rows], fixed_distances[rows], pair_distances[np.ix_(rows, rows)])).any()]
+        if not coupled:
+            break
+        changed = False
+        for cluster in coupled:
+            started = time.perf_counter()
+            rows = members[cluster]
+            distances = neighbour_distances(rows, assignment, fixed_distances, pair_distances)
+            pairs = pair_distances[np.ix_(rows, rows)]
+            candidates = [assignment[rows], local_search(assignment[rows], distances, pairs, iterations),
+                          solve_cluster(distances, pairs, iterations)[0]]
+            best = max(candidates, key=lambda candidate: _objective(reuse_distances(candidate, distances, pairs)))
+            if (best != assignment[rows]).any():
+                assignment[rows] = best
+                changed = True
+            extra_times[cluster] += time.perf_counter() - started
+        logging.info(f"Re-solved {len(coupled)} clusters sharing RSIs with other clusters")
+        if not changed:
+            break
+    return extra_times
+
+# Function to propose a joint RSI plan for many problem sectors
+def solve_rsi_plan(site_df, sectors_df, num_rsi=DEFAULT_NUM_RSI, cluster_distance=DEFAULT_CLUSTER_DISTANCE,
+                   iterations=DEFAULT_ITERATIONS, jobs=None):
+    """
+    Propose RSIs for many problem sectors at once, maximizing the minimum reuse distance.
+
+    The problem sectors are removed from the site table (see fixed_sites;
+    their co-sited sectors stay), and the remaining sites are indexed per RSI to get each sector's nearest reuse distance on
+    every RSI. Sectors are split into clusters that are solved in parallel,
+    then clusters reusing the RSIs of another cluster nearby are re-solved
+    against them (see coordinate_clusters). The reported reuse distance and
+    site come from the whole plan, other clusters included.
+
+    Parameters:
+        site_df (DataFrame): Site table with 'Site ID', 'RSI', 'Lat' and 'Long' columns.
+        sectors_df (DataFrame): Problem sectors with 'Site ID', 'Lat' and 'Long' columns, and optionally 'RSI'
+            and a sector column from SECTOR_COLUMNS.
+        num_rsi (int): Candidate RSIs are 0..num_rsi-1.
+        cluster_distance (float): Sectors closer than this (miles) are solved together.
+        iterations (int): Maximum number of local search moves per cluster.
+        jobs (int, optional): Worker processes; defaults to the number of CPUs.
+
+    Returns:
+        DataFrame: One row per problem sector with the proposed RSI, its reuse distance and the nearest reuse site.
+    """
+    site_df = site_df.copy()
+    sectors_df = sectors_df.copy().reset_index(drop=True)
+    # "Site ID" and "Site_ID" headers are both accepted
+    site_df.columns = [c.strip().replace(" ", "_") for c in site_df.columns]
+    sectors_df.columns = [c.strip().replace(" ", "_") for c in sectors_df.columns]
+
+    fixed = fixed_sites(site_df, sectors_df)
+    index = RsiNearestIndex(fixed["Lat"], fixed["Long"], fixed["RSI"], num_rsi, radius=EARTH_RADIUS_MILES)
+    picks, fixed_distances = index.query(sectors_df["Lat"], sectors_df["Long"])
+    fixed_distances = np.where(np.isnan(fixed_distances), np.inf, fixed_distances)
+
+    lats = sectors_df["Lat"].to_numpy(dtype=np.float64)
+    lons = sectors_df["Long"].to_numpy(dtype=np.float64)
+    pair_distances = haversine(lats[:, None], lons[:, None], lats[None, :], lons[None, :], unit="miles",
+                               radius=EARTH_RADIUS_MILES)
+    clusters = find_clusters(lats, lons, cluster_distance)
+    members = [np.nonzero(clusters == cluster)[0] for cluster in range(clusters.max() + 1)] if len(clusters) else []
+
+    tasks = [(fixed_distances[rows], pair_distances[np.ix_(rows, rows)], iterations) for rows in members]
+    jobs = jobs or os.cpu_count() or 1
+    started = time.perf_counter()
+    if jobs == 1 or len(tasks) < 2:
+        results = [solve_cluster(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+            results = list(pool.map(solve_cluster, *zip(*tasks)))
+    logging.info(f"Solved {len(sectors_df)} sectors in {len(tasks)} clusters in {time.perf_counter() - started:.2f} s")
+
+    assignment = np.zeros(len(sectors_df), dtype=np.int64)
+    for rows, (cluster_assignment, _, _) in zip(members, results):
+        assignment[rows] = cluster_assignment
+    extra_times = coordinate_clusters(members, assignment, fixed_distances, pair_distances, iterations)
+
+    # Final check over the whole plan: the nearest fixed site or problem sector, in any cluster, on the same RSI
+    reuse = reuse_distances(assignment, fixed_distances, pair_distances)
+    solve_times = np.zeros(len(sectors_df))
+    reuse_sites = [""] * len(sectors_df)
+    fixed_ids = fixed["Site_ID"].to_numpy(dtype=object)
+    sector_ids = sectors_df["Site_ID"].to_numpy(dtype=object)
+    for cluster, (rows, (_, _, solve_time)) in enumerate(zip(members, results)):
+        solve_times[rows] = solve_time + extra_times[cluster]
+        logging.info(f"Cluster {cluster}: {len(rows)} sectors, min reuse distance {reuse[rows].min():.2f} miles, solved in {solve_times[rows[0]]:.3f} s")
+    for sector, rsi in enumerate(assignment):
+        sharing = np.nonzero(assignment == rsi)[0]
+        sharing = sharing[sharing != sector]
+        nearest_sector = sharing[np.argmin(pair_distances[sector, sharing])] if len(sharing) else None
+        if picks[sector, rsi] >= 0 and fixed_distances[sector, rsi] == reuse[sector]:
+            reuse_sites[sector] = fixed_ids[picks[sector, rsi]]
+        elif nearest_sector is not None:
+            reuse_sites[sector] = sector_ids[nearest_sector]
+
+    return pd.DataFrame({
+        "Cluster": clusters,
+        "Site_ID": sectors_df["Site_ID"],
+        "Lat": lats,
+        "Long": lons,
+        "Current_RSI": sectors_df["RSI"] if "RSI" in sectors_df.columns else np.nan,
+        "Proposed_RSI": assignment,
+        "Reuse_Distance": np.where(np.isinf(reuse), np.nan, reuse),
+        "Reuse_Site": reuse_sites,
+        "Solve_Time": solve_times,
+    })
+
+def main(argv=None):
+    """Command line entry point for the multi-sector RSI solver."""
+    parser = argparse.ArgumentParser(description="Propose RSIs for many problem sectors, maximizing the minimum reuse distance.")
+    parser.add_argument("location_file", help="CSV file with 'Site ID', 'RSI', 'Lat' and 'Long' columns")
+    parser.add_argument("sectors_file", help="CSV file with the problem sectors ('Site ID', 'Lat', 'Long', and 'RSI' or 'Sector')")
+    parser.add_argument("output_folder", help="Folder for Output_RSI_plan.csv")
+    parser.add_argument("--num-rsi", type=int, default=DEFAULT_NUM_RSI, help="Candidate RSIs are 0..N-1 (default 838)")
+    parser.add_argument("--cluster-distance", type=float, default=DEFAULT_CLUSTER_DISTANCE, help="Cluster linking distance in miles")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="Maximum local search moves per cluster")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: number of CPUs)")
+    args = parser.parse_args(argv)
+
+    site_df = load_site_table(args.location_file, pd.read_csv)
+    sectors_df = pd.read_csv(args.sectors_file)
+    plan = solve_rsi_plan(site_df, sectors_df, args.num_rsi, args.cluster_distance, args.iterations, args.jobs)
+    output_file = os.path.join(args.output_folder, "Output_RSI_plan.csv")
+    plan.to_csv(output_file, index=False)
+    logging.info(f"RSI plan saved to {output_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import logging
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rsi_common import PrachIndex, haversine, load_site_table
+
+# Mean Earth radius in miles as the haversine package computes it (km * 0.621371), which the tuner used before
+EARTH_RADIUS_MILES = 6371.0088 * 0.621371
+
+# Function to log messages
+def log_message(message):
+    """
+    Log messages to a file.
+
+    Parameters:
+        message (str): Message to be logged.
+    """
+    logging.info(message)
+
+# Function to order the closest locations from the farthest to the nearest
+def sort_by_distance(input_list):
+    """
+    Build the output table, farthest location first.
+
+    Parameters:
+        input_list (list): [RSI, Site_ID, Location, Distance] rows.
+
+    Returns:
+        DataFrame: Output rows sorted by descending distance; ties keep their input order.
+    """
+    output_df = pd.DataFrame(input_list, columns=["RSI", "Site_ID", "Location", "Distance"])
+    return output_df.sort_values("Distance", ascending=False, kind="stable")
+
+# Function to write the KML file straight from the output table
+def write_kml(output_df, problem_rsi, problem_location, kml_path):
+    """
+    Write the problem sector and the closest location per RSI as KML, one placemark at a time.
+
+    The document is streamed to disk instead of being built in memory, and the
+    same input always gives the same bytes.
+
+    Parameters:
+        output_df (DataFrame): Output of sort_by_distance.
+        problem_rsi (int): RSI value of the problem sector.
+        problem_location (tuple): Coordinates (latitude, longitude) of the problem sector.
+        kml_path (str): Path of the KML file to write.
+    """
+    problem_lat, problem_long = problem_location
+    problem_coords = f"{float(problem_long)!r},{float(problem_lat)!r},0"
+
+    with open(kml_path, "w", encoding="utf-8", newline="\n") as fh:
+        fh.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fh.write('<kml xmlns="http://www.opengis.net/kml/2.2">\n<Document>\n')
+        fh.write(f"<Placemark><name>Problem Sector</name><description>{escape(f'RSI: {problem_rsi}')}</description>"
+                 f"<Point><coordinates>{problem_coords}</coordinates></Point></Placemark>\n")
+        for rsi, site_id, (lat, long), distance in output_df.itertuples(index=False, name=None):
+            coords = f"{float(long)!r},{float(lat)!r},0"
+            fh.write(f"<Placemark><name>{escape(f'{site_id} ({rsi})')}</name><description>{escape(f'RSI: {rsi}')}</description>"
+                     f"<Point><coordinates>{coords}</coordinates></Point></Placemark>\n")
+            fh.write(f"<Placemark><name>{escape(f'Distance: {distance}')}</name>"
+                     f"<LineString><coordinates>{problem_coords} {coords}</coordinates></LineString></Placemark>\n")
+        fh.write("</Document>\n</kml>\n")
+
+# Function to normalize a location table
+def normalize_locations(location_df):
+    """
+    Normalize column names and give each (site, RSI) pair its own row.
+
+    Parameters:
+        location_df (DataFrame): Location data with 'Site ID', 'RSI', 'Lat' and 'Long' columns.
+
+    Returns:
+        DataFrame: One row per (site, RSI) in file order, with a 'Site_ID' column.
+    """
+    # "Site ID" and "Site_ID" headers are both accepted
+    location_df = location_df.rename(columns=lambda c: c.strip().replace(" ", "_"))
+    # A site may list several RSIs ("0-9,120-129"); give it one row per RSI, in file order
+    rsis, rows = PrachIndex(location_df["RSI"]).pairs()
+    order = rows.argsort(kind="stable")
+    return location_df.iloc[rows[order]].assign(RSI=rsis[order]).reset_index(drop=True)
+
+# Function to load and normalize a location file once
+def load_locations(location_file):
+    """
+    Load a location CSV (through the site table cache) and normalize it.
+
+    Parameters:
+        location_file (str): Path to the CSV file containing location data.
+
+    Returns:
+        DataFrame: Output of normalize_locations, reusable for any number of problem sectors.
+    """
+    return normalize_locations(load_site_table(location_file, pd.read_csv))
+
+# Function to add the distance to the problem sector
+def add_distances(locations, problem_location):
+    """
+    Add the distance to the problem sector to a normalized location table.
+
+    Parameters:
+        locations (DataFrame): Output of normalize_locations; it is not modified.
+        problem_location (tuple): Coordinates (latitude, longitude) of the problem sector.
+
+    Returns:
+        DataFrame: Copy with 'lat_long' and 'distance' columns instead of 'Lat' and 'Long'.
+    """
+    location_df = locations.drop(columns=["Lat", "Long"])
+    location_df["distance"] = haversine(problem_location[0], problem_location[1], locations.Lat, locations.Long, unit="miles",
+                                       radius=EARTH_RADIUS_MILES)
+    location_df["lat_long"] = list(zip(locations.Lat, locations.Long))
+    return location_df
+
+# Function to normalize a location table and add the distance to the problem sector
+def prepare_locations(location_df, problem_location):
+    """
+    Normalize column names, expand multi-RSI cells and add the distance to the problem sector.
+
+    Parameters:
+        location_df (DataFrame): Location data with 'Site ID', 'RSI', 'Lat' and 'Long' columns.
+        problem_location (tuple): Coordinates (latitude, longitude) of the problem sector.
+
+    Returns:
+        DataFrame: One row per (site, RSI) with 'lat_long' and 'distance' columns.
+    """
+    return add_distances(normalize_locations(location_df), problem_location)
+
+# Function to keep the closest location per RSI
+def find_closest_per_rsi(location_df, problem_rsi):
+    """
+    Keep the closest location for each RSI other than the problem sector's own.
+
+    Rows at distance 0 (the problem sector itself) are skipped. Ties go to the
+    earliest row and RSIs keep their order of first appearance.
+
+    Parameters:
+        location_df (DataFrame): Output of prepare_locations.
+        problem_rsi (int): RSI value of the problem sector.
+
+    Returns:
+        DataFrame: One row per RSI with 'RSI', 'Site_ID', 'lat_long' and 'distance' columns.
+    """
+    candidates = location_df[(location_df["distance"] != 0.0) & (location_df["RSI"] != problem_rsi) & location_df["distance"].notna()]
+    closest = candidates.loc[candidates.groupby("RSI", sort=False)["distance"].idxmin()]
+    return closest[["RSI", "Site_ID", "lat_long", "distance"]].reset_index(drop=True)
+
+# Function to find the closest location per RSI while reading a large CSV in chunks
+def stream_closest_per_rsi(location_file, problem_rsi, problem_location, chunksize=500000):
+    """
+    Find the closest location per RSI from a CSV read in chunks.
+
+    Only a running per-RSI minimum is kept between chunks, so memory stays
+    bounded by the chunk size and the number of RSIs, not by the file size.
+
+    Parameters:
+        location_file (str): Path to the CSV file containing location data.
+        problem_rsi (int): RSI value of the problem sector.
+        problem_location (tuple): Coordinates (latitude, longitude) of the problem sector.
+        chunksize (int): Rows read per chunk.
+
+    Returns:
+        DataFrame: Same as find_closest_per_rsi on the whole file.
+    """
+    running = None
+    for chunk in pd.read_csv(location_file, chunksize=chunksize):
+        chunk_closest = find_closest_per_rsi(prepare_locations(chunk, problem_location), problem_rsi)
+        if running is not None:
+            # The running minimum goes first so ties still go to the earliest row
+            chunk_closest = find_closest_per_rsi(pd.concat([running, chunk_closest], ignore_index=True), problem_rsi)
+        running = chunk_closest
+    if running is None:
+        return pd.DataFrame(columns=["RSI", "Site_ID", "lat_long", "distance"])
+    return running
+
+# Function to write the CSV and KML outputs for one problem sector
+def write_outputs(closest, problem_rsi, problem_location, csv_path, kml_path):
+    """
+    Write the closest location per RSI as CSV and KML.
+
+    Parameters:
+        closest (DataFrame): Output of find_closest_per_rsi.
+        problem_rsi (int): RSI value of the problem sector.
+        problem_location (tuple): Coordinates (latitude, longitude) of the problem sector.
+        csv_path (str): Path of the CSV file to write.
+        kml_path (str): Path of the KML file to write.
+    """
+    output_df = sort_by_distance(list(closest.itertuples(index=False, name=None)))
+
+    # Write the CSV and the KML concurrently from the same in-memory table
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        csv_job = pool.submit(output_df.to_csv, csv_path, index=False)
+        kml_job = pool.submit(write_kml, output_df, problem_rsi, problem_location, kml_path)
+        csv_job.result()
+        kml_job.result()
+
+# Function to group data points based on RSI values and find minimum distances
+def group_and_process_data(location_file, problem_rsi, problem_location, output_folder, chunksize=None):
+    """
+    Group data points based on RSI values and find minimum distances for each RSI.
+
+    Parameters:
+        location_file (str): Path to the CSV file containing location data.
+        problem_rsi (int): RSI value of the problem sector.
+        problem_location (tuple): Coordinates (latitude, longitude) of the problem sector.
+        output_folder (str): Path to the output folder.
+        chunksize (int, optional): Read the CSV in chunks of this many rows instead of loading it whole.
+    """
+    if chunksize:
+        closest = stream_closest_per_rsi(location_file, problem_rsi, problem_location, chunksize)
+    else:
+        closest = find_closest_per_rsi(add_distances(load_locations(location_file), problem_location), problem_rsi)
+
+    write_outputs(closest, problem_rsi, problem_location,
+                  os.path.join(output_folder, "Output_RSI.csv"), os.path.join(output_folder, "Output_RSI.kml"))
+
+# Function to process many problem sectors against one loaded location table
+def process_problem_sectors(location_file, sectors, output_folder):
+    """
+    Process several problem sectors, loading the location table only once.
+
+    Each sector gets its own Output_RSI_<name>.csv and .kml in the output folder.
+
+    Parameters:
+        location_file (str): Path to the CSV file containing location data.
+        sectors (list): Dicts with 'name', 'rsi', 'lat' and 'long' keys.
+        output_folder (str): Path to the output folder.
+
+    Returns:
+        list: Paths of the CSV files written.
+    """
+    locations = load_locations(location_file)
+    written = []
+    for sector in sectors:
+        problem_rsi = int(sector["rsi"])
+        problem_location = (float(sector["lat"]), float(sector["long"]))
+        closest = find_closest_per_rsi(add_distances(locations, problem_location), problem_rsi)
+        # Keep sector names usable as file names
+        name = re.sub(r'[^\w.-]+', '_', str(sector["name"]))
+        csv_path = os.path.join(output_folder, f"Output_RSI_{name}.csv")
+        write_outputs(closest, problem_rsi, problem_location, csv_path, os.path.join(output_folder, f"Output_RSI_{name}.kml"))
+        log_message(f"Problem sector {sector['name']}: {len(closest)} RSIs written to {csv_path}")
+        written.append(csv_path)
+    return written
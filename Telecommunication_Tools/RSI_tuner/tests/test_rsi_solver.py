@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("scipy")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rsi_solver import fixed_sites, solve_rsi_plan
+
+NUM_RSI = 4
+
+# Site A has three sectors on RSIs 0, 1 and 2; sector 1 is re-planned. RSI 0 is reused 1 mile away,
+# RSI 3 2 miles away, and RSIs 1 and 2 by far sites as well as by the co-sited sectors.
+SITES = pd.DataFrame({
+    "Site ID": ["A", "A", "A", "B", "C", "D", "E"],
+    "Sector": [1, 2, 3, 1, 1, 1, 1],
+    "RSI": [0, 1, 2, 0, 3, 1, 2],
+    "Lat": [35.0, 35.0, 35.0, 35.0145, 35.029, 36.5, 33.5],
+    "Long": [-80.0] * 7,
+})
+
+
+def problem_sector(**columns):
+    return pd.DataFrame({"Site ID": ["A"], "Lat": [35.0], "Long": [-80.0], **columns})
+
+
+@pytest.mark.parametrize("columns", [{"Sector": [1]}, {"RSI": [0]}, {"RSI": ["0"]}])
+def test_co_sited_sectors_stay_fixed(columns):
+    sectors = problem_sector(**columns)
+    site_df = SITES.rename(columns=lambda c: c.replace(" ", "_"))
+    sectors_df = sectors.rename(columns=lambda c: c.replace(" ", "_"))
+
+    fixed = fixed_sites(site_df, sectors_df)
+    assert list(zip(fixed["Site_ID"], fixed["Sector"])) == [("A", 2), ("A", 3), ("B", 1), ("C", 1), ("D", 1), ("E", 1)]
+
+    plan = solve_rsi_plan(SITES, sectors, num_rsi=NUM_RSI, cluster_distance=1.0, iterations=10, jobs=1)
+
+    # RSIs 1 and 2 are taken by the other sectors of site A, so RSI 3 gives the largest reuse distance
+    assert plan["Proposed_RSI"].tolist() == [3]
+    assert plan["Reuse_Site"].tolist() == ["C"]
+    assert plan["Reuse_Distance"].iloc[0] == pytest.approx(2.0, rel=0.01)
+
+
+def test_site_id_only_drops_the_whole_site():
+    sectors_df = problem_sector().rename(columns=lambda c: c.replace(" ", "_"))
+
+    fixed = fixed_sites(SITES.rename(columns=lambda c: c.replace(" ", "_")), sectors_df)
+
+    assert fixed["Site_ID"].tolist() == ["B", "C", "D", "E"]
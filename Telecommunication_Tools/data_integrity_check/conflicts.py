@@ -0,0 +1,269 @@
+import numpy as np
+import pandas as pd
+
+# Conflict rules as (sheet name, check, columns) tuples:
+# - 'consistent': columns are (key..., value); every key must map to a single value.
+# - 'one_to_one': columns are (left, right); each left value maps to one right value and vice versa.
+# - 'unique': columns are (column,); no value may appear twice.
+# - 'mod3': columns are (site, band, sector, pci); sectors of a site on one band need different PCI mod 3.
+CONFLICT_RULES = [
+    ('PCI_DISCREPANCY', 'consistent', ('Site_ID_Sector', 'Custom: Physical_Cell_ID')),
+    ('GNB_ID_CONFLICT', 'one_to_one', ('Site ID', 'Custom: gNodeB_Id')),
+    ('NR_CELL_ID_DUPLICATE', 'unique', ('Custom: NR_Cell_Id',)),
+    ('PCI_MOD3_COLLISION', 'mod3', ('Site ID', 'Band Name', 'Site_ID_Sector', 'Custom: Physical_Cell_ID')),
+]
+
+# Column added to every conflict sheet with the row of the source workbook (header is row 1)
+ROW_COLUMN = 'Source Row'
+
+
+def usable_rows(final, columns):
+    """
+    Find the rows whose cells are all filled and hold no discrepancy message.
+
+    Args:
+    - final (DataFrame): Validated DataFrame.
+    - columns (list): Columns the rule reads.
+
+    Returns:
+    - ndarray: Boolean mask of the rows the rule can use.
+    """
+    mask = np.ones(len(final), dtype=bool)
+    for column in columns:
+        values = final[column]
+        mask &= values.notna().to_numpy(dtype=bool)
+        if not pd.api.types.is_numeric_dtype(values):
+            text = values.astype("string")
+            mask &= ~(text.str.startswith("FALSE") | (text.str.strip() == "") | (text == "nan")).fillna(True).to_numpy(dtype=bool)
+    return mask
+
+
+def _rule_frame(final, columns, rows=None):
+    """Select the usable rows of the rule columns, with their source row numbers."""
+    columns = list(columns)
+    mask = usable_rows(final, columns)
+    if rows is not None:
+        mask &= rows
+    df = final.loc[mask, columns]
+    df.insert(0, ROW_COLUMN, np.flatnonzero(mask) + 2)
+    return df
+
+
+def _keys_in(df, keys, bad):
+    """Mask of the rows of df whose keys appear in the keys of bad."""
+    return pd.MultiIndex.from_frame(df[keys]).isin(pd.MultiIndex.from_frame(bad[keys]))
+
+
+def find_inconsistent(df, keys, value):
+    """
+    Find keys mapping to more than one value.
+
+    Args:
+    - df (DataFrame): Rows of the rule.
+    - keys (list): Key columns.
+    - value (str): Value column.
+
+    Returns:
+    - DataFrame: First row of every (key, value) pair of the conflicting keys.
+    """
+    pairs = df.drop_duplicates(keys + [value])
+    bad = pairs[pairs.duplicated(keys, keep=False)]
+    return pairs[_keys_in(pairs, keys, bad)]
+
+
+def find_not_one_to_one(df, left, right):
+    """
+    Find pairs breaking a one-to-one mapping between two columns.
+
+    Args:
+    - df (DataFrame): Rows of the rule.
+    - left (str): First column.
+    - right (str): Second column.
+
+    Returns:
+    - DataFrame: First row of every (left, right) pair sharing a left or right value with another pair.
+    """
+    pairs = df.drop_duplicates([left, right])
+    return pairs[pairs.duplicated([left], keep=False) | pairs.duplicated([right], keep=False)]
+
+
+def find_duplicates(df, column):
+    """
+    Find values appearing more than once.
+
+    Args:
+    - df (DataFrame): Rows of the rule.
+    - column (str): Column that must be unique.
+
+    Returns:
+    - DataFrame: Every row holding a duplicated value.
+    """
+    return df[df.duplicated([column], keep=False)]
+
+
+def find_mod3_collisions(df, site, band, sector, pci):
+    """
+    Find sectors of one site and band whose PCIs are equal modulo 3.
+
+    Args:
+    - df (DataFrame): Rows of the rule.
+    - site (str): Site column.
+    - band (str): Band column.
+    - sector (str): Sector column.
+    - pci (str): PCI column.
+
+    Returns:
+    - DataFrame: First row of every colliding sector, with a 'PCI mod 3' column.
+    """
+    numbers = pd.to_numeric(df[pci], errors='coerce')
+    df = df[numbers.notna()].assign(**{'PCI mod 3': numbers[numbers.notna()].astype("int64") % 3})
+    # A sector counts once per PCI group, so only different sectors collide
+    sectors = df.drop_duplicates([site, band, sector, 'PCI mod 3'])
+    return sectors[sectors.duplicated([site, band, 'PCI mod 3'], keep=False)]
+
+
+def rule_groups(check, columns):
+    """
+    Get the column groups a conflict rule compares rows on.
+
+    Whether a row is in conflict only depends on the rows sharing the values of
+    one of these groups, which is what lets update_conflicts re-check only the
+    rows around a change.
+
+    Args:
+    - check (str): Rule check.
+    - columns (tuple): Rule columns.
+
+    Returns:
+    - list: Lists of columns.
+    """
+    if check == 'consistent':
+        return [list(columns[:-1])]
+    if check == 'one_to_one':
+        return [[columns[0]], [columns[1]]]
+    if check == 'unique':
+        return [list(columns)]
+    if check == 'mod3':
+        return [list(columns[:2])]
+    raise ValueError(f"Unknown conflict check '{check}'")
+
+
+def _values_in(values, others):
+    """Mask of the values found in others, comparing numbers as numbers and anything else as text."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.isin(pd.to_numeric(others, errors='coerce').dropna()).to_numpy(dtype=bool)
+    return values.astype("string").isin(others.astype("string").dropna()).to_numpy(dtype=bool)
+
+
+def rows_sharing(final, groups, others):
+    """
+    Find the rows of final sharing the values of a column group with any row of others.
+
+    Each column is matched on its own, so a row may be selected for values
+    coming from different rows of others; that only costs an extra re-check.
+
+    Args:
+    - final (DataFrame): Rows to select from.
+    - groups (list): Column groups, see rule_groups.
+    - others (DataFrame): Rows holding the group columns.
+
+    Returns:
+    - ndarray: Boolean mask over the rows of final.
+    """
+    mask = np.zeros(len(final), dtype=bool)
+    if len(others):
+        for group in groups:
+            shared = np.ones(len(final), dtype=bool)
+            for column in group:
+                shared &= _values_in(final[column], others[column])
+            mask |= shared
+    return mask
+
+
+def _cast_like(df, like):
+    """Give the columns of df the dtypes of the same columns in like, where possible."""
+    df = df.copy()
+    for column in df.columns:
+        if column in like.columns and df[column].dtype != like[column].dtype:
+            try:
+                df[column] = df[column].astype(like[column].dtype)
+            except (TypeError, ValueError):
+                df[column] = df[column].astype(object)
+    return df
+
+
+def update_conflicts(final, previous, touched, stable_rows, rules=None):
+    """
+    Update the conflicts of a previous run after some rows changed.
+
+    Only the rows sharing a rule's column values with a touched row are
+    checked again; the previous findings for all other rows still hold and get
+    their new source row numbers.
+
+    Args:
+    - final (DataFrame): Validated DataFrame of the current run.
+    - previous (dict): Sheet name to the previous findings, with the row they point to in a 'row_key' column.
+    - touched (DataFrame): Rule columns of the rows added, removed or changed since the previous run.
+    - stable_rows (Series): Current row position of every unchanged row, indexed by row key.
+    - rules (list, optional): Rules as in CONFLICT_RULES, used by default.
+
+    Returns:
+    - dict: Sheet name to the conflicting rows, as find_conflicts would return on final.
+    """
+    sheets = {}
+    for rule in (CONFLICT_RULES if rules is None else rules):
+        sheet, check, columns = rule
+        groups = rule_groups(check, columns)
+        recheck = rows_sharing(final, groups, touched)
+        # A re-checked row needs every row it shares a value with
+        context = (recheck | rows_sharing(final, groups, final[recheck])) if recheck.any() else recheck
+        found = find_conflicts(final, [rule], rows=context).get(sheet)
+        parts = []
+        if found is not None:
+            parts.append(found[recheck[found[ROW_COLUMN].to_numpy() - 2]])
+
+        kept = previous.get(sheet)
+        if kept is not None and len(kept):
+            kept = kept[kept['row_key'].isin(stable_rows.index)]
+            positions = stable_rows.reindex(kept['row_key']).to_numpy()
+            keep = ~recheck[positions]
+            kept = kept[keep].drop(columns=['row_key']).assign(**{ROW_COLUMN: positions[keep] + 2})
+            parts.append(_cast_like(kept, found if found is not None else final))
+
+        parts = [part for part in parts if len(part)]
+        if parts:
+            sheets[sheet] = pd.concat(parts, ignore_index=True).sort_values(ROW_COLUMN, kind='stable').reset_index(drop=True)
+    return sheets
+
+
+def find_conflicts(final, rules=None, rows=None):
+    """
+    Run the conflict rules, one hashed pass each.
+
+    Args:
+    - final (DataFrame): Validated DataFrame.
+    - rules (list, optional): Rules as in CONFLICT_RULES, used by default.
+    - rows (ndarray, optional): Boolean mask restricting the rows checked.
+
+    Returns:
+    - dict: Sheet name to the conflicting rows, only for rules that found conflicts.
+    """
+    sheets = {}
+    for sheet, check, columns in (CONFLICT_RULES if rules is None else rules):
+        missing = [column for column in columns if column not in final.columns]
+        if missing:
+            raise ValueError(f"Conflict rule {sheet} needs missing columns: {', '.join(missing)}")
+        df = _rule_frame(final, columns, rows)
+        if check == 'consistent':
+            found = find_inconsistent(df, list(columns[:-1]), columns[-1])
+        elif check == 'one_to_one':
+            found = find_not_one_to_one(df, *columns)
+        elif check == 'unique':
+            found = find_duplicates(df, *columns)
+        elif check == 'mod3':
+            found = find_mod3_collisions(df, *columns)
+        else:
+            raise ValueError(f"Unknown conflict check '{check}'")
+        if len(found):
+            sheets[sheet] = found.reset_index(drop=True)
+    return sheets
@@ -1,6 +1,77 @@
 import pandas as pd
 import numpy as np
 import re
+import time
+
+from conflicts import find_conflicts
+from report_writer import write_report
+
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = "string[pyarrow]"
+except ImportError:
+    TEXT_DTYPE = "string"
+
+# Column types of the source workbook: 'int' (nullable integers), 'category' or 'text'.
+# Columns not listed keep the type pandas infers.
+SOURCE_SCHEMA = {
+    'Site ID': 'category',
+    'Site_ID_Sector': 'category',
+    'Band Name': 'category',
+    'Antenna ID': 'int',
+    'Physical Cell ID': 'int',
+    'Site_ID_CUs_Numbers': 'text',
+    'Band_DL_UL_SSB_absfreqA_bandwidth_UL_MIMO': 'text',
+    'Custom: CP_Type': 'category',
+    'Custom: DL_Rank': 'int',
+    'Custom: UL_Rank': 'int',
+    'Custom: DL_MIMO': 'int',
+    'Custom: UL_MIMO': 'int',
+    'Custom: Physical_Cell_ID': 'int',
+    'Custom: PRACH_Config_Index': 'int',
+    'Custom: TAC': 'int',
+    'Custom: MMEGI': 'int',
+    'Custom: MME Pool': 'category',
+    'Custom: UpStream_CE': 'text',
+    'Custom: DownStream_CE': 'text',
+    'Custom: gNodeB_Id': 'int',
+    'Custom: Local_Cell_Id': 'int',
+    'Custom: NR_Cell_Id': 'int',
+    'Custom: gNodeB_Site_Number': 'int',
+}
+
+# Integers beyond this lose precision as floats, so they stay text
+MAX_EXACT_INT = 2 ** 53
+
+# Columns derived by validate_with_rules, in the order they are set
+DERIVED_COLUMNS = ['Custom: Cell_Identity', 'Custom: NR_Cell_Global_Identity', 'Cell Name', 'Custom: gNodeB_Name', 'Custom: gNodeB_Site_Number']
+
+# Plain decimal integer, as written by str(int)
+INTEGER_PATTERN = re.compile(r'0|-?[1-9]\d*')
+
+# Integer text as accepted by int()
+INT_TEXT_PATTERN = re.compile(r'[+-]?[0-9]+')
+
+# Largest IDs handled with int64 arithmetic; other integers fall back to Python ints
+GNB_ID_MAX = (1 << 24) - 1
+LOCAL_CELL_ID_MAX = (1 << 12) - 1
+NR_CELL_ID_MAX = (1 << 36) - 1
+SITE_NUMBER_MAX = 1 << 40
+
+# "133304" PLMN prefix of the NR Cell Global ID, and the values needing one more hex digit
+NR_CGI_PREFIX = 0x133304
+HEX_DIGIT_LIMITS = np.array([16 ** k - 1 for k in range(1, 10)], dtype=np.int64)
+
+# Local Cell ID assignment per band prefix and antenna; the first matching prefix wins
+BAND_ANTENNA_MAP = {
+    'n26': {1: 0, 2: 1, 3: 2},
+    'n29': {1: 3, 2: 4, 3: 5},
+    'n71': {1: 6, 2: 7, 3: 8},
+    'n66_AWS': {1: 9, 2: 10, 3: 11},
+    'n70': {1: 12, 2: 13, 3: 14},
+    'n66': {1: 15, 2: 16, 3: 17}
+}
+DEFAULT_ASSIGNMENT_ID = 50
 
 
 def load_templates(template_path):
@@ -16,7 +87,83 @@ def load_templates(template_path):
     template = pd.read_excel(template_path)
     cu_bedc_template = pd.read_excel(template_path, sheet_name="Sheet2")
     gnb_tac_template = pd.read_excel(template_path, sheet_name="Sheet3")
-    return template.astype(str), cu_bedc_template.astype(str), gnb_tac_template.astype(str)
+    # The templates are small and only used as text keys
+    return tuple(sheet.map(lambda value: cell_text(value) or "nan") for sheet in (template, cu_bedc_template, gnb_tac_template))
+
+
+def cell_text(value):
+    """
+    Render a cell as the text shown in Excel.
+
+    Args:
+    - value: Cell value as read by pandas.
+
+    Returns:
+    - str: Text of the cell, None if it is empty.
+    """
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def to_int_column(values):
+    """
+    Convert a column to nullable integers if every non-empty cell holds an integer.
+
+    Args:
+    - values (Series): Column as read from Excel.
+
+    Returns:
+    - Series: Int64 column, or the column as text if some cells are not integers.
+    """
+    numbers = pd.to_numeric(values, errors='coerce')
+    integral = numbers.notna() & (numbers % 1 == 0) & (numbers.abs() <= MAX_EXACT_INT)
+    if (integral | values.isna()).all():
+        return numbers.where(integral).astype("Int64")
+    return values.map(cell_text, na_action='ignore').astype(TEXT_DTYPE)
+
+
+def apply_schema(df, schema=None):
+    """
+    Give the columns of a source sheet their schema types.
+
+    Args:
+    - df (DataFrame): Sheet as read by pd.read_excel.
+    - schema (dict): Column name to 'int', 'category' or 'text'; SOURCE_SCHEMA by default.
+
+    Returns:
+    - DataFrame: Typed DataFrame.
+    """
+    schema = SOURCE_SCHEMA if schema is None else schema
+    for column, kind in schema.items():
+        if column not in df.columns:
+            continue
+        if kind == 'int':
+            df[column] = to_int_column(df[column])
+        elif kind == 'category':
+            df[column] = df[column].map(cell_text, na_action='ignore').astype("category")
+        elif kind == 'text':
+            df[column] = df[column].map(cell_text, na_action='ignore').astype(TEXT_DTYPE)
+        else:
+            raise ValueError(f"Unknown column type '{kind}' for column '{column}'")
+    return df
+
+
+def to_text(values):
+    """
+    Render a column as text for the report, with 'nan' for empty cells.
+
+    Args:
+    - values (Series): Typed or text column.
+
+    Returns:
+    - Series: Text column.
+    """
+    return values.astype(TEXT_DTYPE).fillna("nan")
 
 
 def parse_gnb_tac_ranges(gnb_tac_template):
@@ -56,12 +203,12 @@ def highlight_cells(val):
     Highlight cells with discrepancies.
 
     Args:
-    - val (str): Cell value.
+    - val: Cell value.
 
     Returns:
     - str: Style to apply.
     """
-    if val.startswith("FALSE"):
+    if isinstance(val, str) and val.startswith("FALSE"):
         return 'background-color: #F67280'
     return ''
 
@@ -79,136 +226,286 @@ def binary_to_decimal(b_sum):
     return int(b_sum, 2)
 
 
-def get_nr_cell_id(row):
+def parse_integers(values, low, high):
     """
-    Calculate NR Cell ID from gNodeB ID and Local Cell ID.
+    Parse an integer column, or a column of integer strings, into an int64 array.
 
     Args:
-    - row (Series): DataFrame row.
+    - values (Series): Int64 column or column values as strings.
+    - low (int): Smallest value handled as int64.
+    - high (int): Largest value handled as int64.
+
+    Returns:
+    - tuple: int64 array (0 where not in range), mask of values within [low, high], mask of other integers.
+    """
+    if pd.api.types.is_integer_dtype(values):
+        parsed = values.notna().to_numpy(dtype=bool)
+        short = parsed
+        # A copy: without missing values this would be a view of the column, which is zeroed below
+        numbers = values.fillna(0).to_numpy(dtype=np.int64, copy=True)
+    else:
+        text = values.str.strip()
+        parsed = text.str.fullmatch(INT_TEXT_PATTERN).fillna(False).to_numpy(dtype=bool)
+        # Anything over 18 digits cannot be an int64, leave it to Python ints
+        short = parsed & (text.str.lstrip("+-").str.len() <= 18).to_numpy(dtype=bool)
+        numbers = np.zeros(len(values), dtype=np.int64)
+        numbers[short] = text[short].astype("int64").to_numpy()
+    valid = short & (numbers >= low) & (numbers <= high)
+    numbers[~valid] = 0
+    return numbers, valid, parsed & ~valid
+
+
+def nr_cell_id(gnb_id, local_cell_id):
+    """
+    Calculate one NR Cell ID by joining the binary gNodeB ID and Local Cell ID.
+
+    Args:
+    - gnb_id (int): gNodeB ID.
+    - local_cell_id (int): Local Cell ID.
 
     Returns:
     - str: NR Cell ID.
     """
-    if "FALSE" not in row['Custom: gNodeB_Id'] and "FALSE" not in row['Custom: Local_Cell_Id']:
-        gnb_id_bin = format(int(row['Custom: gNodeB_Id']), '024b')
-        local_cell_id_bin = format(int(row['Custom: Local_Cell_Id']), '012b')
-        return str(binary_to_decimal(gnb_id_bin + local_cell_id_bin))
-    return ''
+    return str(binary_to_decimal(format(gnb_id, '024b') + format(local_cell_id, '012b')))
 
 
-def get_nr_cell_global_id(row):
+def get_nr_cell_id(final):
     """
-    Calculate NR Cell Global ID from NR Cell ID.
+    Calculate NR Cell IDs from gNodeB IDs and Local Cell IDs.
 
     Args:
-    - row (Series): DataFrame row.
+    - final (DataFrame): DataFrame with 'Custom: gNodeB_Id' and 'Custom: Local_Cell_Id' columns.
 
     Returns:
-    - str: NR Cell Global ID.
+    - Series: NR Cell IDs, empty where either ID is not a valid integer.
     """
-    if "FALSE" not in row['Custom: NR_Cell_Id']:
-        nr_cell_id_hex = format(int(row['Custom: NR_Cell_Id']), 'x')
-        return str(int("133304" + nr_cell_id_hex, 16))
-    return ''
+    gnb_ids, gnb_valid, gnb_other = parse_integers(final['Custom: gNodeB_Id'], 0, GNB_ID_MAX)
+    cell_ids, cell_valid, cell_other = parse_integers(final['Custom: Local_Cell_Id'], 0, LOCAL_CELL_ID_MAX)
+    valid = gnb_valid & cell_valid
+    result = np.full(len(final), '', dtype=object)
+    result[valid] = ((gnb_ids[valid] << 12) | cell_ids[valid]).astype(str)
+    # Negative IDs and IDs wider than 24/12 bits keep the exact string arithmetic
+    for i in np.flatnonzero((gnb_valid | gnb_other) & (cell_valid | cell_other) & ~valid):
+        try:
+            result[i] = nr_cell_id(int(final['Custom: gNodeB_Id'].iat[i]), int(final['Custom: Local_Cell_Id'].iat[i]))
+        except ValueError:
+            pass
+    return pd.Series(result, index=final.index, dtype=TEXT_DTYPE)
+
+
+def get_nr_cell_global_id(final):
+    """
+    Calculate NR Cell Global IDs from NR Cell IDs.
+
+    The global ID is the hex NR Cell ID behind the "133304" PLMN prefix, that is
+    0x133304 shifted left by four bits per hex digit of the NR Cell ID.
 
+    Args:
+    - final (DataFrame): DataFrame with a 'Custom: NR_Cell_Id' column.
 
-def pci_check(vals, final, dest_path):
+    Returns:
+    - Series: NR Cell Global IDs, empty where the NR Cell ID is not a valid integer.
+    """
+    cell_ids, valid, other = parse_integers(final['Custom: NR_Cell_Id'], 0, NR_CELL_ID_MAX)
+    # Number of hex digits of each ID, at least one
+    hex_digits = np.searchsorted(HEX_DIGIT_LIMITS, cell_ids[valid]) + 1
+    result = np.full(len(final), '', dtype=object)
+    result[valid] = ((NR_CGI_PREFIX << (4 * hex_digits)) | cell_ids[valid]).astype(str)
+    for i in np.flatnonzero(other):
+        try:
+            result[i] = str(int("133304" + format(int(final['Custom: NR_Cell_Id'].iat[i]), 'x'), 16))
+        except ValueError:
+            pass
+    return pd.Series(result, index=final.index, dtype=TEXT_DTYPE)
+
+
+def get_nr_cell_name(final):
     """
-    Check for PCI conflicts and save results.
+    Generate NR Cell Names for all rows.
 
     Args:
-    - vals (list): List of (Site_ID_Sector, Band, PCI) tuples.
-    - final (DataFrame): Processed DataFrame.
-    - dest_path (str): Destination path for the output Excel file.
-    """
-    conflict_list = []
-    valdict = {}
-
-    for site_id_sector, band, pci in vals:
-        if site_id_sector in valdict:
-            if valdict[site_id_sector] != pci:
-                conflict_list.append([site_id_sector, band, valdict[site_id_sector]])
-                conflict_list.append([site_id_sector, band, pci])
-        else:
-            valdict[site_id_sector] = pci
+    - final (DataFrame): DataFrame with 'Site ID', 'Antenna ID' and 'Band Name' columns.
 
-    with pd.ExcelWriter(dest_path) as results:
-        if conflict_list:
-            invalid_pci = pd.DataFrame(conflict_list, columns=['Site_Id_Sector', 'Band', 'PCI']).drop_duplicates()
-            invalid_pci.to_excel(results, sheet_name="PCI_DISCREPANCY", index=False)
-        final.style.applymap(highlight_cells).to_excel(results, sheet_name="Sheet1", index=False)
+    Returns:
+    - Series: NR Cell Names.
+    """
+    band_name = to_text(final['Band Name']).str.replace("AWS-4", "AWS4", regex=False)
+    band_name = band_name.where(~band_name.str.contains("DL", regex=False), band_name.str[:-3])
+    return to_text(final['Site ID']) + "_" + to_text(final['Antenna ID']) + "_" + band_name
 
 
-def get_nr_cell_name(row):
+def get_gnodeb_name(final):
     """
-    Generate NR Cell Name from row data.
+    Generate gNodeB Names for all rows.
 
     Args:
-    - row (Series): DataFrame row.
+    - final (DataFrame): DataFrame with 'Site ID' and 'Custom: gNodeB_Id' columns.
 
     Returns:
-    - str: NR Cell Name.
+    - Series: gNodeB Names.
     """
-    band_name = row['Band Name'].replace("AWS-4", "AWS4")
-    if "DL" in band_name:
-        band_name = band_name[:-3]
-    return f"{row['Site ID']}_{row['Antenna ID']}_{band_name}"
+    return to_text(final['Site ID']).str[:5] + to_text(final['Custom: gNodeB_Id'])
 
 
-def get_gnodeb_name(row):
+def get_local_cell_id(final):
     """
-    Generate gNodeB Name from row data.
+    Calculate Local Cell IDs from gNodeB site numbers, bands and antennas.
 
     Args:
-    - row (Series): DataFrame row.
+    - final (DataFrame): DataFrame with 'Custom: gNodeB_Site_Number', 'Band Name' and 'Antenna ID' columns.
 
     Returns:
-    - str: gNodeB Name.
+    - Series: Local Cell IDs, empty where the site number is missing or not a valid integer.
+    """
+    site_numbers, valid, overflow = parse_integers(final['Custom: gNodeB_Site_Number'], -SITE_NUMBER_MAX, SITE_NUMBER_MAX)
+    antenna_ids, antenna_valid, antenna_overflow = parse_integers(final['Antenna ID'], -SITE_NUMBER_MAX, SITE_NUMBER_MAX)
+    # Antennas too large for int64 cannot match the map, but are still readable
+    antenna_readable = antenna_valid | antenna_overflow
+    band_name = to_text(final['Band Name'])
+
+    assignment_ids = np.full(len(final), DEFAULT_ASSIGNMENT_ID, dtype=np.int64)
+    matched = np.zeros(len(final), dtype=bool)
+    # The first matching band prefix wins, as in BAND_ANTENNA_MAP's order
+    for prefix, antennas in BAND_ANTENNA_MAP.items():
+        rows = band_name.str.startswith(prefix).fillna(False).to_numpy(dtype=bool) & ~matched
+        matched |= rows
+        for antenna_id, assignment_id in antennas.items():
+            assignment_ids[rows & antenna_valid & (antenna_ids == antenna_id)] = assignment_id
+    # A band with per-antenna IDs needs a readable antenna
+    valid &= ~matched | antenna_readable
+
+    result = np.full(len(final), '', dtype=object)
+    result[valid] = ((site_numbers[valid] - 1) * 21 + assignment_ids[valid]).astype(str)
+    for i in np.flatnonzero(overflow & (~matched | antenna_readable)):
+        result[i] = str((int(final['Custom: gNodeB_Site_Number'].iat[i]) - 1) * 21 + int(assignment_ids[i]))
+    return pd.Series(result, index=final.index, dtype=TEXT_DTYPE)
+
+
+def build_rules(cu_bedc_list, band_list, pci_list, prach_list, tac_list, gnb_list):
     """
-    return f"{row['Site ID'][:5]}{row['Custom: gNodeB_Id']}"
+    Build the validation rule table.
+
+    Each rule is a (column, check, allowed, message) tuple:
+    - 'equals': the value must equal allowed (compared as text on text columns).
+    - 'in_set': the value must be in the set allowed.
+    - 'in_range': the value must be an integer within the inclusive (low, high) bounds in allowed.
+    - 'digits': the value must be a non-negative integer (digits only, on text columns); allowed is unused.
+    A '{value}' placeholder in the message is replaced by the current value.
 
+    Args:
+    - cu_bedc_list (list): List of valid CU_BEDC values.
+    - band_list (list): List of valid band values.
+    - pci_list (list): List of valid PCI values (integers).
+    - prach_list (list): List of valid PRACH values (integers).
+    - tac_list (list): List of valid TAC values.
+    - gnb_list (list): List of valid gNodeB values.
 
-def get_local_cell_id(row):
+    Returns:
+    - list: Rules in the order they are applied.
+    """
+    return [
+        ('Custom: CP_Type', 'equals', "Normal", "FALSE - The value should be 'Normal'"),
+        ('Site_ID_CUs_Numbers', 'in_set', set(cu_bedc_list), "FALSE - The value does not match with the reference template"),
+        ('Band_DL_UL_SSB_absfreqA_bandwidth_UL_MIMO', 'in_set', set(band_list), "FALSE - The value does not match with the reference template"),
+        ('Custom: DL_Rank', 'equals', 4, "FALSE - The value should be '4'"),
+        ('Custom: UL_Rank', 'equals', 2, "FALSE - The value should be '2'"),
+        ('Custom: DL_MIMO', 'equals', 4, "FALSE - The value should be '4'"),
+        ('Custom: UL_MIMO', 'equals', 2, "FALSE - The value should be '2'"),
+        ('Custom: Physical_Cell_ID', 'in_range', value_bounds(pci_list), "FALSE - The value is not within the valid range"),
+        ('Custom: PRACH_Config_Index', 'in_range', value_bounds(prach_list), "FALSE - The value is not within the valid range"),
+        ('Custom: TAC', 'in_range', value_bounds(tac_list), "FALSE - The value is not within the valid range"),
+        ('Custom: MMEGI', 'equals', 10, "FALSE - The value should be '10'"),
+        ('Custom: MME Pool', 'equals', "MME_Production", "FALSE - The value should be 'MME_Production'"),
+        ('Custom: UpStream_CE', 'equals', "TRUE", "FALSE - The value should be 'TRUE'"),
+        ('Custom: DownStream_CE', 'equals', "TRUE", "FALSE - The value should be 'TRUE'"),
+        ('Custom: gNodeB_Id', 'in_range', value_bounds(gnb_list),
+         f"FALSE - The gNB ID should be a unique non-empty value in the range[1-{len(gnb_list)}]. Current value is: {{value}}"),
+        ('Custom: NR_Cell_Id', 'digits', None, "FALSE - The value should be unique non-empty integer value. Current value is empty"),
+    ]
+
+
+def value_bounds(values):
     """
-    Calculate Local Cell ID from row data.
+    Get the inclusive bounds of a list of integers such as the ranges from parse_gnb_tac_ranges.
 
     Args:
-    - row (Series): DataFrame row.
+    - values (list): Integer values.
 
     Returns:
-    - str: Local Cell ID.
-    """
-    assignment_id = 50
-    gnb_site_number = row['Custom: gNodeB_Site_Number']
-    
-    if not gnb_site_number or "FALSE" in gnb_site_number:
-        return ''
-    
-    gnb_site_number = int(gnb_site_number)
-    band_name = row['Band Name']
-    antenna_id = row['Antenna ID']
-    
-    band_antenna_map = {
-        'n26': {1: 0, 2: 1, 3: 2},
-        'n29': {1: 3, 2: 4, 3: 5},
-        'n71': {1: 6, 2: 7, 3: 8},
-        'n66_AWS': {1: 9, 2: 10, 3: 11},
-        'n70': {1: 12, 2: 13, 3: 14},
-        'n66': {1: 15, 2: 16, 3: 17}
-    }
-    
-    for key in band_antenna_map:
-        if band_name.startswith(key):
-            assignment_id = band_antenna_map[key].get(int(antenna_id), assignment_id)
-            break
-    
-    return str((gnb_site_number - 1) * 21 + assignment_id)
+    - tuple: (low, high), or None if the list is empty.
+    """
+    return (min(values), max(values)) if values else None
+
+
+def check_rule(values, check, allowed):
+    """
+    Evaluate one rule over a whole column.
 
+    Args:
+    - values (Series): Typed column or column values as strings.
+    - check (str): Rule check, see build_rules.
+    - allowed: Value, set or bounds the check compares against.
 
-def validate_and_transform(final, cu_bedc_list, band_list, pci_list, prach_list, tac_list, k8_list, gnb_list):
+    Returns:
+    - Series: True where the value passes the rule.
+    """
+    numeric = pd.api.types.is_numeric_dtype(values)
+    if check == 'equals':
+        return (values == (allowed if numeric else str(allowed))).fillna(False).astype(bool)
+    if check == 'in_set':
+        return values.isin(allowed)
+    if check == 'in_range':
+        if allowed is None:
+            return pd.Series(False, index=values.index)
+        if numeric:
+            return values.between(*allowed).fillna(False).astype(bool)
+        # Only the plain decimal form of an integer counts
+        integer = values.str.fullmatch(INTEGER_PATTERN).fillna(False).astype(bool)
+        numbers = pd.to_numeric(values.where(integer), errors='coerce')
+        return integer & numbers.between(*allowed)
+    if check == 'digits':
+        if numeric:
+            return (values >= 0).fillna(False).astype(bool)
+        return values.str.isdigit().fillna(False).astype(bool)
+    raise ValueError(f"Unknown rule check '{check}'")
+
+
+def apply_rules(final, rules):
+    """
+    Replace the values failing a rule by the rule's message, one vectorized pass per rule.
+
+    Columns without failures keep their type; the others are turned into text
+    so they can hold the messages.
+
+    Args:
+    - final (DataFrame): DataFrame to validate, modified in place.
+    - rules (list): Rules from build_rules.
+
+    Returns:
+    - DataFrame: The validated DataFrame.
+    """
+    for column, check, allowed, message in rules:
+        values = final[column]
+        # Exports repeat the same few values a lot, so each distinct value is checked once
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        valid = check_rule(pd.Series(uniques, dtype=values.dtype), check, allowed).to_numpy(dtype=bool)[codes]
+        if valid.all():
+            continue
+        text = to_text(values)
+        if "{value}" in message:
+            prefix, suffix = message.split("{value}", 1)
+            message = prefix + text + suffix
+        final[column] = text.where(valid, message)
+    return final
+
+
+def validate_and_transform(final, cu_bedc_list, band_list, pci_list, prach_list, tac_list, gnb_list):
     """
     Validate and transform the final DataFrame based on templates and rules.
 
+    Builds the rule table and applies it in one call; to validate many files,
+    build the rules once with compile_template and use validate_with_rules.
+
     Args:
     - final (DataFrame): DataFrame to validate and transform.
     - cu_bedc_list (list): List of valid CU_BEDC values.
@@ -216,51 +513,44 @@ def validate_and_transform(final, cu_bedc_list, band_list, pci_list, prach_list,
     - pci_list (list): List of valid PCI values.
     - prach_list (list): List of valid PRACH values.
     - tac_list (list): List of valid TAC values.
-    - k8_list (list): List of valid K8 values.
     - gnb_list (list): List of valid gNodeB values.
 
     Returns:
     - DataFrame: Validated and transformed DataFrame.
     """
-    patterns = {
-        'lat': re.compile(r'^\d{2}\.\d{6}$'),
-        'long': re.compile(r'^-\d{2}\.\d{6}$'),
-        'col': re.compile(r'^FALSE')
-    }
+    return validate_with_rules(final, build_rules(cu_bedc_list, band_list, pci_list, prach_list, tac_list, gnb_list))
+
+
+def validate_with_rules(final, rules):
+    """
+    Validate the final DataFrame against compiled rules and derive the ID and name columns.
+
+    Args:
+    - final (DataFrame): DataFrame to validate and transform.
+    - rules (list): Rules from build_rules or compile_template.
 
-    final['Custom: CP_Type'] = final['Custom: CP_Type'].apply(lambda x: "FALSE - The value should be 'Normal'" if x != "Normal" else x)
-    final['Site_ID_CUs_Numbers'] = final['Site_ID_CUs_Numbers'].apply(lambda x: "FALSE - The value does not match with the reference template" if x not in cu_bedc_list else x)
-    final['Band_DL_UL_SSB_absfreqA_bandwidth_UL_MIMO'] = final['Band_DL_UL_SSB_absfreqA_bandwidth_UL_MIMO'].apply(lambda x: "FALSE - The value does not match with the reference template" if x not in band_list else x)
-    final['Custom: DL_Rank'] = final['Custom: DL_Rank'].apply(lambda x: "FALSE - The value should be '4'" if x != "4" else x)
-    final['Custom: UL_Rank'] = final['Custom: UL_Rank'].apply(lambda x: "FALSE - The value should be '2'" if x != "2" else x)
-    final['Custom: DL_MIMO'] = final['Custom: DL_MIMO'].apply(lambda x: "FALSE - The value should be '4'" if x != "4" else x)
-    final['Custom: UL_MIMO'] = final['Custom: UL_MIMO'].apply(lambda x: "FALSE - The value should be '2'" if x != "2" else x)
-    final['Custom: Physical_Cell_ID'] = final['Custom: Physical_Cell_ID'].apply(lambda x: "FALSE - The value is not within the valid range" if x not in pci_list else x)
-    final['Custom: PRACH_Config_Index'] = final['Custom: PRACH_Config_Index'].apply(lambda x: "FALSE - The value is not within the valid range" if x not in prach_list else x)
-    final['Custom: TAC'] = final['Custom: TAC'].apply(lambda x: "FALSE - The value is not within the valid range" if x not in tac_list else x)
-    final['Custom: MMEGI'] = final['Custom: MMEGI'].apply(lambda x: "FALSE - The value should be '10'" if x != "10" else x)
-    final['Custom: MME Pool'] = final['Custom: MME Pool'].apply(lambda x: "FALSE - The value should be 'MME_Production'" if x != "MME_Production" else x)
-    final['Custom: UpStream_CE'] = final['Custom: UpStream_CE'].apply(lambda x: "FALSE - The value should be 'TRUE'" if x != "TRUE" else x)
-    final['Custom: DownStream_CE'] = final['Custom: DownStream_CE'].apply(lambda x: "FALSE - The value should be 'TRUE'" if x != "TRUE" else x)
-    final['Custom: gNodeB_Id'] = final['Custom: gNodeB_Id'].apply(lambda x: f"FALSE - The gNB ID should be a unique non-empty value in the range[1-{len(gnb_list)}]. Current value is: {x}" if x not in gnb_list else x)
-    final['Custom: NR_Cell_Id'] = final['Custom: NR_Cell_Id'].apply(lambda x: "FALSE - The value should be unique non-empty integer value. Current value is empty" if not x.isdigit() else x)
-    final['Custom: Cell_Identity'] = final.apply(get_nr_cell_id, axis=1)
-    final['Custom: NR_Cell_Global_Identity'] = final.apply(get_nr_cell_global_id, axis=1)
-    final['Cell Name'] = final.apply(get_nr_cell_name, axis=1)
-    final['Custom: gNodeB_Name'] = final.apply(get_gnodeb_name, axis=1)
-    final['Custom: gNodeB_Site_Number'] = final.apply(get_local_cell_id, axis=1)
+    Returns:
+    - DataFrame: Validated and transformed DataFrame.
+    """
+    final = apply_rules(final, rules)
+    final['Custom: Cell_Identity'] = get_nr_cell_id(final)
+    final['Custom: NR_Cell_Global_Identity'] = get_nr_cell_global_id(final)
+    final['Cell Name'] = get_nr_cell_name(final)
+    final['Custom: gNodeB_Name'] = get_gnodeb_name(final)
+    final['Custom: gNodeB_Site_Number'] = get_local_cell_id(final)
 
     return final
 
 
-def process_excel_data(source_path, template_path, dest_path):
+def compile_template(template_path):
     """
-    Process Excel data by validating and transforming it using templates.
+    Load the templates and build the validation rules, once for any number of source files.
 
     Args:
-    - source_path (str): Path to the source Excel file.
     - template_path (str): Path to the template Excel file.
-    - dest_path (str): Path to save the processed Excel file.
+
+    Returns:
+    - list: Rules from build_rules.
     """
     # Load templates
     template, cu_bedc_template, gnb_tac_template = load_templates(template_path)
@@ -269,17 +559,64 @@ def process_excel_data(source_path, template_path, dest_path):
     band_list, cu_bedc_list = create_lists(template, cu_bedc_template)
 
     # Parse gNB, TAC, and K8 ranges
-    gnb_list, tac_list, k8_list = parse_gnb_tac_ranges(gnb_tac_template)
-    pci_list = [str(i) for i in range(0, 1008)]
-    prach_list = [str(i) for i in range(0, 828)]
+    # K8 ranges are parsed but not validated
+    gnb_list, tac_list, _ = parse_gnb_tac_ranges(gnb_tac_template)
+    pci_list = list(range(0, 1008))
+    prach_list = list(range(0, 828))
+
+    return build_rules(cu_bedc_list, band_list, pci_list, prach_list, tac_list, gnb_list)
+
+
+def process_source_file(source_path, rules, dest_path):
+    """
+    Validate one source file against compiled rules and save its report.
+
+    Args:
+    - source_path (str): Path to the source Excel file.
+    - rules (list): Rules from compile_template.
+    - dest_path (str): Path to save the report (.xlsx, .csv or .parquet).
+
+    Returns:
+    - dict: Row, discrepancy and conflict counts, and the seconds spent in each stage.
+    """
+    timings = {}
+    started = time.perf_counter()
+    final = apply_schema(pd.read_excel(source_path))
+    timings['load'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    final = validate_with_rules(final, rules)
+    timings['validate'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    sheets = find_conflicts(final)
+    timings['conflicts'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    discrepancies = write_report(final, dest_path, sheets)
+    timings['write'] = time.perf_counter() - started
+
+    return {
+        'rows': len(final),
+        'discrepancies': discrepancies,
+        'conflicts': {sheet: len(rows) for sheet, rows in sheets.items()},
+        'timings': timings,
+    }
+
+
+def process_excel_data(source_path, template_path, dest_path):
+    """
+    Process Excel data by validating and transforming it using templates.
 
-    # Load and validate data
-    final = pd.read_excel(source_path).astype(str)
-    final = validate_and_transform(final, cu_bedc_list, band_list, pci_list, prach_list, tac_list, k8_list, gnb_list)
+    Args:
+    - source_path (str): Path to the source Excel file.
+    - template_path (str): Path to the template Excel file.
+    - dest_path (str): Path to save the processed Excel file.
 
-    # Check for PCI conflicts and save results
-    vals = list(zip(final['Site_ID_Sector'], final['Band Name'], final['Physical Cell ID']))
-    pci_check(vals, final, dest_path)
+    Returns:
+    - dict: Counts and stage timings, see process_source_file.
+    """
+    return process_source_file(source_path, compile_template(template_path), dest_path)
 
 
 if __name__ == "__main__":
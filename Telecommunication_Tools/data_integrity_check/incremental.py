@@ -0,0 +1,284 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - the result store is written as Parquet
+except ImportError:
+    pyarrow = None
+
+from conflicts import CONFLICT_RULES, ROW_COLUMN, find_conflicts, update_conflicts
+from data_integrity_check import (DERIVED_COLUMNS, TEXT_DTYPE, apply_schema, process_source_file, to_text,
+                                  validate_with_rules)
+from report_writer import write_report
+
+# Prior results live here unless INTEGRITY_STORE_DIR says otherwise
+DEFAULT_STORE_DIR = os.environ.get("INTEGRITY_STORE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "integrity_check"))
+
+# Bumped whenever the stored layout or the validation code changes meaning
+STORE_FORMAT = 1
+
+META_FILE = "meta.json"
+
+
+def row_keys(df):
+    """
+    Fingerprint every row of a source sheet.
+
+    Args:
+    - df (DataFrame): Typed source sheet.
+
+    Returns:
+    - ndarray: One uint64 hash per row, equal for rows with equal content.
+    """
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+def template_version(rules, df):
+    """
+    Hash the compiled rules, the conflict rules and the source columns.
+
+    Prior results are only reused under the same version, so a new template or
+    a column changing type triggers a full run.
+
+    Args:
+    - rules (list): Rules from compile_template.
+    - df (DataFrame): Typed source sheet.
+
+    Returns:
+    - str: Hex SHA-256 digest.
+    """
+    rule_spec = [[column, check, sorted(map(str, allowed)) if isinstance(allowed, (set, frozenset)) else allowed, message]
+                 for column, check, allowed, message in rules]
+    columns = [[str(column), str(dtype)] for column, dtype in df.dtypes.items()]
+    spec = json.dumps([STORE_FORMAT, rule_spec, CONFLICT_RULES, columns], default=str)
+    return hashlib.sha256(spec.encode()).hexdigest()
+
+
+def stored_columns(rules, df):
+    """
+    Get the validated columns kept between runs: rule columns, derived columns and conflict rule columns.
+
+    Args:
+    - rules (list): Rules from compile_template.
+    - df (DataFrame): Validated DataFrame.
+
+    Returns:
+    - list: Column names in first-use order.
+    """
+    columns = [column for column, _, _, _ in rules] + DERIVED_COLUMNS
+    columns += [column for _, _, rule_columns in CONFLICT_RULES for column in rule_columns]
+    return [column for column in dict.fromkeys(columns) if column in df.columns]
+
+
+class ResultStore:
+    """
+    On-disk store of the previous validation of a source file.
+
+    Each save writes new Parquet files and then switches meta.json to them in
+    one atomic rename, so an interrupted run leaves the previous results intact.
+
+    Parameters:
+        store_dir (str): Root directory of the stores.
+        source_path (str): Source workbook the results belong to.
+    """
+
+    def __init__(self, store_dir, source_path):
+        self.path = os.path.join(store_dir, hashlib.sha256(os.path.abspath(source_path).encode()).hexdigest()[:16])
+
+    def _read_meta(self):
+        try:
+            with open(os.path.join(self.path, META_FILE), "r") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, version):
+        """
+        Load the previous results if they were made under the same version.
+
+        Args:
+        - version (str): Output of template_version.
+
+        Returns:
+        - tuple: (rows, sheets), or None if there is nothing to reuse.
+        """
+        meta = self._read_meta()
+        if meta is None or meta.get("version") != version:
+            return None
+        try:
+            rows = pd.read_parquet(os.path.join(self.path, meta["rows"]))
+            sheets = {sheet: pd.read_parquet(os.path.join(self.path, name)) for sheet, name in meta["sheets"].items()}
+        except (OSError, ValueError) as ex:
+            logging.warning(f"Ignoring unreadable result store {self.path}: {ex}")
+            return None
+        return rows, sheets
+
+    def save(self, version, rows, sheets):
+        """
+        Save the results of a run, replacing the previous ones.
+
+        Args:
+        - version (str): Output of template_version.
+        - rows (DataFrame): Stored columns of every row, with a 'row_key' column.
+        - sheets (dict): Sheet name to conflicting rows, with a 'row_key' column.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        previous = self._read_meta()
+        generation = uuid.uuid4().hex[:12]
+        meta = {"version": version, "rows": f"rows-{generation}.parquet", "sheets": {}}
+        rows.to_parquet(os.path.join(self.path, meta["rows"]), index=False)
+        for number, (sheet, df) in enumerate(sheets.items()):
+            meta["sheets"][sheet] = f"sheet{number}-{generation}.parquet"
+            df.to_parquet(os.path.join(self.path, meta["sheets"][sheet]), index=False)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w") as fh:
+            json.dump(meta, fh, indent=1)
+        os.replace(tmp_path, os.path.join(self.path, META_FILE))
+
+        if previous is not None:
+            for name in [previous.get("rows")] + list(previous.get("sheets", {}).values()):
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except (OSError, TypeError):
+                    pass
+
+
+def merge_validated(final, rules, keys, previous_rows):
+    """
+    Validate the rows not seen before and take the others from the previous run.
+
+    A rule column with failures is text, as apply_rules leaves it; a rule
+    column without failures keeps its type.
+
+    Args:
+    - final (DataFrame): Typed source sheet.
+    - rules (list): Rules from compile_template.
+    - keys (ndarray): Output of row_keys for final.
+    - previous_rows (DataFrame): Stored rows of the previous run.
+
+    Returns:
+    - tuple: (validated DataFrame, number of rows reused).
+    """
+    cached = previous_rows.drop_duplicates('row_key').set_index('row_key')
+    hit = np.isin(keys, cached.index.to_numpy())
+    fresh = validate_with_rules(final[~hit].copy(), rules) if not hit.all() else None
+
+    reused = cached.loc[keys[hit]] if hit.any() else None
+    parts = [(mask, part) for mask, part in ((hit, reused), (~hit, fresh)) if part is not None]
+
+    def gather(column):
+        values = np.empty(len(final), dtype=object)
+        for mask, part in parts:
+            values[mask] = part[column].to_numpy(dtype=object)
+        return pd.Series(values, index=final.index, dtype=TEXT_DTYPE)
+
+    result = final.copy()
+    for column, _, _, _ in rules:
+        failures = np.zeros(len(final), dtype=bool)
+        for mask, part in parts:
+            # A column left numeric had no failures
+            if not pd.api.types.is_numeric_dtype(part[column]):
+                failures[mask] = part[column].astype("string").str.startswith("FALSE").fillna(False).to_numpy(dtype=bool)
+        if failures.any():
+            messages = np.empty(len(final), dtype=object)
+            for mask, part in parts:
+                messages[mask] = to_text(part[column]).to_numpy(dtype=object)
+            result[column] = to_text(final[column]).where(~failures, pd.Series(messages, index=final.index, dtype=TEXT_DTYPE))
+    for column in DERIVED_COLUMNS:
+        result[column] = gather(column)
+    return result, int(hit.sum())
+
+
+def process_source_incremental(source_path, rules, dest_path, store_dir=None):
+    """
+    Validate one source file, reusing the results of its previous run for unchanged rows.
+
+    Rows are matched on a fingerprint of their content, so inserted, deleted or
+    reordered rows are handled. The conflict checks are re-run only on the rows
+    sharing a key with a changed row; the other findings are carried over.
+    Without a usable store the file is validated in full.
+
+    Args:
+    - source_path (str): Path to the source Excel file.
+    - rules (list): Rules from compile_template.
+    - dest_path (str): Path to save the report (.xlsx, .csv or .parquet).
+    - store_dir (str, optional): Result store directory, DEFAULT_STORE_DIR when omitted.
+
+    Returns:
+    - dict: Counts and stage timings as process_source_file, plus the number of reused rows.
+    """
+    if pyarrow is None:
+        logging.warning(f"pyarrow is not installed, validating {source_path} in full without a result store")
+        result = process_source_file(source_path, rules, dest_path)
+        result['reused'] = 0
+        result['timings'].update(fingerprint=0.0, store=0.0)
+        return result
+
+    timings = {}
+    started = time.perf_counter()
+    final = apply_schema(pd.read_excel(source_path))
+    timings['load'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    keys = row_keys(final)
+    version = template_version(rules, final)
+    store = ResultStore(store_dir or DEFAULT_STORE_DIR, source_path)
+    previous = store.load(version)
+    timings['fingerprint'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    if previous is None:
+        validated, reused = validate_with_rules(final.copy(), rules), 0
+    else:
+        validated, reused = merge_validated(final, rules, keys, previous[0])
+    timings['validate'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    columns = stored_columns(rules, validated)
+    if previous is None:
+        sheets = find_conflicts(validated)
+    else:
+        previous_rows, previous_sheets = previous
+        old_keys = previous_rows['row_key'].to_numpy(dtype=np.uint64)
+        # Rows present exactly once before and now keep their findings; everything else is re-checked
+        old_counts = pd.Series(old_keys).value_counts()
+        new_counts = pd.Series(keys).value_counts()
+        stable_keys = old_counts.index[old_counts == 1].intersection(new_counts.index[new_counts == 1])
+        stable = np.isin(keys, stable_keys)
+        stable_rows = pd.Series(np.flatnonzero(stable), index=keys[stable])
+        old_positions = pd.Series(np.arange(len(old_keys)), index=old_keys)[stable_keys].reindex(keys[stable]).to_numpy()
+        if (np.diff(old_positions) < 0).any():
+            # The sheets list the first row of each conflicting pair, so reordered rows need a full check
+            sheets = find_conflicts(validated)
+        else:
+            touched = pd.concat([validated.loc[~stable, columns].astype("string"),
+                                 previous_rows.loc[~np.isin(old_keys, stable_keys), columns].astype("string")],
+                                ignore_index=True)
+            sheets = update_conflicts(validated, previous_sheets, touched, stable_rows)
+    timings['conflicts'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    discrepancies = write_report(validated, dest_path, sheets)
+    timings['write'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    store.save(version, validated[columns].assign(row_key=keys),
+               {sheet: rows.assign(row_key=keys[rows[ROW_COLUMN].to_numpy() - 2]) for sheet, rows in sheets.items()})
+    timings['store'] = time.perf_counter() - started
+
+    return {
+        'rows': len(validated),
+        'reused': reused,
+        'discrepancies': discrepancies,
+        'conflicts': {sheet: len(rows) for sheet, rows in sheets.items()},
+        'timings': timings,
+    }
@@ -0,0 +1,222 @@
+import argparse
+import csv
+import glob
+import logging
+import os
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from conflicts import CONFLICT_RULES
+from data_integrity_check import compile_template, process_source_file
+from incremental import DEFAULT_STORE_DIR, process_source_incremental
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Stages timed for every file, in pipeline order
+STAGES = ('load', 'validate', 'conflicts', 'write')
+
+SUMMARY_FILE = "summary.csv"
+
+# Extra stages timed in incremental mode
+INCREMENTAL_STAGES = ('fingerprint', 'store')
+
+_worker_rules = None
+_worker_store_dir = None
+
+
+def _init_worker(rules, store_dir=None):
+    """Keep the compiled rules and the result store directory in the worker process."""
+    global _worker_rules, _worker_store_dir
+    _worker_rules = rules
+    _worker_store_dir = store_dir
+
+
+def report_path(source_path, output_dir, extension):
+    """
+    Get the report path of a source file.
+
+    Args:
+    - source_path (str): Source workbook.
+    - output_dir (str): Report directory.
+    - extension (str): Report extension, such as ".xlsx".
+
+    Returns:
+    - str: "<output_dir>/<source name>_report<extension>".
+    """
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(output_dir, f"{stem}_report{extension}")
+
+
+def report_paths(sources, output_dir, extension):
+    """
+    Get a distinct report path for every source of a batch.
+
+    Sources sharing a file name (a/site.xlsx and b/site.xlsx) would overwrite
+    each other's report, so their reports get the name of the parent directory
+    as a prefix ("a_site_report.xlsx"), and a counter if that still collides.
+
+    Args:
+    - sources (list): Source workbooks.
+    - output_dir (str): Report directory.
+    - extension (str): Report extension, such as ".xlsx".
+
+    Returns:
+    - dict: Source path to report path.
+    """
+    stems = [os.path.splitext(os.path.basename(source))[0] for source in sources]
+    # Compared without case, as on Windows file systems
+    counts = Counter(stem.lower() for stem in stems)
+    used = set()
+    paths = {}
+    for source, stem in zip(sources, stems):
+        if counts[stem.lower()] > 1:
+            stem = f"{os.path.basename(os.path.dirname(os.path.abspath(source)))}_{stem}"
+        name, number = stem, 2
+        while name.lower() in used:
+            name, number = f"{stem}_{number}", number + 1
+        used.add(name.lower())
+        paths[source] = os.path.join(output_dir, f"{name}_report{extension}")
+        if paths[source] != report_path(source, output_dir, extension):
+            logging.warning(f"Several sources are named {os.path.basename(source)}: the report of {source} is {paths[source]}")
+    return paths
+
+
+def run_file(source_path, dest_path, rules=None, store_dir=None):
+    """
+    Validate one source file, turning any failure into an error entry.
+
+    Args:
+    - source_path (str): Source workbook.
+    - dest_path (str): Report path.
+    - rules (list, optional): Compiled rules; the worker's rules when omitted.
+    - store_dir (str, optional): Result store directory for incremental mode; the worker's when omitted.
+
+    Returns:
+    - dict: Summary entry of the file.
+    """
+    entry = {'file': source_path, 'report': dest_path}
+    rules = _worker_rules if rules is None else rules
+    store_dir = _worker_store_dir if store_dir is None else store_dir
+    try:
+        if store_dir:
+            result = process_source_incremental(source_path, rules, dest_path, store_dir)
+            entry['reused'] = result['reused']
+        else:
+            result = process_source_file(source_path, rules, dest_path)
+        entry.update(status='ok', rows=result['rows'], discrepancies=result['discrepancies'], error='')
+        entry.update({sheet: result['conflicts'].get(sheet, 0) for sheet, _, _ in CONFLICT_RULES})
+        entry.update({f"{stage}_s": round(seconds, 3) for stage, seconds in result['timings'].items()})
+    except Exception as ex:
+        logging.debug(traceback.format_exc())
+        entry.update(status='error', error=f"{type(ex).__name__}: {ex}")
+    return entry
+
+
+def expand_sources(sources):
+    """
+    Expand directories and glob patterns into a sorted list of workbooks.
+
+    Args:
+    - sources (list): Files, directories or glob patterns.
+
+    Returns:
+    - list: Source workbook paths.
+    """
+    files = []
+    for source in sources:
+        if os.path.isdir(source):
+            files.extend(glob.glob(os.path.join(source, "*.xlsx")))
+        elif any(char in source for char in "*?["):
+            files.extend(glob.glob(source))
+        else:
+            files.append(source)
+    # Excel lock files ("~$name.xlsx") are not workbooks
+    return sorted(path for path in set(files) if not os.path.basename(path).startswith("~$"))
+
+
+def run_batch(template_path, sources, output_dir, extension=".xlsx", jobs=None, store_dir=None):
+    """
+    Validate many source workbooks against one template.
+
+    The template is compiled once and shared with the workers. Each file gets
+    its own report, and its summary line is written as soon as it finishes; a
+    failing file is recorded with its error and does not stop the batch.
+
+    Args:
+    - template_path (str): Template workbook.
+    - sources (list): Source workbooks.
+    - output_dir (str): Directory for the reports and the summary.
+    - extension (str): Report format: ".xlsx", ".csv" or ".parquet".
+    - jobs (int, optional): Worker processes, the number of CPUs by default.
+    - store_dir (str, optional): Result store directory; when given, unchanged rows reuse the previous run.
+
+    Returns:
+    - list: Summary entries, in completion order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    started = time.perf_counter()
+    rules = compile_template(template_path)
+    logging.info(f"Compiled template {template_path} in {time.perf_counter() - started:.2f} s")
+
+    stages = STAGES + INCREMENTAL_STAGES if store_dir else STAGES
+    fields = (['file', 'status', 'rows'] + (['reused'] if store_dir else []) + ['discrepancies']
+              + [sheet for sheet, _, _ in CONFLICT_RULES] + [f"{stage}_s" for stage in stages] + ['report', 'error'])
+    jobs = jobs or os.cpu_count() or 1
+    reports = report_paths(sources, output_dir, extension)
+    entries = []
+    with open(os.path.join(output_dir, SUMMARY_FILE), "w", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=fields, restval='')
+        writer.writeheader()
+
+        def record(entry):
+            entries.append(entry)
+            writer.writerow(entry)
+            fh.flush()
+            if entry['status'] == 'ok':
+                timings = ", ".join(f"{stage} {entry[f'{stage}_s']:.2f} s" for stage in stages)
+                reused = f" ({entry['reused']} reused)" if store_dir else ""
+                logging.info(f"[{len(entries)}/{len(sources)}] {entry['file']}: {entry['rows']} rows{reused}, "
+                             f"{entry['discrepancies']} discrepancies ({timings})")
+            else:
+                logging.error(f"[{len(entries)}/{len(sources)}] {entry['file']}: {entry['error']}")
+
+        if jobs == 1 or len(sources) == 1:
+            for source in sources:
+                record(run_file(source, reports[source], rules, store_dir))
+        else:
+            with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(rules, store_dir)) as pool:
+                futures = [pool.submit(run_file, source, reports[source]) for source in sources]
+                for future in as_completed(futures):
+                    record(future.result())
+
+    ok = [entry for entry in entries if entry['status'] == 'ok']
+    totals = ", ".join(f"{stage} {sum(entry[f'{stage}_s'] for entry in ok):.1f} s" for stage in stages)
+    logging.info(f"{len(ok)}/{len(entries)} files validated in {time.perf_counter() - started:.1f} s (stage totals: {totals})")
+    return entries
+
+
+def main(argv=None):
+    """Command line entry point for the batch integrity check."""
+    parser = argparse.ArgumentParser(description="Validate many source workbooks against one template.")
+    parser.add_argument("template_file", help="Template workbook (Sheet1, Sheet2 and Sheet3)")
+    parser.add_argument("sources", nargs="+", help="Source workbooks, directories or glob patterns")
+    parser.add_argument("--output-dir", default="reports", help="Directory for the reports and summary.csv (default: reports)")
+    parser.add_argument("--format", choices=["xlsx", "csv", "parquet"], default="xlsx", help="Report format (default: xlsx)")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: number of CPUs)")
+    parser.add_argument("--incremental", action="store_true", help="Reuse the previous results of unchanged rows")
+    parser.add_argument("--store-dir", default=None, help=f"Result store for --incremental (default: {DEFAULT_STORE_DIR})")
+    args = parser.parse_args(argv)
+
+    sources = expand_sources(args.sources)
+    if not sources:
+        parser.error("no source workbooks found")
+    store_dir = (args.store_dir or DEFAULT_STORE_DIR) if args.incremental else None
+    entries = run_batch(args.template_file, sources, args.output_dir, f".{args.format}", args.jobs, store_dir)
+    return 0 if all(entry['status'] == 'ok' for entry in entries) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,180 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Fill of the cells holding a discrepancy, as in highlight_cells
+FALSE_FILL = '#F67280'
+
+# Report formats chosen from the destination file extension
+REPORT_FORMATS = {'.xlsx': 'xlsx', '.csv': 'csv', '.parquet': 'parquet'}
+
+# Rows per Excel sheet, header included
+XLSX_MAX_ROWS = 1048576
+
+# Characters allowed in an Excel sheet name
+SHEET_NAME_LIMIT = 31
+
+
+def false_mask(final):
+    """
+    Find the cells holding a discrepancy message, one vectorized pass per text column.
+
+    Args:
+    - final (DataFrame): Validated DataFrame.
+
+    Returns:
+    - DataFrame: True where the cell text starts with "FALSE".
+    """
+    mask = pd.DataFrame(False, index=final.index, columns=final.columns)
+    for column in final.columns:
+        values = final[column]
+        if pd.api.types.is_string_dtype(values) or values.dtype == object:
+            mask[column] = values.astype("string").str.startswith("FALSE").fillna(False).astype(bool)
+    return mask
+
+
+def report_format(dest_path):
+    """
+    Get the report format of a destination path.
+
+    Args:
+    - dest_path (str): Destination file.
+
+    Returns:
+    - str: 'xlsx', 'csv' or 'parquet'.
+    """
+    extension = os.path.splitext(dest_path)[1].lower()
+    if extension not in REPORT_FORMATS:
+        raise ValueError(f"Unsupported report file '{dest_path}', expected one of: {', '.join(REPORT_FORMATS)}")
+    return REPORT_FORMATS[extension]
+
+
+def _cell_rows(df):
+    """Yield the rows of a DataFrame as lists of plain Python values, None for empty cells."""
+    values = df.astype(object).where(df.notna(), None)
+    yield from values.itertuples(index=False, name=None)
+
+
+def _write_sheet(workbook, name, df, header_format, false_format=None, mask=None):
+    """
+    Write one sheet row by row, as constant-memory mode requires, and add the discrepancy fills.
+
+    Rows past the Excel limit go on to further sheets, "<name> (2)", "<name> (3)", ..., each with the header.
+    """
+    per_sheet = XLSX_MAX_ROWS - 1
+    for part, start in enumerate(range(0, max(len(df), 1), per_sheet), start=1):
+        suffix = f" ({part})" if part > 1 else ""
+        worksheet = workbook.add_worksheet(name[:SHEET_NAME_LIMIT - len(suffix)] + suffix)
+        worksheet.write_row(0, 0, [str(column) for column in df.columns], header_format)
+        chunk = df.iloc[start:start + per_sheet]
+        for row, cells in enumerate(_cell_rows(chunk), start=1):
+            worksheet.write_row(row, 0, cells)
+        if false_format is not None and len(chunk):
+            # One conditional format per flagged column instead of a style per cell
+            for col in np.flatnonzero(mask.iloc[start:start + per_sheet].any(axis=0).to_numpy()):
+                worksheet.conditional_format(1, col, len(chunk), col, {'type': 'text', 'criteria': 'begins with',
+                                                                       'value': 'FALSE', 'format': false_format})
+
+
+def write_xlsx_report(dest_path, final, sheets=None, mask=None):
+    """
+    Write the report as an Excel workbook with xlsxwriter in constant-memory mode.
+
+    Args:
+    - dest_path (str): Destination .xlsx file.
+    - final (DataFrame): Validated DataFrame, written to "Sheet1".
+    - sheets (dict, optional): Extra sheet name to DataFrame, written before "Sheet1".
+    - mask (DataFrame, optional): Output of false_mask, computed when omitted.
+    """
+    import xlsxwriter
+
+    mask = false_mask(final) if mask is None else mask
+    # Cells are data: a value starting with '=' or looking like a URL is written as the text it holds
+    workbook = xlsxwriter.Workbook(dest_path, {'constant_memory': True, 'strings_to_formulas': False,
+                                               'strings_to_urls': False})
+    try:
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        false_format = workbook.add_format({'bg_color': FALSE_FILL})
+        for name, df in (sheets or {}).items():
+            _write_sheet(workbook, name, df, header_format)
+        _write_sheet(workbook, "Sheet1", final, header_format, false_format, mask)
+    finally:
+        workbook.close()
+
+
+def write_report(final, dest_path, sheets=None):
+    """
+    Write the validated data and any extra sheets in the format given by the file extension.
+
+    An .xlsx report highlights the discrepancies. A .csv or .parquet report has
+    no colors; extra sheets go to "<name>_<sheet>.csv/.parquet" files next to it.
+
+    Args:
+    - final (DataFrame): Validated DataFrame.
+    - dest_path (str): Destination .xlsx, .csv or .parquet file.
+    - sheets (dict, optional): Extra sheet name to DataFrame, such as "PCI_DISCREPANCY".
+
+    Returns:
+    - int: Number of cells holding a discrepancy.
+    """
+    mask = false_mask(final)
+    fmt = report_format(dest_path)
+    if fmt == 'xlsx':
+        write_xlsx_report(dest_path, final, sheets, mask)
+    else:
+        stem, extension = os.path.splitext(dest_path)
+        for name, df in [(None, final)] + list((sheets or {}).items()):
+            path = dest_path if name is None else f"{stem}_{name}{extension}"
+            if fmt == 'csv':
+                df.to_csv(path, index=False)
+            else:
+                df.to_parquet(path, index=False)
+    return int(mask.to_numpy().sum())
+
+
+def benchmark(sizes=(10000, 100000, 500000), output_dir='.', styler_limit=100000):
+    """
+    Compare report write times on a synthetic validated export.
+
+    Args:
+    - sizes (tuple): Row counts to time.
+    - output_dir (str): Directory for the temporary report files.
+    - styler_limit (int): Largest size also timed with the Styler, which is slow and memory hungry.
+    """
+    from data_integrity_check import highlight_cells
+
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        final = pd.DataFrame({f"Column {i}": rng.integers(0, 1000, size).astype(str) for i in range(20)})
+        for i in range(3):
+            column = final[f"Column {i}"]
+            final[f"Column {i}"] = column.where(rng.random(size) > 0.05, "FALSE - The value is not within the valid range")
+
+        timings = []
+        if size <= styler_limit:
+            styler = final.style
+            style = getattr(styler, 'map', None) or styler.applymap
+            path = os.path.join(output_dir, "benchmark_styler.xlsx")
+            started = time.perf_counter()
+            style(highlight_cells).to_excel(path, sheet_name="Sheet1", index=False)
+            timings.append(("Styler .xlsx", time.perf_counter() - started))
+            os.remove(path)
+        for extension in ('.xlsx', '.csv', '.parquet'):
+            path = os.path.join(output_dir, f"benchmark_report{extension}")
+            started = time.perf_counter()
+            write_report(final, path)
+            timings.append((f"write_report {extension}", time.perf_counter() - started))
+            os.remove(path)
+        for name, elapsed in timings:
+            print(f"{size:>8} rows  {name:<22} {elapsed:8.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the integrity check report writers.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--styler-limit", type=int, default=100000, help="Largest size timed with the Styler")
+    args = parser.parse_args()
+    benchmark(args.sizes, styler_limit=args.styler_limit)
@@ -0,0 +1,167 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from data_integrity_check import (BAND_ANTENNA_MAP, GNB_ID_MAX, LOCAL_CELL_ID_MAX, NR_CELL_ID_MAX, SITE_NUMBER_MAX,
+                                  TEXT_DTYPE, get_local_cell_id, get_nr_cell_global_id, get_nr_cell_id)
+
+# Random rows per seed, and seeds per property
+NUM_ROWS = 2000
+SEEDS = range(10)
+
+BANDS = list(BAND_ANTENNA_MAP) + ['n66_AWS-4 DL', 'n41', 'B2', 'n2', None]
+
+
+# Row-wise references: the functions as they were applied with DataFrame.apply before vectorization.
+# They returned '' for failed cells; a cell int() cannot read now gives '' too instead of an exception.
+
+def reference_nr_cell_id(gnb_id, local_cell_id):
+    gnb_id, local_cell_id = str(gnb_id), str(local_cell_id)
+    if "FALSE" in gnb_id or "FALSE" in local_cell_id:
+        return ''
+    try:
+        return str(int(format(int(gnb_id), '024b') + format(int(local_cell_id), '012b'), 2))
+    except ValueError:
+        return ''
+
+
+def reference_nr_cell_global_id(nr_cell_id):
+    nr_cell_id = str(nr_cell_id)
+    if "FALSE" in nr_cell_id:
+        return ''
+    try:
+        return str(int("133304" + format(int(nr_cell_id), 'x'), 16))
+    except ValueError:
+        return ''
+
+
+def reference_local_cell_id(site_number, band_name, antenna_id):
+    assignment_id = 50
+    site_number = str(site_number)
+    if not site_number or "FALSE" in site_number:
+        return ''
+    try:
+        site_number = int(site_number)
+        for key in BAND_ANTENNA_MAP:
+            if str(band_name).startswith(key):
+                assignment_id = BAND_ANTENNA_MAP[key].get(int(str(antenna_id)), assignment_id)
+                break
+    except ValueError:
+        return ''
+    return str((site_number - 1) * 21 + assignment_id)
+
+
+def draw_integers(rng, high, size):
+    """Integers concentrated on the edges of [0, high], with negatives and values past the int64 fast path."""
+    edges = np.array([0, 1, high - 1, high, high + 1, -1, -high, 2 * high + 1, (1 << 62) - 1, -(1 << 62)], dtype=np.int64)
+    values = rng.integers(0, high + 1, size, dtype=np.int64)
+    picks = rng.random(size) < 0.3
+    values[picks] = rng.choice(edges, picks.sum())
+    return values
+
+
+def as_int_column(rng, values):
+    """Typed column as loaded with SOURCE_SCHEMA, with missing cells one time in two."""
+    column = pd.array(values, dtype="Int64")
+    if rng.random() < 0.5:
+        column[rng.random(len(values)) < 0.05] = pd.NA
+    return pd.Series(column)
+
+
+def as_text_column(rng, values):
+    """Text column as left by apply_rules, with messages, padding, signs, oversized integers and junk."""
+    text = [str(value) for value in values]
+    for i in np.flatnonzero(rng.random(len(text)) < 0.25):
+        text[i] = rng.choice([
+            f" {text[i]} ", f"+{text[i]}", f"{text[i]}.0", f"FALSE - The value is not within the valid range",
+            "nan", "", "abc", "12a", "0x1F", str(10 ** 20 + int(rng.integers(0, 1000))), f"-{10 ** 19}", "00042",
+        ])
+    return pd.Series(text, dtype=TEXT_DTYPE)
+
+
+def make_column(rng, high, size, numeric):
+    values = draw_integers(rng, high, size)
+    return as_int_column(rng, values) if numeric else as_text_column(rng, values)
+
+
+def assert_matches(result, expected):
+    assert result.dtype == TEXT_DTYPE
+    mismatches = [(i, got, want) for i, (got, want) in enumerate(zip(result.tolist(), expected)) if got != want]
+    assert not mismatches, mismatches[:5]
+
+
+@pytest.mark.parametrize("numeric", [True, False])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_nr_cell_id_matches_row_wise(seed, numeric):
+    rng = np.random.default_rng(seed)
+    final = pd.DataFrame({'Custom: gNodeB_Id': make_column(rng, GNB_ID_MAX, NUM_ROWS, numeric),
+                          'Custom: Local_Cell_Id': make_column(rng, LOCAL_CELL_ID_MAX, NUM_ROWS, numeric)})
+
+    expected = [reference_nr_cell_id(gnb_id, cell_id) for gnb_id, cell_id
+                in zip(final['Custom: gNodeB_Id'].astype(str), final['Custom: Local_Cell_Id'].astype(str))]
+    assert_matches(get_nr_cell_id(final), expected)
+
+
+@pytest.mark.parametrize("numeric", [True, False])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_nr_cell_global_id_matches_row_wise(seed, numeric):
+    rng = np.random.default_rng(seed)
+    final = pd.DataFrame({'Custom: NR_Cell_Id': make_column(rng, NR_CELL_ID_MAX, NUM_ROWS, numeric)})
+
+    expected = [reference_nr_cell_global_id(value) for value in final['Custom: NR_Cell_Id'].astype(str)]
+    assert_matches(get_nr_cell_global_id(final), expected)
+
+
+@pytest.mark.parametrize("numeric", [True, False])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_local_cell_id_matches_row_wise(seed, numeric):
+    rng = np.random.default_rng(seed)
+    antennas = rng.integers(-1, 6, NUM_ROWS)
+    antennas[rng.random(NUM_ROWS) < 0.05] = 1 << 62
+    final = pd.DataFrame({
+        'Custom: gNodeB_Site_Number': make_column(rng, SITE_NUMBER_MAX, NUM_ROWS, numeric),
+        'Band Name': pd.Series(rng.choice(np.array(BANDS, dtype=object), NUM_ROWS), dtype='category'),
+        'Antenna ID': as_int_column(rng, antennas) if numeric else as_text_column(rng, antennas),
+    })
+
+    expected = [reference_local_cell_id(site_number, band_name, antenna_id) for site_number, band_name, antenna_id
+                in zip(final['Custom: gNodeB_Site_Number'].astype(str), final['Band Name'].astype(str),
+                       final['Antenna ID'].astype(str))]
+    assert_matches(get_local_cell_id(final), expected)
+
+
+def test_nr_cell_id_range_edges():
+    final = pd.DataFrame({'Custom: gNodeB_Id': pd.array([0, GNB_ID_MAX, GNB_ID_MAX + 1, 1, None], dtype="Int64"),
+                          'Custom: Local_Cell_Id': pd.array([0, LOCAL_CELL_ID_MAX, 0, LOCAL_CELL_ID_MAX + 1, 1],
+                                                            dtype="Int64")})
+    before = final.copy()
+
+    assert get_nr_cell_id(final).tolist() == ['0', str((1 << 36) - 1), str(1 << 36),
+                                              reference_nr_cell_id(1, LOCAL_CELL_ID_MAX + 1), '']
+    pd.testing.assert_frame_equal(final, before)
+
+
+def test_inputs_are_not_modified():
+    final = pd.DataFrame({'Custom: gNodeB_Id': pd.array([1, GNB_ID_MAX + 1], dtype="Int64"),
+                          'Custom: Local_Cell_Id': pd.array([LOCAL_CELL_ID_MAX + 1, -1], dtype="Int64"),
+                          'Custom: NR_Cell_Id': pd.array([NR_CELL_ID_MAX + 1, -1], dtype="Int64"),
+                          'Custom: gNodeB_Site_Number': pd.array([SITE_NUMBER_MAX + 1, -SITE_NUMBER_MAX - 1], dtype="Int64"),
+                          'Band Name': ['n71', 'n41'],
+                          'Antenna ID': pd.array([1 << 62, 2], dtype="Int64")})
+    before = final.copy()
+
+    get_nr_cell_id(final)
+    get_nr_cell_global_id(final)
+    get_local_cell_id(final)
+    pd.testing.assert_frame_equal(final, before)
+
+
+def test_nr_cell_global_id_hex_digit_edges():
+    values = [0, 15, 16, 255, 256, NR_CELL_ID_MAX, NR_CELL_ID_MAX + 1]
+    final = pd.DataFrame({'Custom: NR_Cell_Id': pd.Series([str(value) for value in values], dtype=TEXT_DTYPE)})
+
+    assert get_nr_cell_global_id(final).tolist() == [reference_nr_cell_global_id(value) for value in values]
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+pytest.importorskip("xlsxwriter")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from report_writer import write_report
+
+
+def test_xlsx_cells_are_written_as_text(tmp_path):
+    dest_path = str(tmp_path / "report.xlsx")
+    values = ["=1+1", "http://x", "mailto:a@b.c", "FALSE - The value is not within the valid range"]
+    final = pd.DataFrame({'Site Name': values, 'Custom: Local_Cell_Id': ["=A1", "ftp://y", "1", "2"]})
+
+    assert write_report(final, dest_path, sheets={"PCI_DISCREPANCY": final.head(1)}) == 1
+
+    workbook = openpyxl.load_workbook(dest_path)
+    for name, expected in (("Sheet1", final), ("PCI_DISCREPANCY", final.head(1))):
+        worksheet = workbook[name]
+        rows = list(worksheet.iter_rows(min_row=2, values_only=True))
+        assert rows == list(expected.itertuples(index=False, name=None))
+        for row in worksheet.iter_rows(min_row=2):
+            for cell in row:
+                assert cell.data_type == 's' and cell.hyperlink is None
@@ -0,0 +1,11 @@
+"""Helpers shared by the RSI tools (closest-location finder and RSI tuner)."""
+
+from .geodesy import EARTH_RADIUS, equirectangular, haversine, to_unit_vectors
+from .prach_index import PrachIndex, parse_prach_value
+from .spatial import RsiNearestIndex
+from .site_cache import SiteTableCache, load_site_table, prepare_columns
+
+__all__ = [
+    "EARTH_RADIUS", "PrachIndex", "RsiNearestIndex", "SiteTableCache", "equirectangular", "haversine", "load_site_table",
+    "parse_prach_value", "prepare_columns", "to_unit_vectors",
+]
@@ -0,0 +1,109 @@
+import time
+
+import numpy as np
+
+# Mean Earth radius (IUGG), the same convention as the haversine package
+EARTH_RADIUS_KM = 6371.0088
+EARTH_RADIUS = {
+    "km": EARTH_RADIUS_KM,
+    "miles": EARTH_RADIUS_KM / 1.609344,
+}
+
+
+def _radius(unit, radius=None):
+    if radius is not None:
+        return radius
+    try:
+        return EARTH_RADIUS[unit]
+    except KeyError:
+        raise ValueError(f"Unknown distance unit '{unit}', expected one of: {', '.join(EARTH_RADIUS)}") from None
+
+
+def _as_radians(values, dtype):
+    return np.radians(np.asarray(values, dtype=dtype))
+
+
+def haversine(lat1, lon1, lat2, lon2, unit="miles", dtype=np.float64, radius=None):
+    """
+    Great-circle distance between points given in degrees, vectorized over NumPy arrays.
+
+    Any argument may be a scalar or an array; they broadcast against each
+    other, so one point against a whole column is a single call.
+
+    Parameters:
+        lat1, lon1: Latitude/longitude of the first point(s) in degrees.
+        lat2, lon2: Latitude/longitude of the second point(s) in degrees.
+        unit (str): "miles" or "km".
+        dtype: np.float64, or np.float32 for half the memory traffic (about 1e-6 relative precision,
+            well under a metre at cell-site distances).
+        radius (float): Earth radius in the unit of the result, for tools that keep their own value;
+            defaults to the mean radius in `unit`.
+
+    Returns:
+        ndarray: Distances in the requested unit, NaN where a coordinate is NaN.
+    """
+    lat1, lon1, lat2, lon2 = (_as_radians(v, dtype) for v in (lat1, lon1, lat2, lon2))
+    d = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return (2 * _radius(unit, radius) * np.arcsin(np.sqrt(np.clip(d, 0, 1)))).astype(dtype, copy=False)
+
+
+def equirectangular(lat1, lon1, lat2, lon2, unit="miles", dtype=np.float64, radius=None):
+    """
+    Equirectangular approximation of the great-circle distance, for short distances.
+
+    It needs one cosine and one square root per point instead of four
+    trigonometric calls. Compared with haversine, the relative error stays
+    below 0.01% up to 50 miles and below 0.1% up to 150 miles for latitudes
+    within +/-60 degrees. It grows with distance and towards the poles, so use
+    haversine for anything long-range.
+
+    Parameters:
+        lat1, lon1: Latitude/longitude of the first point(s) in degrees.
+        lat2, lon2: Latitude/longitude of the second point(s) in degrees.
+        unit (str): "miles" or "km".
+        dtype: np.float64 or np.float32.
+        radius (float): Earth radius in the unit of the result; defaults to the mean radius in `unit`.
+
+    Returns:
+        ndarray: Distances in the requested unit, NaN where a coordinate is NaN.
+    """
+    lat1, lon1, lat2, lon2 = (_as_radians(v, dtype) for v in (lat1, lon1, lat2, lon2))
+    # Wrap the longitude difference into [-pi, pi] so the antimeridian is handled
+    dlon = lon2 - lon1
+    dlon -= 2 * np.pi * np.round(dlon / (2 * np.pi))
+    x = dlon * np.cos((lat1 + lat2) / 2)
+    y = lat2 - lat1
+    return (_radius(unit, radius) * np.sqrt(x * x + y * y)).astype(dtype, copy=False)
+
+
+def to_unit_vectors(lats, lons):
+    """
+    Convert latitude/longitude in degrees to 3D points on the unit sphere.
+
+    The chord length between two such points is monotonic in their
+    great-circle distance, so spatial indexes can work on them directly.
+    """
+    lat = _as_radians(lats, np.float64)
+    lon = _as_radians(lons, np.float64)
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+def benchmark(sizes=(10_000, 1_000_000, 10_000_000)):
+    """Print rows per second of the distance kernels for one point against n points."""
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        lats = rng.uniform(25, 49, size)
+        lons = rng.uniform(-124, -67, size)
+        for name, kernel, dtype in (("haversine", haversine, np.float64),
+                                    ("haversine", haversine, np.float32),
+                                    ("equirectangular", equirectangular, np.float64),
+                                    ("equirectangular", equirectangular, np.float32)):
+            args = (np.float64(37.0), np.float64(-95.0), lats.astype(dtype), lons.astype(dtype))
+            started = time.perf_counter()
+            kernel(*args, dtype=dtype)
+            elapsed = time.perf_counter() - started
+            print(f"{size:>10} rows  {name:<15} {np.dtype(dtype).name:<8} {size / elapsed:>14,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,175 @@
+import math
+import re
+import timeit
+
+import numpy as np
+
+# One "N" or "N-M" range, whitespace and zero padding allowed
+_RANGE_PATTERN = re.compile(r'^\s*(\d+)\s*(?:-\s*(\d+))?\s*$')
+
+# Ranges are clipped here so a typo such as "0-99999999" cannot blow up the expansion
+MAX_RSI = 65536
+
+
+def parse_prach_value(value):
+    """
+    Parse a single PRACH_ROOT_SEQUENCES cell into half-open (start, end) ranges.
+
+    Parameters:
+        value: Cell value such as 75, "0-100", " 005 - 010" or "0-9,120-129".
+
+    Returns:
+        list: (start, end) tuples with end exclusive, or None if the value is not empty but cannot be parsed.
+    """
+    if value is None or isinstance(value, bool):
+        return []
+    if isinstance(value, (int, np.integer)):
+        return [(int(value), int(value) + 1)] if value >= 0 else None
+    if isinstance(value, (float, np.floating)):
+        if math.isnan(value):
+            return []
+        if value.is_integer() and value >= 0:
+            return [(int(value), int(value) + 1)]
+        return None
+
+    text = str(value).strip()
+    if not text or text.lower() in ("nan", "none", "<na>"):
+        return []
+
+    ranges = []
+    for part in text.split(','):
+        match = _RANGE_PATTERN.match(part)
+        if not match:
+            return None
+        start = int(match.group(1))
+        last = int(match.group(2)) if match.group(2) is not None else start
+        if last >= start:
+            ranges.append((start, last + 1))
+    return ranges
+
+
+class PrachIndex:
+    """
+    Interval index over a PRACH_ROOT_SEQUENCES column.
+
+    The column is parsed once into compact start/end arrays grouped by row, so
+    the RSIs of a row are a slice lookup. The (RSI, row) coverage pairs are
+    expanded once on first use and kept sorted by RSI, so the rows covering an
+    RSI are found with a binary search.
+
+    Parameters:
+        values (iterable): PRACH_ROOT_SEQUENCES values, one per row.
+    """
+
+    def __init__(self, values):
+        starts, ends, counts, invalid = [], [], [], []
+        parsed = {}
+        for value in values:
+            key = (type(value), value) if not isinstance(value, float) or not math.isnan(value) else None
+            if key not in parsed:
+                parsed[key] = parse_prach_value(value)
+            ranges = parsed[key]
+            invalid.append(ranges is None)
+            ranges = ranges or []
+            counts.append(len(ranges))
+            for start, end in ranges:
+                starts.append(start)
+                ends.append(end)
+
+        self.starts = np.minimum(np.asarray(starts, dtype=np.int64), MAX_RSI)
+        self.ends = np.minimum(np.asarray(ends, dtype=np.int64), MAX_RSI)
+        self.offsets = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+        self.invalid = np.asarray(invalid, dtype=bool)
+        self.num_rows = len(counts)
+        self._pairs = None
+
+    def __len__(self):
+        return self.num_rows
+
+    def row_ranges(self, row):
+        """Return the (start, end) ranges of a row, end exclusive."""
+        span = slice(self.offsets[row], self.offsets[row + 1])
+        return list(zip(self.starts[span].tolist(), self.ends[span].tolist()))
+
+    def rsis_for_row(self, row):
+        """Return the sorted RSIs covered by a row."""
+        ranges = self.row_ranges(row)
+        if not ranges:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate([np.arange(start, end) for start, end in ranges]))
+
+    def pairs(self):
+        """Return (rsis, rows) arrays of every coverage pair, sorted by RSI then row."""
+        if self._pairs is None:
+            lengths = self.ends - self.starts
+            interval_rows = np.repeat(np.arange(self.num_rows), np.diff(self.offsets))
+            rows = np.repeat(interval_rows, lengths)
+            rsis = np.repeat(self.starts, lengths) + np.arange(len(rows)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            order = np.lexsort((rows, rsis))
+            rsis, rows = rsis[order], rows[order]
+            # Overlapping ranges in one cell must not count the row twice
+            keep = np.ones(len(rows), dtype=bool)
+            keep[1:] = (rsis[1:] != rsis[:-1]) | (rows[1:] != rows[:-1])
+            self._pairs = (rsis[keep], rows[keep])
+        return self._pairs
+
+    def rows_for_rsi(self, rsi):
+        """Return the sorted row positions whose PRACH ranges cover an RSI."""
+        rsis, rows = self.pairs()
+        left, right = np.searchsorted(rsis, [rsi, rsi + 1])
+        return rows[left:right]
+
+    def expand(self, num_rsi, mask=None):
+        """
+        Return the (rsis, rows) coverage pairs restricted to RSIs 0..num_rsi-1.
+
+        Parameters:
+            num_rsi (int): Number of RSIs to keep.
+            mask (array, optional): Boolean array; rows where it is False are dropped.
+
+        Returns:
+            tuple: (rsis, rows) arrays sorted by RSI then row.
+        """
+        rsis, rows = self.pairs()
+        end = np.searchsorted(rsis, num_rsi)
+        rsis, rows = rsis[:end], rows[:end]
+        if mask is not None:
+            keep = np.asarray(mask, dtype=bool)[rows]
+            rsis, rows = rsis[keep], rows[keep]
+        return rsis, rows
+
+
+def benchmark(num_rows=60000, num_rsi=891):
+    """Compare PrachIndex against per-RSI string parsing on a synthetic column."""
+    rng = np.random.default_rng(0)
+    first = rng.integers(0, num_rsi - 20, num_rows)
+    values = [f"{start}-{start + 9}" for start in first.tolist()]
+
+    # Legacy per-row parser, as the finder's check_prach_sequence was before PrachIndex
+    def check_prach_sequence(sequence, value):
+        sequence_parts = str(sequence).split('-')
+        start, end = 0, 0
+        if len(sequence_parts) == 1 and sequence_parts[0].isdigit():
+            start = int(sequence_parts[0])
+            end = start + 1
+        elif len(sequence_parts) == 2 and sequence_parts[0].isdigit() and sequence_parts[1].isdigit():
+            start = int(sequence_parts[0])
+            end = int(sequence_parts[1]) + 1
+        return value in range(start, end)
+
+    sample_rsis = range(0, num_rsi, max(1, num_rsi // 10))
+    legacy = timeit.timeit(lambda: [[check_prach_sequence(v, k) for v in values] for k in sample_rsis], number=1)
+    legacy *= num_rsi / len(sample_rsis)
+    build = timeit.timeit(lambda: PrachIndex(values).expand(num_rsi), number=1)
+    index = PrachIndex(values)
+    index.pairs()
+    lookup = timeit.timeit(lambda: [index.rows_for_rsi(k) for k in range(num_rsi)], number=1)
+
+    print(f"{num_rows} rows, {num_rsi} RSIs")
+    print(f"check_prach_sequence, all RSIs (extrapolated): {legacy:.2f} s")
+    print(f"PrachIndex build + expand: {build:.3f} s")
+    print(f"PrachIndex rows_for_rsi, all RSIs: {lookup:.4f} s")
+
+
+if __name__ == "__main__":
+    benchmark()
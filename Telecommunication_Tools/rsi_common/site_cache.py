@@ -0,0 +1,192 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import tempfile
+import time
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+# Snapshots live here unless RSI_CACHE_DIR says otherwise
+DEFAULT_CACHE_DIR = os.environ.get("RSI_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "rsi_tools"))
+
+# Number of snapshots kept before the least recently used ones are evicted
+MAX_SNAPSHOTS = 8
+
+INDEX_FILE = "index.json"
+
+
+def file_sha256(path, block_size=1 << 20):
+    """
+    Hash a file's content.
+
+    Parameters:
+        path (str): Path to the file.
+        block_size (int): Read size in bytes.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _to_text(value):
+    """Render a mixed-type cell as text, keeping integral numbers free of a trailing '.0'."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def prepare_columns(df, columns=None):
+    """
+    Keep the requested columns and give them compact, Arrow-friendly dtypes.
+
+    Parameters:
+        df (DataFrame): Table as read from the source file.
+        columns (dict, optional): Column name to dtype ("float32", "float64", "category", "text" or None to keep
+            the inferred dtype). All columns are kept when omitted.
+
+    Returns:
+        DataFrame: Table with the selected columns.
+    """
+    if columns is None:
+        columns = {name: None for name in df.columns}
+    missing = [name for name in columns if name not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns in site table: {', '.join(missing)}")
+
+    table = df[list(columns)].reset_index(drop=True)
+    for name, dtype in columns.items():
+        if dtype == "text" or (dtype is None and table[name].dtype == object):
+            table[name] = table[name].map(_to_text, na_action="ignore").astype("string")
+        elif dtype is not None:
+            table[name] = table[name].astype(dtype)
+    return table
+
+
+class SiteTableCache:
+    """
+    Columnar cache of site tables read from Excel/CSV exports.
+
+    The first load of a file runs the reader and stores the selected columns as
+    an uncompressed Feather snapshot. Later loads read the snapshot into a
+    DataFrame, a plain columnar read with no parsing of the source file. An
+    entry is reused while the file's size and mtime are unchanged; otherwise the
+    content hash decides, so a touched or moved file is still a hit. The least
+    recently used snapshots are evicted beyond max_snapshots.
+
+    Parameters:
+        cache_dir (str): Directory holding the snapshots and their index.
+        max_snapshots (int): Number of snapshots to keep.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_snapshots=MAX_SNAPSHOTS):
+        self.cache_dir = cache_dir
+        self.max_snapshots = max_snapshots
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, INDEX_FILE)
+
+    def _read_index(self):
+        try:
+            with open(self._index_path(), "r") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as fh:
+            json.dump(index, fh, indent=1)
+        os.replace(tmp_path, self._index_path())
+
+    def _evict(self, index):
+        """Drop the least recently used snapshots beyond max_snapshots."""
+        by_age = sorted(index, key=lambda name: index[name]["last_used"])
+        for name in by_age[:max(0, len(index) - self.max_snapshots)]:
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+            del index[name]
+            logging.info(f"Evicted site table snapshot {name}")
+
+    def load(self, path, reader, columns=None):
+        """
+        Load a site table through the cache.
+
+        Parameters:
+            path (str): Source Excel/CSV file.
+            reader (callable): Function reading the source file into a DataFrame, e.g. pd.read_excel.
+            columns (dict, optional): Columns to keep and their dtypes, see prepare_columns.
+
+        Returns:
+            DataFrame: The prepared site table.
+        """
+        if feather is None:
+            logging.warning("pyarrow is not installed, reading the site table without the cache")
+            return prepare_columns(reader(path), columns)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        source = os.path.abspath(path)
+        stat = os.stat(source)
+        spec = hashlib.sha256(json.dumps([getattr(reader, "__name__", str(reader)), columns], sort_keys=True).encode()).hexdigest()[:12]
+        index = self._read_index()
+
+        snapshot = next((name for name, entry in index.items()
+                         if entry["source"] == source and entry["spec"] == spec
+                         and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns), None)
+        content_hash = None
+        if snapshot is None:
+            content_hash = file_sha256(source)
+            snapshot = f"{content_hash[:24]}-{spec}.feather"
+            if snapshot not in index:
+                snapshot = None
+
+        snapshot_path = os.path.join(self.cache_dir, snapshot) if snapshot else None
+        if snapshot_path and os.path.exists(snapshot_path):
+            logging.info(f"Loading {path} from cached snapshot {snapshot}")
+            table = feather.read_table(snapshot_path).to_pandas()
+        else:
+            started = time.perf_counter()
+            content_hash = content_hash or file_sha256(source)
+            table = prepare_columns(reader(source), columns)
+            snapshot = f"{content_hash[:24]}-{spec}.feather"
+            snapshot_path = os.path.join(self.cache_dir, snapshot)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            os.close(fd)
+            feather.write_feather(table, tmp_path, compression="uncompressed")
+            os.replace(tmp_path, snapshot_path)
+            logging.info(f"Cached {path} as {snapshot} in {time.perf_counter() - started:.1f} s")
+
+        index[snapshot] = {"source": source, "spec": spec, "size": stat.st_size,
+                           "mtime_ns": stat.st_mtime_ns, "last_used": time.time()}
+        self._evict(index)
+        self._write_index(index)
+        return table
+
+
+def load_site_table(path, reader, columns=None, cache_dir=None):
+    """
+    Load a site table through the default columnar cache.
+
+    Parameters:
+        path (str): Source Excel/CSV file.
+        reader (callable): Function reading the source file into a DataFrame.
+        columns (dict, optional): Columns to keep and their dtypes, see prepare_columns.
+        cache_dir (str, optional): Cache directory, DEFAULT_CACHE_DIR when omitted.
+
+    Returns:
+        DataFrame: The prepared site table.
+    """
+    return SiteTableCache(cache_dir or DEFAULT_CACHE_DIR).load(path, reader, columns)
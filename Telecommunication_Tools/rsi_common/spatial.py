@@ -0,0 +1,73 @@
+import numpy as np
+
+from .geodesy import haversine, to_unit_vectors
+from .prach_index import PrachIndex
+
+
+class RsiNearestIndex:
+    """
+    Nearest site per RSI, built once and queried for many points.
+
+    Sites are bucketed by the RSIs they cover and each bucket gets a k-d tree
+    over unit-sphere coordinates. The chord length is monotonic in the
+    great-circle distance, so the nearest point in the tree is the nearest
+    site by Haversine as well.
+
+    Parameters:
+        lats (array): Site latitudes in degrees.
+        lons (array): Site longitudes in degrees.
+        rsi_values (iterable): RSI or PRACH_ROOT_SEQUENCES value per site, parsed with PrachIndex.
+        num_rsi (int): Number of RSIs (0..num_rsi-1) to index.
+        radius (float): Earth radius in miles for the returned distances; defaults to the mean radius.
+    """
+
+    def __init__(self, lats, lons, rsi_values, num_rsi, radius=None):
+        # scipy is only needed by the tools that build spatial indexes
+        from scipy.spatial import cKDTree
+
+        self.num_rsi = num_rsi
+        self.radius = radius
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.buckets = {}
+
+        unknown = np.isnan(self.lats) | np.isnan(self.lons)
+        rsis, row_ids = PrachIndex(rsi_values).expand(num_rsi, mask=~unknown)
+
+        xyz = to_unit_vectors(self.lats, self.lons)
+        bucket_rsis, bounds = np.unique(rsis, return_index=True)
+        for rsi, rows in zip(bucket_rsis.tolist(), np.split(row_ids, bounds[1:])):
+            # Keep the earliest row per coordinate so ties resolve like a sequential scan
+            _, first = np.unique(np.column_stack((self.lats[rows], self.lons[rows])), axis=0, return_index=True)
+            rows = rows[np.sort(first)]
+            self.buckets[rsi] = (cKDTree(xyz[rows]), rows)
+
+    def query(self, poi_lats, poi_lons):
+        """
+        Find the nearest site per RSI for each point.
+
+        Parameters:
+            poi_lats (array): Point latitudes in degrees.
+            poi_lons (array): Point longitudes in degrees.
+
+        Returns:
+            tuple: (picks, distances) arrays of shape (num_points, num_rsi) holding the site row and its
+            distance in miles; a pick of -1 (distance NaN) means no site uses that RSI.
+        """
+        poi_lats = np.asarray(poi_lats, dtype=np.float64)
+        poi_lons = np.asarray(poi_lons, dtype=np.float64)
+        picks = np.full((len(poi_lats), self.num_rsi), -1, dtype=np.int64)
+        poi_xyz = to_unit_vectors(poi_lats, poi_lons)
+
+        for rsi, (tree, rows) in self.buckets.items():
+            if not len(poi_xyz):
+                break
+            _, nearest = tree.query(poi_xyz)
+            picks[:, rsi] = rows[nearest]
+
+        distances = np.full(picks.shape, np.nan)
+        found = picks >= 0
+        poi_rows = np.nonzero(found)[0]
+        distances[found] = haversine(poi_lats[poi_rows], poi_lons[poi_rows], self.lats[picks[found]], self.lons[picks[found]], unit="miles",
+                                     radius=self.radius)
+        return picks, distances
@@ -0,0 +1,152 @@
+import math
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from rsi_common.prach_index import MAX_RSI, PrachIndex, parse_prach_value
+
+NUM_RSI = 120
+
+
+def check_prach_sequence(sequence, value):
+    """Legacy per-row parser of the closest-location finder, kept as the reference."""
+    sequence_parts = str(sequence).split('-')
+    start, end = 0, 0
+    if len(sequence_parts) == 1 and sequence_parts[0].isdigit():
+        start = int(sequence_parts[0])
+        end = start + 1
+    elif len(sequence_parts) == 2 and sequence_parts[0].isdigit() and sequence_parts[1].isdigit():
+        start = int(sequence_parts[0])
+        end = int(sequence_parts[1]) + 1
+    return value in range(start, end)
+
+
+def legacy_values(count, seed=0):
+    """Random cells in the forms the legacy parser understood, plus empty and invalid ones."""
+    rng = np.random.default_rng(seed)
+    values = []
+    for _ in range(count):
+        start = int(rng.integers(0, NUM_RSI))
+        kind = rng.integers(0, 7)
+        if kind == 0:
+            values.append(str(start))
+        elif kind == 1:
+            values.append(f"{start}-{start + int(rng.integers(0, 15))}")
+        elif kind == 2:
+            values.append(f"{start:03d}-{start + 3:04d}")
+        elif kind == 3:
+            values.append(start)
+        elif kind == 4:
+            # Reversed range: covers nothing in both parsers
+            values.append(f"{start + 5}-{start}")
+        elif kind == 5:
+            values.append(None if rng.integers(0, 2) else float("nan"))
+        else:
+            values.append("n/a")
+    return values
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("0-9,120-129", [(0, 10), (120, 130)]),
+    ("5, 7-8", [(5, 6), (7, 9)]),
+    ("0-9,9-12", [(0, 10), (9, 13)]),
+    ("005", [(5, 6)]),
+    (" 005 - 010 ", [(5, 11)]),
+    ("10-5", []),
+    (75, [(75, 76)]),
+    (np.int64(75), [(75, 76)]),
+    (75.0, [(75, 76)]),
+    (np.float32(3.0), [(3, 4)]),
+    ("", []),
+    ("   ", []),
+    (None, []),
+    (float("nan"), []),
+    ("nan", []),
+    ("<NA>", []),
+    (True, []),
+])
+def test_parse_prach_value(value, expected):
+    assert parse_prach_value(value) == expected
+
+
+@pytest.mark.parametrize("value", [75.5, -1, -1.0, "75.0", "abc", "1-2-3", "5,", ",5", "-5", "1;2"])
+def test_parse_prach_value_invalid(value):
+    # Floats come from numeric Excel cells; a float string is only produced by a bad export and is flagged
+    assert parse_prach_value(value) is None
+
+
+def test_invalid_rows_are_flagged_and_cover_nothing():
+    index = PrachIndex(["0-2", "abc", 7.5, None, "4"])
+
+    assert index.invalid.tolist() == [False, True, True, False, False]
+    assert [index.rsis_for_row(row).tolist() for row in range(len(index))] == [[0, 1, 2], [], [], [], [4]]
+
+
+def test_ranges_are_clipped_at_max_rsi():
+    index = PrachIndex([f"{MAX_RSI - 3}-99999999", f"{MAX_RSI + 10}"])
+
+    assert index.row_ranges(0) == [(MAX_RSI - 3, MAX_RSI)]
+    assert index.rsis_for_row(0).tolist() == [MAX_RSI - 3, MAX_RSI - 2, MAX_RSI - 1]
+    assert index.rsis_for_row(1).tolist() == []
+    assert index.rows_for_rsi(MAX_RSI - 1).tolist() == [0]
+
+
+def test_overlapping_ranges_count_a_row_once():
+    index = PrachIndex(["0-9,5-12", "7"])
+
+    assert index.rsis_for_row(0).tolist() == list(range(13))
+    assert index.rows_for_rsi(7).tolist() == [0, 1]
+    rsis, rows = index.expand(NUM_RSI)
+    assert len(rsis) == 14
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_rows_for_rsi_matches_legacy(seed):
+    values = legacy_values(300, seed)
+    index = PrachIndex(values)
+
+    for rsi in range(NUM_RSI + 20):
+        expected = [row for row, value in enumerate(values) if check_prach_sequence(value, rsi)]
+        assert index.rows_for_rsi(rsi).tolist() == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_rsis_for_row_matches_legacy(seed):
+    values = legacy_values(300, seed)
+    index = PrachIndex(values)
+
+    for row, value in enumerate(values):
+        expected = [rsi for rsi in range(NUM_RSI + 20) if check_prach_sequence(value, rsi)]
+        assert index.rsis_for_row(row).tolist() == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_expand_with_mask_matches_legacy(seed):
+    values = legacy_values(300, seed)
+    mask = np.random.default_rng(seed + 100).random(len(values)) < 0.7
+    index = PrachIndex(values)
+
+    for num_rsi in (0, 1, 50, NUM_RSI):
+        rsis, rows = index.expand(num_rsi, mask=mask)
+        expected = [(rsi, row) for rsi in range(num_rsi) for row, value in enumerate(values)
+                    if mask[row] and check_prach_sequence(value, rsi)]
+        assert list(zip(rsis.tolist(), rows.tolist())) == expected
+
+
+def test_expand_without_mask_keeps_every_row():
+    values = legacy_values(200, seed=7)
+    index = PrachIndex(values)
+
+    rsis, rows = index.expand(NUM_RSI)
+    masked_rsis, masked_rows = index.expand(NUM_RSI, mask=np.ones(len(values), dtype=bool))
+    assert rsis.tolist() == masked_rsis.tolist() and rows.tolist() == masked_rows.tolist()
+
+
+def test_repeated_values_parse_to_the_same_ranges():
+    values = ["3-5", float("nan"), "3-5", 4, "4", math.nan]
+    index = PrachIndex(values)
+
+    assert [index.row_ranges(row) for row in range(len(values))] == [[(3, 6)], [], [(3, 6)], [(4, 5)], [(4, 5)], []]
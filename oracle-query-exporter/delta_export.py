@@ -0,0 +1,212 @@
+import logging
+import os
+import time
+
+import pandas as pd
+
+from export_stream import DEFAULT_BATCH_SIZE, execute_query, iter_batches, open_writer, temp_path
+
+# Rows are matched between runs on these columns
+DEFAULT_KEYS = ('SITE_NAME', 'TECHNOLOGY')
+
+# Column of the snapshot holding the signature of each row
+SIGNATURE_COLUMN = 'ROW_SIGNATURE'
+
+# Oracle accepts at most 1000 values in an IN list
+IN_LIST_LIMIT = 1000
+
+
+def fetch_frame(cursor, query, params=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Run a query and load its result into a DataFrame, fetching batch_size rows per round trip.
+
+    Args:
+    - cursor: DB-API cursor.
+    - query (str): SQL query.
+    - params (dict, optional): Bind variables.
+    - batch_size (int): Rows per fetch.
+
+    Returns:
+    - DataFrame: Query result.
+    """
+    columns = execute_query(cursor, query, params, batch_size)
+    rows = [row for batch in iter_batches(cursor, batch_size) for row in batch]
+    return pd.DataFrame(rows, columns=columns)
+
+
+def _where(source):
+    """Keyword joining a condition to source, which may already hold a WHERE clause."""
+    return " AND " if " WHERE " in f" {source.upper()} " else " WHERE "
+
+
+def fetch_sites(cursor, columns, source, signature, sites, key, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Fetch the rows of some sites, IN_LIST_LIMIT sites per query.
+
+    Args:
+    - cursor: DB-API cursor.
+    - columns (str): Selected columns, comma separated.
+    - source (str): View and optional WHERE clause.
+    - signature (str): SQL expression of the row signature.
+    - sites (list): Values of the key column to fetch.
+    - key (str): Site column.
+    - batch_size (int): Rows per fetch.
+
+    Returns:
+    - DataFrame: The rows, with a ROW_SIGNATURE column.
+    """
+    frames = []
+    for start in range(0, len(sites), IN_LIST_LIMIT):
+        chunk = sites[start:start + IN_LIST_LIMIT]
+        binds = ", ".join(f":s{i}" for i in range(len(chunk)))
+        query = f"SELECT {columns}, {signature} AS {SIGNATURE_COLUMN} FROM {source}{_where(source)}{key} IN ({binds})"
+        frames.append(fetch_frame(cursor, query, {f"s{i}": site for i, site in enumerate(chunk)}, batch_size))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _signature_text(values):
+    """Compare signatures as text, with numbers as floats so 5 and 5.0 match."""
+    if pd.api.types.is_numeric_dtype(values):
+        values = values.astype("float64")
+    return values.astype("string").fillna("")
+
+
+def changed_keys(snapshot, current, keys):
+    """
+    Compare the signatures of the snapshot with the current ones, key by key.
+
+    A key has changed when its rows, counted with their signatures, differ.
+
+    Args:
+    - snapshot (DataFrame): Previous rows, with a ROW_SIGNATURE column.
+    - current (DataFrame): Key columns and ROW_SIGNATURE of the current rows.
+    - keys (list): Key columns.
+
+    Returns:
+    - tuple: (keys to fetch: new or changed, keys to remove), as DataFrames of the key columns.
+    """
+    def occurrences(df):
+        df = df[keys].assign(**{SIGNATURE_COLUMN: _signature_text(df[SIGNATURE_COLUMN])})
+        # Numbering equal rows keeps duplicates apart
+        return df.assign(_n=df.groupby(keys + [SIGNATURE_COLUMN], dropna=False).cumcount())
+
+    merged = occurrences(snapshot).merge(occurrences(current), how='outer', on=keys + [SIGNATURE_COLUMN, '_n'], indicator=True)
+    differing = merged.loc[merged['_merge'] != 'both', keys].drop_duplicates()
+    current_keys = pd.MultiIndex.from_frame(current[keys])
+    present = pd.MultiIndex.from_frame(differing).isin(current_keys)
+    return differing[present].reset_index(drop=True), differing[~present].reset_index(drop=True)
+
+
+def load_snapshot(path):
+    """Load the snapshot, or None if there is none yet."""
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def save_snapshot(snapshot, path):
+    """Write the snapshot under a temporary name and rename it into place."""
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    partial_path = temp_path(path)
+    try:
+        snapshot.to_parquet(partial_path, index=False)
+        os.replace(partial_path, path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+def refresh_snapshot(connection, columns, source, signature, snapshot_path, keys=DEFAULT_KEYS, full=False,
+                     batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Bring the local snapshot of a view up to date, fetching only the rows that changed.
+
+    One light query reads the key columns and a signature of every row: a hash
+    of the row, or the view's last-change column. The rows of new or changed
+    keys are then fetched by site and replace those keys in the snapshot, and
+    keys no longer in the view are removed. Without a usable snapshot the whole
+    view is fetched.
+
+    Args:
+    - connection: DB-API connection.
+    - columns (str): Selected columns, comma separated; must include the key columns.
+    - source (str): View and optional WHERE clause, as after FROM.
+    - signature (str): SQL expression that changes whenever a row does.
+    - snapshot_path (str): Local Parquet snapshot.
+    - keys (tuple): Key columns; the first one is used to fetch changed rows.
+    - full (bool): Fetch the whole view even if the snapshot is usable.
+    - batch_size (int): Rows per fetch.
+
+    Returns:
+    - tuple: (snapshot DataFrame, stats dict).
+    """
+    keys = list(keys)
+    started = time.perf_counter()
+    snapshot = None if full else load_snapshot(snapshot_path)
+    cursor = connection.cursor()
+    try:
+        full_query = f"SELECT {columns}, {signature} AS {SIGNATURE_COLUMN} FROM {source}"
+        stats = {'mode': 'full', 'changed': 0, 'removed': 0}
+        if snapshot is not None:
+            current = fetch_frame(cursor, f"SELECT {', '.join(keys)}, {signature} AS {SIGNATURE_COLUMN} FROM {source}",
+                                  batch_size=batch_size)
+            expected = [column.strip() for column in columns.split(",")] + [SIGNATURE_COLUMN]
+            if list(snapshot.columns) != expected:
+                logging.warning(f"Snapshot {snapshot_path} has other columns than the query, fetching the whole view")
+                snapshot = None
+        stats['signatures_s'] = time.perf_counter() - started
+
+        if snapshot is None:
+            snapshot = fetch_frame(cursor, full_query, batch_size=batch_size)
+            stats['fetched'] = len(snapshot)
+        else:
+            stats['mode'] = 'delta'
+            fetch, removed = changed_keys(snapshot, current, keys)
+            fetched = snapshot.iloc[:0]
+            if len(fetch):
+                fetched = fetch_sites(cursor, columns, source, signature, fetch[keys[0]].drop_duplicates().tolist(),
+                                      keys[0], batch_size)
+                # The site query also returns the unchanged keys of those sites
+                fetched = fetched[pd.MultiIndex.from_frame(fetched[keys]).isin(pd.MultiIndex.from_frame(fetch))]
+            replaced = pd.MultiIndex.from_frame(pd.concat([fetch, removed], ignore_index=True))
+            kept = snapshot[~pd.MultiIndex.from_frame(snapshot[keys]).isin(replaced)]
+            parts = [part for part in (kept, fetched) if len(part)]
+            snapshot = pd.concat(parts, ignore_index=True) if parts else snapshot.iloc[:0]
+            stats.update(changed=len(fetch), removed=len(removed), fetched=len(fetched))
+    finally:
+        cursor.close()
+
+    snapshot = snapshot.sort_values(keys, kind='stable').reset_index(drop=True)
+    save_snapshot(snapshot, snapshot_path)
+    stats['rows'] = len(snapshot)
+    stats['seconds'] = time.perf_counter() - started
+    logging.info(f"Snapshot {snapshot_path} refreshed ({stats['mode']}): {stats['rows']} rows, {stats['changed']} keys "
+                 f"fetched, {stats['removed']} removed, {stats['fetched']} rows fetched in {stats['seconds']:.1f} s")
+    return snapshot, stats
+
+
+def publish(snapshot, dest_path, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Write the snapshot, without its signature column, to dest_path atomically.
+
+    Args:
+    - snapshot (DataFrame): Output of refresh_snapshot.
+    - dest_path (str): Destination .xlsx, .csv, .parquet, .arrow or .feather file.
+    - batch_size (int): Rows per write.
+    """
+    started = time.perf_counter()
+    df = snapshot.drop(columns=[SIGNATURE_COLUMN])
+    values = df.astype(object).where(df.notna(), None)
+    partial_path = temp_path(dest_path)
+    writer = open_writer(partial_path, [(column,) for column in df.columns])
+    try:
+        for start in range(0, len(values), batch_size):
+            writer.write(list(values.iloc[start:start + batch_size].itertuples(index=False, name=None)))
+        writer.close()
+        os.replace(partial_path, dest_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    logging.info(f"Published {len(df)} rows to {dest_path} in {time.perf_counter() - started:.1f} s")
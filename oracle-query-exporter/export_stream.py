@@ -0,0 +1,466 @@
+import csv
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+# Rows fetched per round trip and handed to the writer as one batch
+DEFAULT_BATCH_SIZE = 10000
+
+# Batches buffered between the fetch and write threads; this bounds the memory in flight
+DEFAULT_QUEUE_SIZE = 4
+
+# Seconds between progress messages
+PROGRESS_INTERVAL = 10
+
+# Export formats chosen from the destination file extension
+EXPORT_FORMATS = {'.xlsx': 'xlsx', '.csv': 'csv', '.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow'}
+
+# Rows per Excel sheet, header included
+XLSX_MAX_ROWS = 1048576
+
+
+class ExportCancelled(Exception):
+    """Raised by stream_query when its cancel event is set."""
+
+
+def column_names(description):
+    """Get the column names of a DB-API cursor description."""
+    return [entry[0] for entry in description]
+
+
+def execute_query(cursor, query, params=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Run a query with round trips sized for streaming.
+
+    Args:
+    - cursor: DB-API cursor (cx_Oracle or any other driver).
+    - query (str): SQL query.
+    - params (dict, optional): Bind variables.
+    - batch_size (int): Rows fetched per round trip.
+
+    Returns:
+    - list: Column names of the result.
+    """
+    cursor.arraysize = batch_size
+    # cx_Oracle only: fetch the first batch together with the execute call
+    if hasattr(cursor, 'prefetchrows'):
+        cursor.prefetchrows = batch_size + 1
+    if params:
+        cursor.execute(query, params)
+    else:
+        cursor.execute(query)
+    return column_names(cursor.description)
+
+
+def iter_batches(cursor, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield the rows of an executed query in lists of at most batch_size rows."""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
+
+
+class CsvBatchWriter:
+    """Append batches of rows to a CSV file."""
+
+    def __init__(self, path, description):
+        self.fh = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.fh)
+        self.writer.writerow(column_names(description))
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.fh.close()
+
+
+class XlsxBatchWriter:
+    """
+    Append batches of rows to an Excel workbook written by xlsxwriter in constant-memory mode.
+
+    Rows past the Excel limit go on to new sheets ("Sheet2", ...), each with the header.
+    """
+
+    def __init__(self, path, description):
+        import xlsxwriter
+
+        self.workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+                                                   'nan_inf_to_errors': True})
+        self.header = column_names(description)
+        self.sheets = 0
+        self._new_sheet()
+
+    def _new_sheet(self):
+        self.sheets += 1
+        self.worksheet = self.workbook.add_worksheet(f"Sheet{self.sheets}")
+        self.worksheet.write_row(0, 0, self.header)
+        self.row = 1
+
+    def write(self, rows):
+        for cells in rows:
+            if self.row == XLSX_MAX_ROWS:
+                self._new_sheet()
+            self.worksheet.write_row(self.row, 0, cells)
+            self.row += 1
+
+    def close(self):
+        self.workbook.close()
+
+
+def _type_name(type_code):
+    """Upper-case name of a DB-API type code: cx_Oracle/oracledb DB_TYPE_* objects, older cx_Oracle type classes or strings."""
+    name = getattr(type_code, 'name', None) or getattr(type_code, '__name__', None) or str(type_code)
+    return name.upper()
+
+
+def declared_type(entry):
+    """
+    Get the Arrow type of a result column from its declared database type.
+
+    Oracle NUMBER columns declared with a precision and scale 0 are int64, the
+    other NUMBER columns float64, since cx_Oracle returns ints or floats for
+    them depending on each value. Character columns are text and DATE and
+    TIMESTAMP columns timestamps.
+
+    Args:
+    - entry (tuple): One entry of a DB-API cursor description, (name, type_code, display_size, internal_size, precision, scale, null_ok).
+
+    Returns:
+    - pyarrow.DataType: The column type, or None when the driver gives no type code or an unknown one (SQLite, LOBs, ...).
+    """
+    import pyarrow as pa
+
+    if len(entry) < 2 or entry[1] is None:
+        return None
+    name = _type_name(entry[1])
+    if 'NUMBER' in name:
+        declared_integer = len(entry) > 5 and entry[5] == 0 and bool(entry[4])
+        return pa.int64() if declared_integer else pa.float64()
+    if name.endswith(('NATIVE_INT', 'BINARY_INTEGER')):
+        return pa.int64()
+    if name.endswith(('NATIVE_FLOAT', 'NATIVE_DOUBLE', 'BINARY_FLOAT', 'BINARY_DOUBLE')):
+        return pa.float64()
+    if 'CHAR' in name or name.endswith(('STRING', 'ROWID')):
+        return pa.string()
+    if 'DATE' in name or 'TIMESTAMP' in name:
+        return pa.timestamp('us')
+    return None
+
+
+def column_type(entry, column=()):
+    """
+    Get the Arrow type of a result column: the declared type, else the type inferred from values of the column.
+
+    An inferred integer column is float64 unless the description declares scale 0.
+
+    Args:
+    - entry (tuple): One entry of a DB-API cursor description.
+    - column (sequence, optional): Values of the column in a batch.
+
+    Returns:
+    - pyarrow.DataType: The column type, or None while it is not declared and only NULLs were seen.
+    """
+    import pyarrow as pa
+
+    declared = declared_type(entry)
+    if declared is not None:
+        return declared
+    inferred = pa.array(column).type
+    if pa.types.is_null(inferred):
+        return None
+    if pa.types.is_integer(inferred) and not (len(entry) > 5 and entry[5] == 0 and bool(entry[4])):
+        return pa.float64()
+    return inferred
+
+
+def arrow_schema(description, rows=None):
+    """
+    Get the Arrow schema of a query result.
+
+    Each column takes its declared type (see declared_type). Only a column
+    whose type the driver does not give is inferred from the first batch of
+    rows; it is typed as text if that batch holds only NULLs for it.
+
+    Args:
+    - description (list): DB-API cursor description of the query.
+    - rows (list, optional): First batch of rows.
+
+    Returns:
+    - pyarrow.Schema: One field per column.
+    """
+    import pyarrow as pa
+
+    columns = zip(*rows) if rows else [()] * len(description)
+    return pa.schema([(name, column_type(entry, column) or pa.string())
+                      for name, entry, column in zip(column_names(description), description, columns)])
+
+
+def record_batch(rows, schema):
+    """
+    Convert a batch of fetched rows to an Arrow record batch of the given schema.
+
+    A text column also takes values of other types, written as text: with a
+    schema inferred from a first batch of NULLs, a later value of such a
+    column is not known in advance to be a number.
+    """
+    import pyarrow as pa
+
+    arrays = []
+    for column, field in zip(zip(*rows), schema):
+        try:
+            arrays.append(pa.array(column, type=field.type))
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            if not pa.types.is_string(field.type):
+                raise
+            arrays.append(pa.array([None if value is None else str(value) for value in column], type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def iter_record_batches(cursor, query, params=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Run a query and yield its result as Arrow record batches, batch_size rows each.
+
+    Each column takes its declared type (see declared_type), else the type of
+    its first non-NULL values. Until then such a column has the null type, so
+    the schema of the batches can change along the way; fetch_arrow_table
+    casts them to the final one.
+
+    Args:
+    - cursor: DB-API cursor (cx_Oracle or any other driver).
+    - query (str): SQL query.
+    - params (dict, optional): Bind variables.
+    - batch_size (int): Rows per fetch and per record batch.
+
+    Yields:
+    - pyarrow.RecordBatch: The rows of one fetch.
+    """
+    import pyarrow as pa
+
+    execute_query(cursor, query, params, batch_size)
+    names = column_names(cursor.description)
+    types = [None] * len(names)
+    for rows in iter_batches(cursor, batch_size):
+        columns = list(zip(*rows))
+        types = [known or column_type(entry, column) for known, entry, column in zip(types, cursor.description, columns)]
+        yield record_batch(rows, pa.schema([(name, known or pa.null()) for name, known in zip(names, types)]))
+
+
+def fetch_arrow_table(cursor, query, params=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Run a query into an Arrow table, without an intermediate DataFrame or file.
+
+    Args:
+    - cursor: DB-API cursor (cx_Oracle or any other driver).
+    - query (str): SQL query.
+    - params (dict, optional): Bind variables.
+    - batch_size (int): Rows per fetch and per record batch.
+
+    Returns:
+    - pyarrow.Table: The result, one chunk per fetch.
+    """
+    import pyarrow as pa
+
+    batches = list(iter_record_batches(cursor, query, params, batch_size))
+    if not batches:
+        return arrow_schema(cursor.description).empty_table()
+    # Columns typed only by a later batch, or never (all NULL, typed as text)
+    schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                        for field in batches[-1].schema])
+    return pa.concat_tables([pa.Table.from_batches([batch]).cast(schema) for batch in batches])
+
+
+class ParquetBatchWriter:
+    """
+    Append batches of rows to a Parquet file, one row group per batch.
+
+    The schema is opened with the first batch, see arrow_schema.
+    """
+
+    def __init__(self, path, description):
+        self.path = path
+        self.description = description
+        self.writer = None
+
+    def write(self, rows):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not rows:
+            return
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, arrow_schema(self.description, rows))
+        self.writer.write_table(pa.Table.from_batches([record_batch(rows, self.writer.schema)]))
+
+    def close(self):
+        if self.writer is None:
+            import pyarrow.parquet as pq
+
+            # No rows: still write a readable file with the column names
+            pq.write_table(arrow_schema(self.description).empty_table(), self.path)
+        else:
+            self.writer.close()
+
+
+class ArrowBatchWriter:
+    """
+    Append batches of rows to an Arrow IPC file (Feather version 2), one record batch per batch.
+
+    The file is uncompressed so readers can memory-map it. The schema is
+    opened with the first batch, see arrow_schema.
+    """
+
+    def __init__(self, path, description):
+        self.path = path
+        self.description = description
+        self.schema = None
+        self.writer = None
+
+    def _open(self, schema):
+        import pyarrow as pa
+
+        self.schema = schema
+        self.writer = pa.ipc.new_file(self.path, schema)
+
+    def write(self, rows):
+        if not rows:
+            return
+        if self.writer is None:
+            self._open(arrow_schema(self.description, rows))
+        self.writer.write_batch(record_batch(rows, self.schema))
+
+    def close(self):
+        if self.writer is None:
+            # No rows: still write a readable file with the column names
+            self._open(arrow_schema(self.description))
+        self.writer.close()
+
+
+BATCH_WRITERS = {'csv': CsvBatchWriter, 'xlsx': XlsxBatchWriter, 'parquet': ParquetBatchWriter, 'arrow': ArrowBatchWriter}
+
+
+def temp_path(dest_path):
+    """
+    Get a hidden temporary file next to dest_path, with the same extension.
+
+    Exports are written there and renamed over dest_path once complete, so
+    readers of dest_path never see a half-written file.
+    """
+    folder, name = os.path.split(dest_path)
+    stem, extension = os.path.splitext(name)
+    return os.path.join(folder, f".{stem}.{uuid.uuid4().hex[:8]}.tmp{extension}")
+
+
+def open_writer(dest_path, description):
+    """
+    Open the batch writer matching the extension of the destination file.
+
+    Args:
+    - dest_path (str): Destination .xlsx, .csv, .parquet, .arrow or .feather file.
+    - description (list): DB-API cursor description of the query.
+
+    Returns:
+    - object: Writer with write(rows) and close() methods.
+    """
+    extension = os.path.splitext(dest_path)[1].lower()
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export file '{dest_path}', expected one of: {', '.join(EXPORT_FORMATS)}")
+    return BATCH_WRITERS[EXPORT_FORMATS[extension]](dest_path, description)
+
+
+def _fetch_into(batches, stop, cursor, batch_size):
+    """Producer thread: queue the fetched batches, then None, or the exception that stopped the fetch."""
+    def put(item):
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for rows in iter_batches(cursor, batch_size):
+            if not put(rows):
+                return
+        put(None)
+    except BaseException as ex:
+        put(ex)
+
+
+def stream_query(cursor, query, dest_path, params=None, batch_size=DEFAULT_BATCH_SIZE, queue_size=DEFAULT_QUEUE_SIZE,
+                 cancel=None):
+    """
+    Export the result of a query to a file without holding it in memory.
+
+    A fetch thread reads the rows with fetchmany while the calling thread
+    writes the previous batches, so at most queue_size batches are held at
+    once. Progress is logged every PROGRESS_INTERVAL seconds. The file is
+    written under a temporary name and renamed to dest_path when complete, so
+    a failed export leaves the previous file untouched.
+
+    Args:
+    - cursor: DB-API cursor (cx_Oracle or any other driver).
+    - query (str): SQL query.
+    - dest_path (str): Destination .xlsx, .csv, .parquet, .arrow or .feather file.
+    - params (dict, optional): Bind variables.
+    - batch_size (int): Rows per fetch and per write.
+    - queue_size (int): Batches buffered between the fetch and write threads.
+    - cancel (threading.Event, optional): Set by another thread to abandon the export; ExportCancelled is then raised.
+
+    Returns:
+    - dict: 'rows' exported, 'seconds' elapsed and 'rows_per_sec'.
+    """
+    started = time.perf_counter()
+    execute_query(cursor, query, params, batch_size)
+    partial_path = temp_path(dest_path)
+    writer = open_writer(partial_path, cursor.description)
+
+    batches = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    fetcher = threading.Thread(target=_fetch_into, args=(batches, stop, cursor, batch_size), name="fetch", daemon=True)
+    fetcher.start()
+
+    rows = 0
+    last_report = started
+    try:
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled(f"Export to {dest_path} cancelled")
+            try:
+                item = batches.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            writer.write(item)
+            rows += len(item)
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL:
+                logging.info(f"{rows} rows exported ({rows / (now - started):.0f} rows/s)")
+                last_report = now
+        writer.close()
+        os.replace(partial_path, dest_path)
+    except BaseException:
+        stop.set()
+        try:
+            writer.close()
+        except Exception:
+            pass
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    finally:
+        stop.set()
+        fetcher.join()
+
+    seconds = time.perf_counter() - started
+    rate = rows / seconds if seconds else 0.0
+    logging.info(f"Exported {rows} rows to {dest_path} in {seconds:.1f} s ({rate:.0f} rows/s)")
+    return {'rows': rows, 'seconds': seconds, 'rows_per_sec': rate}
@@ -1,56 +1,123 @@
-import cx_Oracle
-import pandas as pd
-import os
-
-# Oracle database connection details
-oracle_host = 'host name'
-oracle_port = 'port number'
-oracle_sid = 'sid name'
-oracle_user = 'username'
-oracle_password = 'password'
-
-# Shared network location to save results
-shared_network_location = r'\\path\to\shared\location'
-
-# Oracle query to be executed
-oracle_query = """
-SELECT SITE_NAME, LATITUDE, LONGITUDE, BAND_INFO, BAND_CLASS_NAME, TECHNOLOGY, PCI, PSS_ID, SSS_ID, PRACH_ROOT_SEQUENCES FROM SITES_ATOLL_V WHERE ATOLL_SCHEMA IN ('carolinas', 'nashville') AND SITE_VERSION IN ('0000', '0001')
-"""
-
-# Directory where Oracle Instant Client is installed.
-# Update this path based on your Oracle Instant Client installation.
-lib_dir = r"C:\ORACLE\instantclient_18_3"
-
-# Initialize cx_Oracle client
-cx_Oracle.init_oracle_client(lib_dir=lib_dir)
-
-# Establish connection to Oracle database
-dsn = cx_Oracle.makedsn(host=oracle_host, port=oracle_port, sid=oracle_sid)
-connection = cx_Oracle.connect(
-    user=oracle_user,
-    password=oracle_password,
-    dsn=dsn
-)
-
-# Execute the query
-cursor = connection.cursor()
-cursor.execute(oracle_query)
-
-# Fetch all results
-results = cursor.fetchall()
-
-# Close cursor and connection
-cursor.close()
-connection.close()
-
-# Convert results to pandas DataFrame
-df = pd.DataFrame(results, columns=[col[0] for col in cursor.description])
-
-# Save DataFrame to Excel file in shared network location
-excel_filename = 'oracle_query_results.xlsx'
-excel_file_path = os.path.join(shared_network_location, excel_filename)
-
-if os.path.exists(excel_file_path):
-    os.remove(excel_file_path)
-
-df.to_excel(excel_file_path, index=False)
+import argparse
+import logging
+import os
+
+from delta_export import publish, refresh_snapshot
+from export_stream import DEFAULT_BATCH_SIZE, DEFAULT_QUEUE_SIZE, stream_query
+from partitioned_export import SqlitePool, export_partitions, hash_partitions, schema_partitions
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Oracle database connection details
+oracle_host = 'host name'
+oracle_port = 'port number'
+oracle_sid = 'sid name'
+oracle_user = 'username'
+oracle_password = 'password'
+
+# Shared network location to save results
+shared_network_location = r'\\path\to\shared\location'
+
+# Oracle query to be executed
+site_columns = "SITE_NAME, LATITUDE, LONGITUDE, BAND_INFO, BAND_CLASS_NAME, TECHNOLOGY, PCI, PSS_ID, SSS_ID, PRACH_ROOT_SEQUENCES"
+site_source = "SITES_ATOLL_V WHERE ATOLL_SCHEMA IN ('carolinas', 'nashville') AND SITE_VERSION IN ('0000', '0001')"
+oracle_query = f"""
+SELECT {site_columns} FROM {site_source}
+"""
+
+# Partitioned extraction: the ATOLL_SCHEMA values of oracle_query, and the query run once per partition
+atoll_schemas = ['carolinas', 'nashville']
+schema_query = f"""
+SELECT {site_columns} FROM SITES_ATOLL_V WHERE ATOLL_SCHEMA = :schema AND SITE_VERSION IN ('0000', '0001')
+"""
+hash_query = oracle_query.rstrip() + " AND ORA_HASH(ROWID, :max_bucket) = :bucket\n"
+
+# Delta extraction: local snapshot of the query, and a SQL expression that changes whenever a row does.
+# If the view has a last-change column, use it instead of the hash (e.g. row_signature = "LAST_MODIFIED").
+snapshot_file = os.path.join(os.path.expanduser("~"), ".cache", "oracle_export", "sites_snapshot.parquet")
+row_signature = "ORA_HASH(" + " || '|' || ".join(column.strip() for column in site_columns.split(",")) + ")"
+
+# Directory where Oracle Instant Client is installed.
+# Update this path based on your Oracle Instant Client installation.
+lib_dir = r"C:\ORACLE\instantclient_18_3"
+
+excel_filename = 'oracle_query_results.xlsx'
+
+
+def connect():
+    """Initialize the Oracle client and open a connection with the details above."""
+    import cx_Oracle
+
+    cx_Oracle.init_oracle_client(lib_dir=lib_dir)
+    dsn = cx_Oracle.makedsn(host=oracle_host, port=oracle_port, sid=oracle_sid)
+    return cx_Oracle.connect(user=oracle_user, password=oracle_password, dsn=dsn)
+
+
+def create_pool(sessions):
+    """Initialize the Oracle client and open a session pool of up to the given number of sessions."""
+    import cx_Oracle
+
+    cx_Oracle.init_oracle_client(lib_dir=lib_dir)
+    dsn = cx_Oracle.makedsn(host=oracle_host, port=oracle_port, sid=oracle_sid)
+    return cx_Oracle.SessionPool(user=oracle_user, password=oracle_password, dsn=dsn, min=1, max=sessions, increment=1,
+                                 threaded=True, getmode=cx_Oracle.SPOOL_ATTRVAL_WAIT)
+
+
+def main(argv=None):
+    """Run the query and stream its result to the shared location."""
+    parser = argparse.ArgumentParser(description="Export the Atoll site query to Excel, CSV, Parquet or Arrow.")
+    parser.add_argument("--output", default=os.path.join(shared_network_location, excel_filename),
+                        help="Destination .xlsx, .csv, .parquet, .arrow or .feather file (default: the shared Excel file)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per fetch round trip")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Batches buffered between fetching and writing")
+    parser.add_argument("--partition-by", choices=["schema", "hash"], default=None,
+                        help="Split the query by ATOLL_SCHEMA or by ROWID hash and fetch the parts concurrently")
+    parser.add_argument("--partitions", type=int, default=8, help="Number of hash partitions (default: 8)")
+    parser.add_argument("--jobs", type=int, default=4, help="Partitions fetched at once (default: 4)")
+    parser.add_argument("--dataset", action="store_true", help="Write one file per partition instead of merging them")
+    parser.add_argument("--sqlite", metavar="DB", default=None,
+                        help="Read from a SQLite copy of SITES_ATOLL_V instead of Oracle")
+    parser.add_argument("--delta", action="store_true",
+                        help="Refresh a local snapshot with the changed rows only, then publish it")
+    parser.add_argument("--snapshot", default=snapshot_file, help=f"Snapshot file for --delta (default: {snapshot_file})")
+    parser.add_argument("--full", action="store_true", help="With --delta, fetch the whole view into the snapshot")
+    args = parser.parse_args(argv)
+
+    if args.delta:
+        connection = SqlitePool(args.sqlite).acquire() if args.sqlite else connect()
+        try:
+            snapshot, _ = refresh_snapshot(connection, site_columns, site_source, row_signature, args.snapshot,
+                                           full=args.full, batch_size=args.batch_size)
+        finally:
+            connection.close()
+        publish(snapshot, args.output, args.batch_size)
+        return
+
+    if args.partition_by:
+        if args.partition_by == "schema":
+            query, partitions = schema_query, schema_partitions(atoll_schemas)
+        else:
+            query, partitions = hash_query, hash_partitions(args.partitions)
+        pool = SqlitePool(args.sqlite) if args.sqlite else create_pool(args.jobs)
+        try:
+            export_partitions(pool, query, partitions, args.output, args.jobs, args.dataset,
+                              batch_size=args.batch_size, queue_size=args.queue_size)
+        finally:
+            pool.close()
+        return
+
+    connection = SqlitePool(args.sqlite).acquire() if args.sqlite else connect()
+    try:
+        cursor = connection.cursor()
+        try:
+            stream_query(cursor, oracle_query, args.output, batch_size=args.batch_size, queue_size=args.queue_size)
+        finally:
+            cursor.close()
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from export_stream import (DEFAULT_BATCH_SIZE, DEFAULT_QUEUE_SIZE, ExportCancelled, execute_query, iter_batches, open_writer,
+                           stream_query, temp_path)
+
+
+def schema_partitions(schemas):
+    """
+    Split a query by ATOLL_SCHEMA; the query binds :schema.
+
+    Args:
+    - schemas (list): ATOLL_SCHEMA values.
+
+    Returns:
+    - list: (label, bind variables) per partition.
+    """
+    return [(schema, {'schema': schema}) for schema in schemas]
+
+
+def hash_partitions(count):
+    """
+    Split a query into ROWID hash buckets; the query binds :bucket and :max_bucket, as in ORA_HASH(ROWID, :max_bucket) = :bucket.
+
+    Args:
+    - count (int): Number of partitions.
+
+    Returns:
+    - list: (label, bind variables) per partition.
+    """
+    return [(f"part{bucket}", {'bucket': bucket, 'max_bucket': count - 1}) for bucket in range(count)]
+
+
+def partition_path(dest_path, label):
+    """Get the file of one partition: "<name>_<label><extension>" next to dest_path."""
+    stem, extension = os.path.splitext(dest_path)
+    return f"{stem}_{label}{extension}"
+
+
+def _ora_hash(value, max_bucket=4294967295):
+    """ORA_HASH stand-in for SQLite: a CRC32 of the value, in buckets 0 to max_bucket."""
+    return zlib.crc32(str(value).encode()) % (max_bucket + 1)
+
+
+class SqlitePool:
+    """
+    Stand-in for cx_Oracle.SessionPool over a SQLite copy of the view, to try the exporter without Oracle.
+
+    SQLite understands the same :name bind variables. ORA_HASH is provided as a
+    CRC32 so hash partitions and row hashes work too.
+
+    Parameters:
+        path (str): SQLite database file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def acquire(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.create_function("ORA_HASH", -1, _ora_hash, deterministic=True)
+        return connection
+
+    def release(self, connection):
+        connection.close()
+
+    def close(self):
+        pass
+
+
+def _fetch_partition(pool, query, label, params, batch_size, put):
+    """Worker: fetch one partition into the shared queue, then queue its timing entry."""
+    started = time.perf_counter()
+    entry = {'partition': label, 'rows': 0, 'error': None}
+    try:
+        connection = pool.acquire()
+        try:
+            cursor = connection.cursor()
+            try:
+                execute_query(cursor, query, params, batch_size)
+                # An empty batch still lets the writer open with the column names
+                if put((cursor.description, [])):
+                    for rows in iter_batches(cursor, batch_size):
+                        if not put((cursor.description, rows)):
+                            break
+                        entry['rows'] += len(rows)
+            finally:
+                cursor.close()
+        finally:
+            pool.release(connection)
+    except Exception as ex:
+        entry['error'] = ex
+    entry['seconds'] = time.perf_counter() - started
+    put(entry)
+
+
+def _export_partition(pool, query, label, params, dest_path, batch_size, queue_size, cancel=None):
+    """Worker: stream one partition to its own file, unless cancel is set first."""
+    if cancel is not None and cancel.is_set():
+        raise ExportCancelled(f"Partition {label} cancelled")
+    connection = pool.acquire()
+    try:
+        cursor = connection.cursor()
+        try:
+            result = stream_query(cursor, query, dest_path, params, batch_size, queue_size, cancel)
+        finally:
+            cursor.close()
+    finally:
+        pool.release(connection)
+    return {'partition': label, 'rows': result['rows'], 'seconds': result['seconds'], 'path': dest_path}
+
+
+def _log_partition(entry):
+    rate = entry['rows'] / entry['seconds'] if entry['seconds'] else 0.0
+    logging.info(f"Partition {entry['partition']}: {entry['rows']} rows in {entry['seconds']:.1f} s ({rate:.0f} rows/s)")
+
+
+def export_partitions(pool, query, partitions, dest_path, jobs=4, dataset=False,
+                      batch_size=DEFAULT_BATCH_SIZE, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    Export a query split into partitions, fetched concurrently on pooled connections.
+
+    By default the partitions are merged into dest_path by a single writer, in
+    the order the batches arrive. With dataset=True each partition goes to its
+    own file (see partition_path) instead. If a partition fails, the others are
+    stopped and the previous output files are left in place.
+
+    Args:
+    - pool: cx_Oracle.SessionPool, or anything with acquire() and release(connection).
+    - query (str): SQL query using the bind variables of the partitions.
+    - partitions (list): (label, bind variables) pairs, see schema_partitions and hash_partitions.
+    - dest_path (str): Destination .xlsx, .csv, .parquet, .arrow or .feather file.
+    - jobs (int): Partitions fetched at once; the pool should allow as many sessions.
+    - dataset (bool): Write one file per partition instead of one merged file.
+    - batch_size (int): Rows per fetch and per write.
+    - queue_size (int): Batches buffered per writer.
+
+    Returns:
+    - list: Per-partition entries with 'partition', 'rows' and 'seconds', in completion order.
+    """
+    started = time.perf_counter()
+    if dataset:
+        entries = _export_dataset(pool, query, partitions, dest_path, jobs, batch_size, queue_size)
+    else:
+        entries = _merge_partitions(pool, query, partitions, dest_path, jobs, batch_size, queue_size)
+
+    rows = sum(entry['rows'] for entry in entries)
+    seconds = time.perf_counter() - started
+    rate = rows / seconds if seconds else 0.0
+    logging.info(f"Exported {rows} rows from {len(entries)} partitions in {seconds:.1f} s ({rate:.0f} rows/s)")
+    return entries
+
+
+def _export_dataset(pool, query, partitions, dest_path, jobs, batch_size, queue_size):
+    """
+    Stream each partition to its own file on worker threads.
+
+    The partitions are written under temporary names and renamed into place
+    only once all of them succeeded. On the first failure the running
+    partitions are cancelled, the pending ones never start, and the temporary
+    files are removed.
+    """
+    cancel = threading.Event()
+    partial_paths = {label: temp_path(partition_path(dest_path, label)) for label, _ in partitions}
+    entries = []
+    executor = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="partition")
+    try:
+        futures = [executor.submit(_export_partition, pool, query, label, params, partial_paths[label], batch_size,
+                                   queue_size, cancel) for label, params in partitions]
+        for future in as_completed(futures):
+            entries.append(future.result())
+            _log_partition(entries[-1])
+        for entry in entries:
+            entry['path'] = partition_path(dest_path, entry['partition'])
+            os.replace(partial_paths[entry['partition']], entry['path'])
+    except BaseException:
+        cancel.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        for path in partial_paths.values():
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    finally:
+        executor.shutdown(wait=True)
+    return entries
+
+
+def _merge_partitions(pool, query, partitions, dest_path, jobs, batch_size, queue_size):
+    """Fetch the partitions on worker threads and write every batch to one file."""
+    batches = queue.Queue(maxsize=queue_size * jobs)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    writer = None
+    partial_path = temp_path(dest_path)
+    entries = []
+    executor = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="partition")
+    try:
+        for label, params in partitions:
+            executor.submit(_fetch_partition, pool, query, label, params, batch_size, put)
+        while len(entries) < len(partitions):
+            item = batches.get()
+            if isinstance(item, dict):
+                if item['error'] is not None:
+                    raise item['error']
+                entries.append(item)
+                _log_partition(item)
+                continue
+            description, rows = item
+            if writer is None:
+                writer = open_writer(partial_path, description)
+            if rows:
+                writer.write(rows)
+        if writer is not None:
+            writer.close()
+            os.replace(partial_path, dest_path)
+    except BaseException:
+        stop.set()
+        if writer is not None:
+            try:
+                writer.close()
+            except Exception:
+                pass
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+        raise
+    finally:
+        stop.set()
+        # Partitions not started yet are dropped; running ones stop at their next batch
+        executor.shutdown(wait=True, cancel_futures=True)
+    return entries
@@ -0,0 +1,131 @@
+import csv
+import glob
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from partitioned_export import SqlitePool, export_partitions, hash_partitions, partition_path, schema_partitions
+
+SCHEMAS = ['carolinas', 'nashville', 'georgia', 'florida']
+ROWS_PER_SCHEMA = 300
+
+# CHECK_ROW(schema, id) fails on the rows of FAILING_SCHEMA and slows the others down
+QUERY = "SELECT SITE_NAME, PCI, ATOLL_SCHEMA FROM SITES WHERE ATOLL_SCHEMA = :schema AND CHECK_ROW(ATOLL_SCHEMA, ID)"
+FAILING_SCHEMA = 'carolinas'
+ROW_DELAY = 0.002
+
+
+class CheckedSqlitePool(SqlitePool):
+    """SqlitePool whose connections know CHECK_ROW, to make one partition fail while the others are still running."""
+
+    def __init__(self, path, fail=False):
+        super().__init__(path)
+        self.fail = fail
+
+    def acquire(self):
+        connection = super().acquire()
+
+        def check_row(schema, row_id):
+            if self.fail and schema == FAILING_SCHEMA and row_id % ROWS_PER_SCHEMA == 10:
+                raise ValueError("broken row")
+            if self.fail:
+                time.sleep(ROW_DELAY)
+            return 1
+
+        connection.create_function("CHECK_ROW", 2, check_row)
+        return connection
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "sites.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE SITES (ID INTEGER, SITE_NAME TEXT, PCI INTEGER, ATOLL_SCHEMA TEXT)")
+    connection.executemany("INSERT INTO SITES VALUES (?, ?, ?, ?)",
+                           [(i, f"SITE{i}", i % 504, SCHEMAS[i // ROWS_PER_SCHEMA])
+                            for i in range(len(SCHEMAS) * ROWS_PER_SCHEMA)])
+    connection.commit()
+    connection.close()
+    return path
+
+
+def read_csv(path):
+    with open(path, newline="") as fh:
+        return list(csv.reader(fh))
+
+
+def all_rows(database):
+    connection = sqlite3.connect(database)
+    rows = connection.execute("SELECT SITE_NAME, PCI, ATOLL_SCHEMA FROM SITES").fetchall()
+    connection.close()
+    return sorted([name, str(pci), schema] for name, pci, schema in rows)
+
+
+def leftover_temp_files(folder):
+    return glob.glob(os.path.join(folder, ".*.tmp*"))
+
+
+def test_merged_export(database, tmp_path):
+    dest_path = str(tmp_path / "sites.csv")
+
+    entries = export_partitions(CheckedSqlitePool(database), QUERY, schema_partitions(SCHEMAS), dest_path, jobs=2,
+                                batch_size=50)
+
+    rows = read_csv(dest_path)
+    assert rows[0] == ["SITE_NAME", "PCI", "ATOLL_SCHEMA"]
+    assert sorted(rows[1:]) == all_rows(database)
+    assert sorted(entry['partition'] for entry in entries) == sorted(SCHEMAS)
+    assert all(entry['rows'] == ROWS_PER_SCHEMA for entry in entries)
+    assert not leftover_temp_files(str(tmp_path))
+
+
+def test_merged_hash_export(database, tmp_path):
+    dest_path = str(tmp_path / "sites.csv")
+    query = "SELECT SITE_NAME, PCI, ATOLL_SCHEMA FROM SITES WHERE ORA_HASH(ROWID, :max_bucket) = :bucket"
+
+    entries = export_partitions(SqlitePool(database), query, hash_partitions(3), dest_path, jobs=3, batch_size=64)
+
+    assert sorted(read_csv(dest_path)[1:]) == all_rows(database)
+    assert sum(entry['rows'] for entry in entries) == len(SCHEMAS) * ROWS_PER_SCHEMA
+
+
+def test_dataset_export(database, tmp_path):
+    dest_path = str(tmp_path / "sites.csv")
+
+    entries = export_partitions(CheckedSqlitePool(database), QUERY, schema_partitions(SCHEMAS), dest_path, jobs=2,
+                                dataset=True, batch_size=50)
+
+    assert sorted(entry['partition'] for entry in entries) == sorted(SCHEMAS)
+    for entry in entries:
+        assert entry['path'] == partition_path(dest_path, entry['partition'])
+        rows = read_csv(entry['path'])
+        assert len(rows) == ROWS_PER_SCHEMA + 1
+        assert {row[2] for row in rows[1:]} == {entry['partition']}
+    assert not os.path.exists(dest_path)
+    assert not leftover_temp_files(str(tmp_path))
+
+
+@pytest.mark.parametrize("dataset", [False, True])
+def test_failed_partition_stops_the_others(database, tmp_path, dataset):
+    dest_path = str(tmp_path / "sites.csv")
+    previous = [partition_path(dest_path, schema) for schema in SCHEMAS] if dataset else [dest_path]
+    for path in previous:
+        with open(path, "w") as fh:
+            fh.write("previous export\n")
+
+    started = time.perf_counter()
+    with pytest.raises(sqlite3.OperationalError):
+        export_partitions(CheckedSqlitePool(database, fail=True), QUERY, schema_partitions(SCHEMAS), dest_path, jobs=2,
+                          dataset=dataset, batch_size=20)
+    seconds = time.perf_counter() - started
+
+    # Running through every row of the other partitions would take len(SCHEMAS) * ROWS_PER_SCHEMA * ROW_DELAY / jobs
+    assert seconds < (len(SCHEMAS) - 1) * ROWS_PER_SCHEMA * ROW_DELAY / 2
+    for path in previous:
+        with open(path) as fh:
+            assert fh.read() == "previous export\n"
+    assert sorted(os.listdir(str(tmp_path))) == sorted(["sites.db"] + [os.path.basename(path) for path in previous])
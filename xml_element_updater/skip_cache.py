@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+# Kept in the output folder; not an .xml file, so never taken for an input
+MANIFEST_FILE = ".xml_update_manifest.json"
+
+# Bumped whenever the manifest layout or the meaning of its entries changes
+MANIFEST_FORMAT = 1
+
+# Bytes read at a time when hashing a file for the streaming mode
+CHUNK_SIZE = 1 << 20
+
+
+def rules_hash(element_name, new_text, rules=None):
+    """
+    Hash what the updater applies: the element and text, or the rule set.
+
+    Args:
+        element_name (str): The local name of the XML elements to update.
+        new_text (str): The new text to set for the matching elements.
+        rules (list, optional): Rule set from xml_rules.load_rules, used instead of element_name and new_text.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    spec = [MANIFEST_FORMAT, rules if rules is not None else [element_name, new_text]]
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def element_pattern(names):
+    """
+    Compile a byte pattern finding a start tag of any of the element names, with or without a prefix.
+
+    Args:
+        names (iterable): Local names of the elements.
+
+    Returns:
+        Pattern: Compiled bytes regular expression.
+    """
+    alternatives = b"|".join(re.escape(name.encode("utf-8")) for name in sorted(set(names)))
+    return re.compile(rb"<(?:[^\s<>/:]+:)?(?:" + alternatives + rb")[\s/>]")
+
+
+def _needs_parse(head):
+    """True for files the byte scan cannot judge: UTF-16 or UTF-32 text."""
+    return head.startswith((b"\xff\xfe", b"\xfe\xff")) or b"\x00" in head[:4]
+
+
+def scan_bytes(xml_data, pattern):
+    """
+    Hash the content of a file and look for the elements in its bytes.
+
+    Args:
+        xml_data (bytes): Content of the file.
+        pattern (Pattern): Output of element_pattern.
+
+    Returns:
+        tuple: (hex SHA-256 digest, whether the file may contain one of the elements).
+    """
+    found = _needs_parse(xml_data) or pattern.search(xml_data) is not None
+    return hashlib.sha256(xml_data).hexdigest(), found
+
+
+def scan_file(path, pattern):
+    """
+    Same as scan_bytes, reading the file in chunks so large files are never held in memory.
+
+    Args:
+        path (str): File to scan.
+        pattern (Pattern): Output of element_pattern.
+
+    Returns:
+        tuple: (hex SHA-256 digest, whether the file may contain one of the elements).
+    """
+    digest = hashlib.sha256()
+    found = False
+    tail = b""
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            if not found:
+                if not tail and _needs_parse(chunk):
+                    found = True
+                else:
+                    # The end of the previous chunk catches a tag split between the two
+                    found = pattern.search(tail + chunk) is not None
+                    tail = chunk[-512:]
+    return digest.hexdigest(), found
+
+
+class SkipManifest:
+    """
+    Record of the files the updater has seen, to skip those unchanged since the last run.
+
+    Each entry is keyed by the absolute input path and holds the size, mtime
+    and SHA-256 of the input, the hash of the rules applied to it, and the
+    size of the output written, if any. The manifest is saved through a
+    temporary file and one atomic rename.
+
+    Parameters:
+        path (str): Manifest file, usually MANIFEST_FILE in the output folder.
+        full (bool): Ignore the recorded entries, so every file is processed; the manifest is still saved.
+    """
+
+    def __init__(self, path, full=False):
+        self.path = path
+        self.entries = {}
+        if full:
+            return
+        try:
+            with open(path, "r") as fh:
+                manifest = json.load(fh)
+            if manifest.get("format") == MANIFEST_FORMAT:
+                self.entries = manifest["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def entry(self, input_path, version):
+        """Get the entry of a file if it was made with the same rules, else None."""
+        entry = self.entries.get(os.path.abspath(input_path))
+        if entry is None or entry["rules"] != version:
+            return None
+        return entry
+
+    def unchanged(self, input_path, stat, output_path, version):
+        """
+        Check from its size and mtime alone that a file needs no work.
+
+        The output written last time must still be there, with its size.
+
+        Args:
+            input_path (str): Input file.
+            stat (os.stat_result): Current stat of the input file.
+            output_path (str): Output file of the input.
+            version (str): Output of rules_hash.
+
+        Returns:
+            bool: True if the file can be skipped without reading it.
+        """
+        entry = self.entry(input_path, version)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            return False
+        return self.output_intact(entry, output_path)
+
+    @staticmethod
+    def output_intact(entry, output_path):
+        """True if the output recorded in the entry, if any, is still in place."""
+        if entry["output_size"] is None:
+            return True
+        try:
+            return os.stat(output_path).st_size == entry["output_size"]
+        except OSError:
+            return False
+
+    def record(self, input_path, stat, digest, version, output_path, written):
+        """
+        Record the state of a file after a run.
+
+        Args:
+            input_path (str): Input file.
+            stat (os.stat_result): Stat of the input file when it was read.
+            digest (str): SHA-256 of its content.
+            version (str): Output of rules_hash.
+            output_path (str): Output file of the input.
+            written (bool): Whether the output holds an update of this input, from this run or a previous one.
+        """
+        self.entries[os.path.abspath(input_path)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest,
+            "rules": version,
+            "output_size": os.stat(output_path).st_size if written else None,
+        }
+
+    def save(self):
+        """Write the manifest, dropping the entries of inputs that no longer exist."""
+        self.entries = {path: entry for path, entry in self.entries.items() if os.path.exists(path)}
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as fh:
+                json.dump({"format": MANIFEST_FORMAT, "files": self.entries}, fh, indent=1)
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
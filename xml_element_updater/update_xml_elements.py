@@ -1,7 +1,122 @@
+import argparse
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 from lxml import etree
 
-def update_xml_elements(input_folder, output_folder, element_name, new_text):
+from skip_cache import MANIFEST_FILE, SkipManifest, element_pattern, rules_hash, scan_bytes, scan_file
+from xml_rules import apply_rules_file, describe_rule, load_rules
+from xml_stream import stream_update_file
+
+# One parser per process, reused for every file
+PARSER = etree.XMLParser()
+
+
+def list_xml_files(input_folder):
+    """
+    List the XML files of a folder.
+
+    Args:
+        input_folder (str): Path to the folder containing XML files.
+
+    Returns:
+        list: File names ending in '.xml', sorted.
+    """
+    return sorted(filename for filename in os.listdir(input_folder) if filename.endswith('.xml'))
+
+
+def update_xml_file(input_file_path, output_file_path, element_name, new_text, xml_data=None):
+    """
+    Update the matching elements of one XML file and save it if anything changed.
+
+    The file is parsed from bytes, so an encoding declaration is honoured, and
+    only the elements with the given local name are visited.
+
+    Args:
+        input_file_path (str): XML file to read.
+        output_file_path (str): File to write when an element changed.
+        element_name (str): The local name of the XML elements to update, in any namespace.
+        new_text (str): The new text to set for the matching elements.
+        xml_data (bytes, optional): Content of the input file, if already read.
+
+    Returns:
+        tuple: (bytes read, number of elements updated).
+    """
+    if xml_data is None:
+        with open(input_file_path, 'rb') as file:
+            xml_data = file.read()
+
+    root = etree.fromstring(xml_data, PARSER)
+
+    updated = 0
+    # "{*}" matches the local name in any namespace or none
+    for element in root.iter(f"{{*}}{element_name}"):
+        if element.text != new_text:
+            element.text = new_text
+            updated += 1
+
+    # Write the updated XML data once, after all the matching elements are set, under a
+    # temporary name renamed into place so an interrupted run never leaves a truncated file
+    if updated:
+        partial_path = f"{output_file_path}.tmp"
+        try:
+            with open(partial_path, 'wb') as output_file:
+                output_file.write(etree.tostring(root, encoding='utf-8'))
+            os.replace(partial_path, output_file_path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+    return len(xml_data), updated
+
+
+def _update_one(task):
+    """
+    Pool worker: update one file.
+
+    The file is hashed and its bytes searched for the elements first. It is
+    skipped if its content is the one recorded in the previous entry, and
+    only parsed if one of the elements appears in it.
+
+    Returns:
+        tuple: (file name, bytes read, elements changed (a list per rule with a rule set),
+            'skipped', 'scanned' or 'parsed', stat, SHA-256, whether the output holds an update).
+    """
+    filename, input_folder, output_folder, element_name, new_text, stream, rules, previous = task
+    input_file_path, output_file_path = os.path.join(input_folder, filename), os.path.join(output_folder, filename)
+    stat = os.stat(input_file_path)
+    pattern = element_pattern([rule['element'] for rule in rules] if rules is not None else [element_name])
+    if stream:
+        xml_data = None
+        size = stat.st_size
+        digest, found = scan_file(input_file_path, pattern)
+    else:
+        with open(input_file_path, 'rb') as file:
+            xml_data = file.read()
+        size = len(xml_data)
+        digest, found = scan_bytes(xml_data, pattern)
+
+    updated = [0] * len(rules) if rules is not None else 0
+    if previous is not None and previous['sha256'] == digest and SkipManifest.output_intact(previous, output_file_path):
+        # Touched but not changed since the last run
+        return filename, size, updated, 'skipped', stat, digest, previous['output_size'] is not None
+    if not found:
+        return filename, size, updated, 'scanned', stat, digest, False
+
+    if rules is not None:
+        size, updated = apply_rules_file(input_file_path, output_file_path, rules, PARSER, xml_data)
+        written = any(updated)
+    else:
+        if stream:
+            size, updated = stream_update_file(input_file_path, output_file_path, element_name, new_text)
+        else:
+            size, updated = update_xml_file(input_file_path, output_file_path, element_name, new_text, xml_data)
+        written = updated > 0
+    return filename, size, updated, 'parsed', stat, digest, written
+
+
+def update_xml_elements(input_folder, output_folder, element_name, new_text, jobs=1, stream=False, rules=None,
+                        manifest=None):
     """
     Update specified XML elements in all XML files within the input folder
     and save the modified files to the output folder.
@@ -11,32 +126,79 @@ def update_xml_elements(input_folder, output_folder, element_name, new_text):
         output_folder (str): Path to the folder to save modified XML files.
         element_name (str): The name of the XML element to update.
         new_text (str): The new text to set for the specified XML elements.
+        jobs (int): Worker processes; 1 updates the files in this process.
+        stream (bool): Rewrite the files with stream_update_file, in constant memory,
+            instead of loading each one as a tree.
+        rules (list, optional): Rule set from xml_rules.load_rules, applied in one pass per
+            file instead of element_name and new_text.
+        manifest (SkipManifest, optional): Record of the previous runs; files unchanged since,
+            with the same rules, are skipped, and the manifest is saved at the end.
+
+    Returns:
+        dict: 'files' found, 'skipped' as unchanged, 'scanned' without a match, 'parsed',
+            'updated_files' rewritten, 'bytes' read and 'seconds' elapsed; with rules, also
+            'hits', the number of elements each rule changed.
     """
-    # Iterate through XML files in the input folder
-    for filename in os.listdir(input_folder):
-        if filename.endswith('.xml'):
+    started = time.perf_counter()
+    summary = {'files': 0, 'skipped': 0, 'scanned': 0, 'parsed': 0, 'updated_files': 0, 'bytes': 0}
+    version = rules_hash(element_name, new_text, rules)
+    tasks = []
+    for filename in list_xml_files(input_folder):
+        summary['files'] += 1
+        previous = None
+        if manifest is not None:
             input_file_path = os.path.join(input_folder, filename)
-            output_file_path = os.path.join(output_folder, filename)
+            # Same size and mtime: not even read
+            if manifest.unchanged(input_file_path, os.stat(input_file_path), os.path.join(output_folder, filename), version):
+                summary['skipped'] += 1
+                continue
+            previous = manifest.entry(input_file_path, version)
+        tasks.append((filename, input_folder, output_folder, element_name, new_text, stream, rules, previous))
 
-            # Read XML data from input file
-            with open(input_file_path, 'r') as file:
-                xml_data = file.read()
+    if jobs > 1 and len(tasks) > 1:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        # Hand the files out in chunks so the per-task overhead stays small next to the parsing
+        results = executor.map(_update_one, tasks, chunksize=max(1, len(tasks) // (jobs * 16)))
+    else:
+        executor = None
+        results = map(_update_one, tasks)
 
-            # Parse XML data
-            root = etree.fromstring(xml_data)
+    if rules is not None:
+        summary['hits'] = [0] * len(rules)
+    try:
+        for filename, size, updated, status, stat, digest, written in results:
+            summary[status] += 1
+            summary['bytes'] += size
+            if manifest is not None:
+                manifest.record(os.path.join(input_folder, filename), stat, digest, version,
+                                os.path.join(output_folder, filename), written)
+            if rules is not None:
+                for index, hits in enumerate(updated):
+                    summary['hits'][index] += hits
+                if any(updated):
+                    summary['updated_files'] += 1
+                    print(f"Updated {sum(updated)} elements in file: {filename}")
+            elif updated:
+                summary['updated_files'] += 1
+                print(f"Updated element '{element_name}' in file: {filename}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if manifest is not None:
+            manifest.save()
 
-            # Iterate through all elements in the XML tree
-            for element in root.iter():
-                # Check if the element's local name matches the desired element name
-                if etree.QName(element).localname == element_name:
-                    # Update the text of the matching elements if it's not already set to the new text
-                    if element.text != new_text:
-                        element.text = new_text
+    summary['seconds'] = time.perf_counter() - started
+    megabytes = summary['bytes'] / 1e6
+    seconds = summary['seconds'] or 1e-9
+    print(f"{summary['files']} files ({megabytes:.1f} MB), {summary['updated_files']} updated, in {summary['seconds']:.1f} s: "
+          f"{summary['files'] / seconds:.0f} files/s, {megabytes / seconds:.1f} MB/s")
+    print(f"{summary['skipped']} skipped as unchanged, {summary['scanned']} scanned without a match, "
+          f"{summary['parsed']} parsed, {summary['updated_files']} rewritten")
+    if rules is not None:
+        for rule, hits in zip(rules, summary['hits']):
+            print(f"{hits:>8} x {describe_rule(rule)}")
+    return summary
 
-                        # Write the updated XML data to the output file
-                        with open(output_file_path, 'w') as output_file:
-                            output_file.write(etree.tostring(root, encoding='utf-8').decode('utf-8'))
-                            print(f"Updated element '{element_name}' in file: {filename}")
 
 # Define input and output folder paths
 input_folder_path = r'C:\Users\niyati.joshi\Documents\post-gsp\Dest_Folder'
@@ -46,5 +208,29 @@ output_folder_path = r'C:\Users\niyati.joshi\Documents\combined_1\Output3'
 element_name = "defautPagCycle"
 new_text = "defaultPagCycle_rf128"
 
-# Update XML elements
-update_xml_elements(input_folder_path, output_folder_path, element_name, new_text)
+
+def main(argv=None):
+    """Command line entry point; the folders and element default to the values above."""
+    parser = argparse.ArgumentParser(description="Update the text of XML elements in every XML file of a folder.")
+    parser.add_argument("input_folder", nargs="?", default=input_folder_path, help="Folder containing the XML files")
+    parser.add_argument("output_folder", nargs="?", default=output_folder_path, help="Folder for the modified files")
+    parser.add_argument("--element", default=element_name, help=f"Local name of the elements to update (default: {element_name})")
+    parser.add_argument("--text", default=new_text, help=f"New text of the elements (default: {new_text})")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes (default: number of CPUs)")
+    parser.add_argument("--stream", action="store_true", help="Stream each file instead of loading it, for files too large for memory")
+    parser.add_argument("--rules", help="CSV or YAML rule set applied in one pass instead of --element and --text")
+    parser.add_argument("--full", action="store_true", help="Process every file, even those unchanged since the last run")
+    parser.add_argument("--no-cache", action="store_true", help=f"Neither read nor write the {MANIFEST_FILE} manifest")
+    args = parser.parse_args(argv)
+    if args.rules and args.stream:
+        parser.error("--rules needs the whole document for its conditions and cannot be combined with --stream")
+
+    # Update XML elements
+    rules = load_rules(args.rules) if args.rules else None
+    manifest = None if args.no_cache else SkipManifest(os.path.join(args.output_folder, MANIFEST_FILE), args.full)
+    update_xml_elements(args.input_folder, args.output_folder, args.element, args.text, args.jobs, args.stream, rules,
+                        manifest)
+
+
+if __name__ == "__main__":
+    main()
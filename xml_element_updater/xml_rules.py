@@ -0,0 +1,152 @@
+import csv
+import os
+
+from lxml import etree
+
+# Columns of a rules file; only element and value are required
+RULE_FIELDS = ('element', 'value', 'xpath', 'current')
+
+# Dispatch tables already compiled in this process, by rule set
+_tables = {}
+
+
+def _rule(entry, source):
+    """Normalize one rule read from a file: text values, None for the optional fields left empty."""
+    rule = {}
+    for field in RULE_FIELDS:
+        value = entry.get(field)
+        rule[field] = None if value is None or (field in ('xpath', 'current') and str(value) == '') else str(value)
+    if not rule['element'] or rule['value'] is None:
+        raise ValueError(f"{source}: every rule needs an element and a value, got {entry}")
+    return rule
+
+
+def load_rules(rules_path):
+    """
+    Load a rule set from a CSV or YAML file.
+
+    A CSV file has the columns element, value and optionally xpath and current.
+    A YAML file is either a list of mappings with the same keys, or a plain
+    mapping of element to value.
+
+    A rule sets the text of the elements with that local name to value. When
+    xpath is given, only the elements for which it is true (evaluated from the
+    element, e.g. "../@id = '12'" or "ancestor::*[local-name()='cell']") are
+    set; when current is given, only those whose text currently equals it.
+
+    Args:
+        rules_path (str): Path to the .csv, .yaml or .yml file.
+
+    Returns:
+        list: Rules as dicts with the keys of RULE_FIELDS, in file order.
+    """
+    extension = os.path.splitext(rules_path)[1].lower()
+    if extension in ('.yaml', '.yml'):
+        import yaml
+
+        with open(rules_path, encoding='utf-8') as file:
+            entries = yaml.safe_load(file) or []
+        if isinstance(entries, dict):
+            entries = [{'element': element, 'value': value} for element, value in entries.items()]
+    elif extension == '.csv':
+        with open(rules_path, newline='', encoding='utf-8-sig') as file:
+            entries = list(csv.DictReader(file))
+    else:
+        raise ValueError(f"Unsupported rules file {rules_path}: use .csv, .yaml or .yml")
+    return [_rule(entry, rules_path) for entry in entries]
+
+
+def compile_rules(rules):
+    """
+    Compile a rule set into a dispatch table.
+
+    Args:
+        rules (list): Rules from load_rules.
+
+    Returns:
+        tuple: (tags for Element.iter, dict of local name to [(rule index, XPath or None, current, value)]).
+    """
+    key = tuple(tuple(rule[field] for field in RULE_FIELDS) for rule in rules)
+    table = _tables.get(key)
+    if table is None:
+        dispatch = {}
+        for index, rule in enumerate(rules):
+            condition = etree.XPath(rule['xpath']) if rule['xpath'] else None
+            dispatch.setdefault(rule['element'], []).append((index, condition, rule['current'], rule['value']))
+        # "{*}" matches the local name in any namespace or none
+        table = _tables[key] = (tuple(f"{{*}}{element}" for element in dispatch), dispatch)
+    return table
+
+
+def apply_rules(root, rules):
+    """
+    Apply a rule set to a parsed document in one walk over the matching elements.
+
+    Each element takes the value of the first rule for its name whose
+    conditions hold; rules for the same element are tried in file order.
+
+    Args:
+        root (Element): Root of the document, updated in place.
+        rules (list): Rules from load_rules.
+
+    Returns:
+        list: Number of elements each rule changed, by rule index.
+    """
+    tags, dispatch = compile_rules(rules)
+    hits = [0] * len(rules)
+    if not tags:
+        return hits
+    for element in root.iter(*tags):
+        for index, condition, current, value in dispatch[element.tag.rpartition('}')[2]]:
+            if current is not None and (element.text or '') != current:
+                continue
+            if condition is not None and not condition(element):
+                continue
+            if element.text != value:
+                element.text = value
+                hits[index] += 1
+            break
+    return hits
+
+
+def apply_rules_file(input_file_path, output_file_path, rules, parser=None, xml_data=None):
+    """
+    Apply a rule set to one XML file: one parse, then one atomic write if anything changed.
+
+    The output is written under a temporary name and renamed over output_file_path.
+
+    Args:
+        input_file_path (str): XML file to read.
+        output_file_path (str): File to write when an element changed.
+        rules (list): Rules from load_rules.
+        parser (XMLParser, optional): Parser to reuse.
+        xml_data (bytes, optional): Content of the input file, if already read.
+
+    Returns:
+        tuple: (bytes read, number of elements changed per rule).
+    """
+    if xml_data is None:
+        with open(input_file_path, 'rb') as file:
+            xml_data = file.read()
+
+    root = etree.fromstring(xml_data, parser)
+    hits = apply_rules(root, rules)
+
+    if any(hits):
+        partial_path = f"{output_file_path}.tmp"
+        try:
+            with open(partial_path, 'wb') as output_file:
+                output_file.write(etree.tostring(root, encoding='utf-8'))
+            os.replace(partial_path, output_file_path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+    return len(xml_data), hits
+
+
+def describe_rule(rule):
+    """One-line description of a rule for the run summary."""
+    conditions = [f"xpath {rule['xpath']}" if rule['xpath'] else None,
+                  f"current '{rule['current']}'" if rule['current'] is not None else None]
+    conditions = [condition for condition in conditions if condition]
+    return f"{rule['element']} = '{rule['value']}'" + (f" if {' and '.join(conditions)}" if conditions else "")
@@ -0,0 +1,246 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+from lxml import etree
+
+# Bytes collected before each write to the output file
+WRITE_BUFFER = 1 << 20
+
+_TEXT_SPECIALS = re.compile(r"[&<>\r]")
+_ATTRIBUTE_SPECIALS = re.compile(r'[&<>"\n\r\t]')
+
+
+def escape_text(text):
+    """Escape element text and tails the way libxml2 serializes them."""
+    if not _TEXT_SPECIALS.search(text):
+        return text
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\r", "&#13;")
+
+
+def escape_attribute(value):
+    """Escape an attribute value the way libxml2 serializes it."""
+    if not _ATTRIBUTE_SPECIALS.search(value):
+        return value
+    return (value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+            .replace("\n", "&#10;").replace("\r", "&#13;").replace("\t", "&#9;"))
+
+
+_qualified_names = {}
+
+
+def _qualified_name(tag, prefix):
+    name = _qualified_names.get((tag, prefix))
+    if name is None:
+        local = tag.rpartition("}")[2]
+        name = _qualified_names[(tag, prefix)] = f"{prefix}:{local}" if prefix else local
+    return name
+
+
+def start_tag(element, declarations, close=False):
+    """
+    Serialize the start tag of an element.
+
+    Args:
+        element (Element): Element being parsed; its attributes are complete.
+        declarations (list): (prefix, uri) namespace declarations made on the element itself.
+        close (bool): Write an empty-element tag ("<a/>").
+
+    Returns:
+        str: The start tag.
+    """
+    parts = ["<", _qualified_name(element.tag, element.prefix)]
+    for prefix, uri in declarations:
+        parts.append(f' xmlns:{prefix}="{escape_attribute(uri)}"' if prefix else f' xmlns="{escape_attribute(uri)}"')
+    if len(element.attrib):
+        prefixes = None
+        for name, value in element.attrib.items():
+            if name.startswith("{"):
+                if prefixes is None:
+                    # Attributes never use the default namespace
+                    prefixes = {uri: prefix for prefix, uri in reversed(list(element.nsmap.items())) if prefix}
+                uri, _, local = name[1:].partition("}")
+                name = f"{prefixes[uri]}:{local}" if uri != "http://www.w3.org/XML/1998/namespace" else f"xml:{local}"
+            parts.append(f' {name}="{escape_attribute(value)}"')
+    parts.append("/>" if close else ">")
+    return "".join(parts)
+
+
+def stream_update_file(input_file_path, output_file_path, element_name, new_text):
+    """
+    Update the matching elements of one XML file without building its tree.
+
+    The document is read with iterparse and written as it goes: every element
+    is serialized as soon as it is complete and then dropped, so memory stays
+    flat whatever the file size. The output is byte for byte what
+    update_xml_file writes, except for a namespaced attribute whose namespace
+    is bound to several prefixes, which may come out with another of them.
+    The output file is only kept if an element changed.
+
+    Args:
+        input_file_path (str): XML file to read.
+        output_file_path (str): File to write when an element changed.
+        element_name (str): The local name of the XML elements to update, in any namespace.
+        new_text (str): The new text to set for the matching elements.
+
+    Returns:
+        tuple: (bytes read, number of elements updated).
+    """
+    updated = 0
+    pending_ns = []
+    # Open elements, innermost last: [element, own namespace declarations, start tag written]
+    stack = []
+    # Finished node whose tail is written at the next event
+    pending_tail = None
+    buffer = []
+    buffered = 0
+
+    partial_path = f"{output_file_path}.tmp"
+    output_file = open(partial_path, "wb")
+
+    def write(text):
+        nonlocal buffered
+        buffer.append(text)
+        buffered += len(text)
+        if buffered >= WRITE_BUFFER:
+            output_file.write("".join(buffer).encode("utf-8"))
+            buffer.clear()
+            buffered = 0
+
+    def update(element):
+        nonlocal updated
+        if element.tag.rpartition("}")[2] == element_name and element.text != new_text:
+            element.text = new_text
+            updated += 1
+
+    def flush_tail():
+        nonlocal pending_tail
+        if pending_tail is not None:
+            if pending_tail.tail:
+                write(escape_text(pending_tail.tail))
+            # The node is written out: free it
+            pending_tail.getparent().remove(pending_tail)
+            pending_tail = None
+
+    def open_parent():
+        entry = stack[-1]
+        if not entry[2]:
+            element = entry[0]
+            update(element)
+            write(start_tag(element, entry[1]))
+            if element.text:
+                write(escape_text(element.text))
+            entry[2] = True
+
+    try:
+        with open(input_file_path, "rb") as input_file:
+            for event, node in etree.iterparse(input_file, events=("start-ns", "start", "end", "comment", "pi")):
+                if event == "start-ns":
+                    pending_ns.append(node)
+                elif event == "start":
+                    flush_tail()
+                    if stack:
+                        open_parent()
+                    stack.append([node, pending_ns, False])
+                    pending_ns = []
+                elif event == "end":
+                    element, declarations, opened = stack.pop()
+                    if opened:
+                        flush_tail()
+                        write(f"</{_qualified_name(element.tag, element.prefix)}>")
+                    else:
+                        update(element)
+                        if element.text is None:
+                            write(start_tag(element, declarations, close=True))
+                        else:
+                            write(start_tag(element, declarations) + escape_text(element.text)
+                                  + f"</{_qualified_name(element.tag, element.prefix)}>")
+                    if stack:
+                        pending_tail = element
+                elif stack:
+                    # Comments and processing instructions inside the root element
+                    flush_tail()
+                    open_parent()
+                    write(etree.tostring(node, encoding="unicode", with_tail=False))
+                    pending_tail = node
+            size = input_file.tell()
+        output_file.write("".join(buffer).encode("utf-8"))
+        output_file.close()
+        if updated:
+            os.replace(partial_path, output_file_path)
+    finally:
+        output_file.close()
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    return size, updated
+
+
+def _measure(mode, input_file_path, output_file_path, element_name, new_text):
+    """Run one update in this process and print its time and peak memory (used by benchmark)."""
+    from update_xml_elements import update_xml_file
+
+    function = stream_update_file if mode == "stream" else update_xml_file
+    started = time.perf_counter()
+    size, updated = function(input_file_path, output_file_path, element_name, new_text)
+    seconds = time.perf_counter() - started
+    try:
+        # Unix only; tracemalloc would miss the memory lxml allocates, so there is no peak elsewhere
+        import resource
+
+        peak = f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:9.0f} MB"
+    except ImportError:
+        peak = f"{'n/a':>12}"
+    print(f"{mode:<7}{size / 1e6:9.1f} MB {seconds:8.2f} s {size / 1e6 / seconds:8.1f} MB/s {peak} peak {updated:>8} updated")
+
+
+def benchmark(sizes=(10, 100, 500), output_dir="."):
+    """
+    Compare the tree and streaming paths on generated files: time, throughput and peak RSS.
+
+    Each run is a separate process so the peak memory of one does not hide the other.
+
+    Args:
+        sizes (tuple): File sizes to generate, in MB.
+        output_dir (str): Directory for the generated and output files.
+    """
+    for size in sizes:
+        input_file_path = os.path.join(output_dir, f"benchmark_{size}mb.xml")
+        with open(input_file_path, "w", encoding="utf-8") as fh:
+            fh.write('<configData xmlns="http://example.com/cm" xmlns:vs="http://example.com/vs">\n')
+            record = 0
+            while fh.tell() < size * 1e6:
+                fh.write(f'  <vs:cell id="{record}">\n    <defautPagCycle>rf{32 << (record % 3)}</defautPagCycle>\n'
+                         f'    <vs:param name="p{record % 97}">{record}</vs:param>\n  </vs:cell>\n')
+                record += 1
+            fh.write("</configData>\n")
+
+        outputs = []
+        for mode in ("tree", "stream"):
+            output_file_path = os.path.join(output_dir, f"benchmark_{size}mb.{mode}.out")
+            result = subprocess.run([sys.executable, os.path.abspath(__file__), "--measure", mode, input_file_path,
+                                     output_file_path, "defautPagCycle", "defaultPagCycle_rf128"],
+                                    cwd=os.path.dirname(os.path.abspath(__file__)))
+            if result.returncode:
+                # Typically the tree path killed for lack of memory
+                print(f"{mode:<7}{size:9.1f} MB failed (exit code {result.returncode})")
+            else:
+                outputs.append(output_file_path)
+        if len(outputs) == 2:
+            with open(outputs[0], "rb") as tree_file, open(outputs[1], "rb") as stream_file:
+                print(f"outputs {'identical' if tree_file.read() == stream_file.read() else 'DIFFER'}")
+        for path in outputs + [input_file_path]:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the tree and streaming XML updaters.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500], help="Generated file sizes in MB")
+    parser.add_argument("--measure", nargs=5, metavar=("MODE", "INPUT", "OUTPUT", "ELEMENT", "TEXT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        _measure(*args.measure)
+    else:
+        benchmark(args.sizes, os.getcwd())